@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+喵姆 AI 股市偵測站 - 常駐分析服務 (Warm Analysis Daemon)
+
+main.py 每次執行都要重新啟動直譯器、在每個進程匯入 pandas / backtrader /
+yfinance / nltk / FinMind、逐執行緒登入 DataLoader。常駐服務只付一次這些成本：
+- 計算進程池預先啟動（模組已匯入、基準指數已傳入）
+- 每條抓取執行緒的 DataLoader 預先登入，共用同一個 FinMind 額度排程器
+- 日 K / 籌碼 / 估值快取與情緒分析器留在記憶體中
+基準指數在換日後第一個請求時重新載入（同時重建進程池）。
+
+用法：
+    python analysis_daemon.py serve                 # 啟動服務（前景執行）
+    python analysis_daemon.py analyze 2330 2317     # 送出分析請求並列出結果
+    python analysis_daemon.py status
+    python analysis_daemon.py stop
+
+/admin 的「🔄 重新分析」按鈕透過 /api/reanalyze 呼叫同一個服務。
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from modules import analysis_service
+from modules.analysis_service import AnalysisServer, DaemonUnavailable
+from modules.budget import Budget
+
+
+class WarmAnalyzer:
+    """保存常駐狀態：額度排程器、基準指數、兩層執行器"""
+
+    def __init__(self):
+        import main   # 匯入一次即完成所有重量級套件的載入
+        self.main = main
+        self.dl, self.bucket = main.finmind_session()
+        self.lock = threading.Lock()
+        self.date = None
+        self.benchmarks = None
+        self.executor = None
+        self.jobs = 0
+        self.queued = 0        # 排隊中與執行中的股票數（客戶端據此決定等待上限）
+        self.queued_lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """換日時重新載入基準指數並重建執行器（呼叫端持有 lock）"""
+        from modules.indicators import DEFAULT_INDICATORS, lookback_days
+        from modules.benchmarks import load_benchmarks
+        from modules.two_tier import TwoTierExecutor
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        if today == self.date:
+            return
+        start = (datetime.now() - timedelta(days=lookback_days(DEFAULT_INDICATORS))).strftime('%Y-%m-%d')
+        self.benchmarks = load_benchmarks(start, today)
+        if self.executor is not None:
+            self.executor.close()
+        self.executor = TwoTierExecutor(initializer=self.main.init_worker, initargs=(self.benchmarks,))
+        self.executor.warm_up()
+        self._login_threads()
+        self.date = today
+        print(f"♨️ 常駐執行器就緒 ({today}): {self.executor.cpu_workers} 個計算進程")
+
+    def _login_threads(self):
+        """讓每條抓取執行緒各自建立並登入 DataLoader（Barrier 確保每條執行緒各拿到一個）"""
+        workers = self.executor.io._max_workers
+        barrier = threading.Barrier(workers)
+
+        def login(_):
+            try:
+                self.main.thread_loader(self.main.FINMIND_TOKEN)
+            finally:
+                barrier.wait(timeout=60)
+
+        try:
+            list(self.executor.io.map(login, range(workers)))
+        except Exception as e:
+            print(f"⚠️ DataLoader 預先登入失敗: {e}")
+
+    def tasks(self, tickers):
+        """股票代號 -> main.py 的任務格式（名稱取自 watchlist.json，持股取自 portfolio.json）"""
+        names, held = {}, set()
+        try:
+            with open("watchlist.json", "r", encoding="utf-8") as f:
+                names = {s["ticker"]: s["name"] for s in json.load(f).get("stocks", [])}
+        except Exception:
+            pass
+        try:
+            with open("portfolio.json", "r", encoding="utf-8") as f:
+                held = {h['symbol'] for h in json.load(f).get('current_holdings', [])}
+        except Exception:
+            pass
+        return [(t, names.get(t, t), self.main.FINMIND_TOKEN, t in held, Budget()) for t in tickers]
+
+    def analyze(self, tickers):
+        """一次只跑一個請求（共用同一個執行器），其餘在 lock 前排隊"""
+        tickers = [str(t) for t in tickers]
+        started = time.perf_counter()
+        with self.queued_lock:
+            self.queued += len(tickers)
+        try:
+            with self.lock:
+                self.refresh()
+                results = self.main.run_analysis(self.tasks(tickers), self.bucket, self.benchmarks,
+                                                 self.date, executor=self.executor)
+                self.jobs += 1
+        finally:
+            with self.queued_lock:
+                self.queued -= len(tickers)
+        print(f"⚡ 分析 {len(tickers)} 檔完成，耗時 {time.perf_counter() - started:.2f} 秒")
+        return results
+
+    def status(self):
+        return {'date': self.date, 'jobs': self.jobs, 'queued_tickers': self.queued,
+                'cpu_workers': self.executor.cpu_workers}
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.close()
+
+
+def serve():
+    started = time.perf_counter()
+    analyzer = WarmAnalyzer()
+    server = AnalysisServer({'analyze': analyzer.analyze}, status=analyzer.status)
+    host, port = server.address
+    print(f"🐱 常駐分析服務啟動於 {host}:{port}（暖機 {time.perf_counter() - started:.1f} 秒），按 Ctrl+C 結束")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analyzer.close()
+        print("👋 常駐分析服務已停止")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="喵姆常駐分析服務")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("serve", help="啟動服務")
+    analyze = sub.add_parser("analyze", help="分析指定股票")
+    analyze.add_argument("tickers", nargs="+")
+    analyze.add_argument("--json", action="store_true", help="輸出完整結果 JSON")
+    sub.add_parser("status", help="查看服務狀態")
+    sub.add_parser("stop", help="停止服務")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve()
+        return
+
+    try:
+        if args.command == "analyze":
+            started = time.perf_counter()
+            results = analysis_service.call('analyze', tickers=args.tickers)
+            if args.json:
+                # numpy 純量轉成 Python 型別（不在客戶端匯入 main）
+                default = lambda o: o.item() if hasattr(o, 'item') else str(o)
+                print(json.dumps(results, ensure_ascii=False, default=default, indent=2))
+                return
+            for r in results:
+                print(f"  {r['名稱']} ({r['代號']}) ${r['收盤價']}: {r['評分']} {r['建議']}")
+            print(f"⏱️ {len(results)}/{len(args.tickers)} 檔，往返 {time.perf_counter() - started:.2f} 秒")
+        else:
+            print(analysis_service.call('ping' if args.command == "status" else 'shutdown'))
+    except DaemonUnavailable as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"❌ 服務端錯誤: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+喵姆 AI 股市偵測站 - 投資組合回測
+
+以 portfolio.json 的現金為起始資金，觀察清單全部股票共用現金、
+單一個股投入上限 15%、保留 20% 現金，輸出淨值曲線、回撤與週轉率，
+結果寫入 data/portfolio_backtest.json。
+
+用法：
+    python backtest_portfolio.py               # 預設 3 年資料
+    python backtest_portfolio.py --years 5 --max-weight 0.1 --lot 1000
+"""
+import argparse
+import json
+import time
+
+from modules.backtest import StrategyParams
+from modules.portfolio_backtest import (
+    DEFAULT_CASH_RESERVE, DEFAULT_LOT_SIZE, DEFAULT_MAX_WEIGHT, price_panel, run_portfolio_backtest
+)
+from modules.storage import DATA_DIR, atomic_write_json
+from optimize_strategy import load_history, load_watchlist
+
+
+def load_cash():
+    try:
+        with open("portfolio.json", "r", encoding="utf-8") as f:
+            return float(json.load(f).get("cash_position", 0))
+    except Exception as e:
+        print(f"⚠️ 無法讀取 portfolio.json: {e}")
+        return 0.0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="投資組合回測（共用現金）")
+    parser.add_argument("--years", type=int, default=3, help="回測資料年數")
+    parser.add_argument("--cash", type=float, default=None, help="起始現金，預設為 portfolio.json 的 cash_position")
+    parser.add_argument("--max-weight", type=float, default=DEFAULT_MAX_WEIGHT, help="單一個股投入上限（占總資產）")
+    parser.add_argument("--reserve", type=float, default=DEFAULT_CASH_RESERVE, help="保留現金比例")
+    parser.add_argument("--lot", type=int, default=DEFAULT_LOT_SIZE, help="每筆成交股數單位")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cash = args.cash if args.cash is not None else load_cash()
+    if cash <= 0:
+        print("❌ 起始現金為 0，請確認 portfolio.json 的 cash_position 或使用 --cash")
+        return
+
+    stocks = load_watchlist()
+    print(f"📥 讀取 {len(stocks)} 檔、{args.years} 年日 K...")
+    open_, close = price_panel(load_history(stocks, args.years))
+
+    started = time.perf_counter()
+    result = run_portfolio_backtest(open_, close, cash, StrategyParams(), args.max_weight, args.reserve, args.lot)
+    elapsed = time.perf_counter() - started
+    summary = result.summary()
+
+    print(f"📊 {close.shape[1]} 檔 × {close.shape[0]} 個交易日（{elapsed:.2f} 秒）")
+    print(f"💰 起始 ${cash:,.0f} → 期末 ${summary['final_value']:,.0f} ({summary['total_return']}%)")
+    print(f"📉 最大回撤 {summary['max_drawdown']}% | 🔁 週轉率 {summary['turnover']} 倍 | 交易 {summary['trades']} 筆")
+
+    report = {
+        'summary': summary,
+        'settings': {'start_cash': cash, 'max_weight': args.max_weight, 'cash_reserve': args.reserve, 'lot_size': args.lot},
+        'equity': result.equity.round(0).to_dict(),
+        'drawdown': result.drawdown.round(2).to_dict(),
+        'positions': result.positions,
+    }
+    report_path = DATA_DIR / "portfolio_backtest.json"
+    atomic_write_json(report, report_path)
+    print(f"💾 結果已寫入 {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+多角色分析結果序列化的微基準測試
+
+比較 dataclasses.asdict（原本的 to_dict）與手寫 to_dict，
+以及整份結果經 NpEncoder 寫成 JSON 的耗時。
+
+用法：
+    python bench_role_serialization.py            # 預設 2000 檔
+    python bench_role_serialization.py --stocks 10000 --repeat 5
+"""
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from modules.role_analyzers import ConflictResolver, MultiRoleAnalyzer
+
+
+def asdict_role(role):
+    d = asdict(role)
+    d['role_conclusion'] = role.role_conclusion.value
+    return d
+
+
+def asdict_report(report):
+    d = asdict(report)
+    d['final_direction'] = report.final_direction.value
+    return d
+
+
+def build_roles(n):
+    """以隨機輸入產生 n 檔的角色輸出與衝突報告"""
+    rng = np.random.default_rng(0)
+    analyzer, resolver = MultiRoleAnalyzer(), ConflictResolver()
+    outputs = []
+    for _ in range(n):
+        rsi = float(rng.uniform(5, 95))
+        foreign = int(rng.integers(-12000, 12000))
+        roles = [
+            analyzer.chip_analyzer.analyze(foreign, int(rng.integers(0, 6)), int(rng.integers(-3000, 3000))),
+            analyzer.tech_analyzer.analyze(*rng.uniform(80, 120, 3).tolist(), rsi, float(rng.normal()), float(rng.normal(0, 6))),
+            analyzer.context_analyzer.analyze(bool(rng.random() < 0.3), bool(rng.random() < 0.3)),
+            analyzer.risk_analyzer.analyze(float(rng.uniform(0, 8)), float(rng.uniform(0, 30)), rsi, float(rng.uniform(1, 10)), foreign),
+        ]
+        outputs.append((roles, resolver.resolve(roles)))
+    return outputs
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多角色分析序列化基準")
+    parser.add_argument("--stocks", type=int, default=2000, help="模擬股票數")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數（取最佳值）")
+    args = parser.parse_args()
+
+    outputs = build_roles(args.stocks)
+
+    def serialize(role_fn, report_fn):
+        return [{'role_outputs': [role_fn(r) for r in roles], 'conflict_resolution': report_fn(report)}
+                for roles, report in outputs]
+
+    legacy = best_of(args.repeat, lambda: serialize(asdict_role, asdict_report))
+    flat = best_of(args.repeat, lambda: serialize(lambda r: r.to_dict(), lambda r: r.to_dict()))
+    payload = serialize(lambda r: r.to_dict(), lambda r: r.to_dict())
+    dumps = best_of(args.repeat, lambda: json.dumps(payload, ensure_ascii=False))
+
+    print(f"📦 {args.stocks} 檔 × 4 角色（最佳 {args.repeat} 次）")
+    print(f"🐢 dataclasses.asdict : {legacy:8.1f} ms")
+    print(f"🚀 手寫 to_dict       : {flat:8.1f} ms ({legacy / flat:.1f}x)")
+    print(f"📝 json.dumps         : {dumps:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import os
 import secrets
-import requests
 from flask import Flask, request, jsonify
 import threading
 import pandas as pd
@@ -9,13 +8,35 @@ import json
 import re
 import traceback
 from datetime import datetime, timedelta
+from dataclasses import asdict
 from FinMind.data import DataLoader
 from dotenv import load_dotenv
-from multiprocessing import Pool, cpu_count
+from multiprocessing import cpu_count
+from concurrent.futures import ThreadPoolExecutor
 from modules.role_analyzers import MultiRoleAnalyzer
+from modules.price_store import PriceStore
+from modules.chip_store import ChipStore
+from modules.fundamentals_cache import get_valuation, get_revenue
+from modules.sentiment import average_sentiment, score_watchlist, sentiment_label
+from modules.monte_carlo import simulate_var, get_rng
+from modules.streaming_indicators import StreamingIndicators
+from modules.indicators import (
+    DEFAULT_INDICATORS, attach_indicators, calculate_indicators_panel, compute_indicators, lookback_days, pivot_panel
+)
+from modules.backtest import run_backtest
+from modules.feature_store import FEATURE_STORE
+from modules.scoring import recommendation, score_features
+from modules.benchmarks import load_benchmarks, correlation_matrix, correlation_reasons
+from modules.fetch_stage import fetch_concurrently, summarize_timings
+from modules.two_tier import DEFAULT_IO_WORKERS, TwoTierExecutor
+from modules.result_stream import ResultStream
+from modules.checkpoint import RunCheckpoint, prune_runs
+from modules.budget import Budget, call_with_timeout
+from modules.rate_limiter import TokenBucket, ThrottledDataLoader, resolve_quota
+from modules import analysis_service
+from modules.http_client import http_get, http_post, AI_TIMEOUT
 import yfinance as yf
 import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 import websocket
 import backtrader as bt
 
@@ -52,6 +73,22 @@ PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
 app = Flask(__name__)
 
+# 本地日 K 資料倉（每次執行只補抓缺少的日期；抓取區間由指標登錄表的暖機長度決定）
+PRICE_STORE = PriceStore()
+
+# 本地籌碼寬表（預先算好 5/10/20 日法人淨買賣）；20 個交易日約 30 個日曆天，多留假期緩衝
+CHIP_STORE = ChipStore()
+CHIP_LOOKBACK_DAYS = 45
+
+# Monte Carlo 模擬次數（向量化後 10 萬次約 0.2 秒）
+MONTE_CARLO_SIMS = int(os.getenv("MONTE_CARLO_SIMS", "100000"))
+
+# 掃描進行中每隔幾秒以已完成的股票重新產生 index.html（0 = 只在最後產生）
+REPORT_REFRESH_SECONDS = float(os.getenv("REPORT_REFRESH_SECONDS", "30"))
+
+# 每累積幾檔完成的結果就以 analyze_batch 一起做多角色分析，再逐檔串流
+ROLE_BATCH_SIZE = int(os.getenv("ROLE_BATCH_SIZE", "16"))
+
 def parse_json_from_ai(content):
     """
     從 AI 回傳內容中提取並解析 JSON。
@@ -86,7 +123,7 @@ def ai_supervisor(error_log, api_choice='perplexity'):
                 "messages": [{"role": "user", "content": prompt}]
             }
             headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
-            response = requests.post(url, json=payload, headers=headers)
+            response = http_post(url, json=payload, headers=headers, timeout=AI_TIMEOUT)
             if response.status_code == 200:
                 content = response.json()['choices'][0]['message']['content']
                 result = parse_json_from_ai(content)
@@ -162,6 +199,26 @@ def handle_ask_ai():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/reanalyze', methods=['POST'])
+def handle_reanalyze():
+    """交給常駐分析服務 (analysis_daemon.py) 重新分析指定股票"""
+    tickers = (request.json or {}).get('tickers') or []
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    if not tickers or len(tickers) > 20 or not all(isinstance(t, str) and t.isalnum() for t in tickers):
+        return jsonify({'error': 'tickers 需為 1~20 個股票代號'}), 400
+    try:
+        results = analysis_service.call('analyze', tickers=tickers)
+    except analysis_service.DaemonBusy as e:
+        return jsonify({'error': str(e), 'busy': True}), 503
+    except analysis_service.DaemonUnavailable as e:
+        return jsonify({'error': f"{e}（請確認 python analysis_daemon.py serve 正在執行）", 'busy': False}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    summary = [{key: r.get(key) for key in ('代號', '名稱', '收盤價', '漲跌幅', '評分', '建議')} for r in results]
+    return app.response_class(json.dumps({'results': summary}, ensure_ascii=False, cls=NpEncoder),
+                              mimetype='application/json')
+
 @app.route('/admin')
 def admin_portal():
     # 讀取投資組合
@@ -171,23 +228,25 @@ def admin_portal():
             portfolio = json.load(f)
     except: pass
     
-    # 讀取最新分析數據
-    analysis_data = []
-    try:
-        with open("daily_analysis.json", "r", encoding="utf-8") as f:
-            analysis_data = json.load(f)
-    except: pass
+    # 讀取最新收盤價（特徵表優先，舊資料才從 daily_analysis.json 解析）
+    latest_close = {}
+    features = FEATURE_STORE.load()
+    if not features.empty:
+        latest_close = dict(zip(features['stock_id'], features['close']))
+    else:
+        try:
+            with open("daily_analysis.json", "r", encoding="utf-8") as f:
+                latest_close = {a['代號']: a['收盤價'] for a in json.load(f)}
+        except: pass
     
     # 計算市值
     market_value = 0
     total_cost = 0
     holdings_detail = []
     for h in portfolio.get('current_holdings', []):
-        current_price = 0
-        for a in analysis_data:
-            if a['代號'] == h['symbol']:
-                current_price = a['收盤價']
-                break
+        current_price = latest_close.get(h['symbol'], 0)
+        if pd.isna(current_price):
+            current_price = 0
         mv = current_price * h['shares']
         cost_total = h['cost'] * h['shares']
         pnl = mv - cost_total
@@ -220,10 +279,13 @@ def admin_portal():
             <td class="py-3 text-right font-mono {pnl_color}">
                 {pnl_sign}{h['pnl']:,.0f} ({h['pnl_pct']}%)
             </td>
+            <td class="py-3 text-right">
+                <button onclick="reanalyze('{h['symbol']}', this)" class="px-2 py-1 bg-slate-700 hover:bg-slate-600 rounded text-xs">🔄 重新分析</button>
+            </td>
         </tr>
         """
     if not holdings_detail:
-        holdings_rows = '<tr><td colspan="6" class="py-8 text-center text-slate-500">尚無持股資料</td></tr>'
+        holdings_rows = '<tr><td colspan="7" class="py-8 text-center text-slate-500">尚無持股資料</td></tr>'
 
     return f"""
     <!DOCTYPE html>
@@ -236,6 +298,29 @@ def admin_portal():
         <style>
             body {{ background: #0f172a; color: #e2e8f0; font-family: system-ui, sans-serif; }}
         </style>
+        <script>
+            async function reanalyze(ticker, button) {{
+                const label = button.textContent;
+                button.disabled = true;
+                button.textContent = '⏳';
+                try {{
+                    const res = await fetch('/api/reanalyze', {{
+                        method: 'POST', headers: {{'Content-Type': 'application/json'}},
+                        body: JSON.stringify({{tickers: [ticker]}})
+                    }});
+                    const data = await res.json();
+                    if (!res.ok) throw new Error(data.error);
+                    const r = data.results[0];
+                    alert(r ? `${{r['名稱']}} (${{r['代號']}}) $${{r['收盤價']}} 評分 ${{r['評分']}} ${{r['建議']}}` : '分析失敗');
+                    if (r) location.reload();
+                }} catch (e) {{
+                    alert('❌ ' + e.message);
+                }} finally {{
+                    button.disabled = false;
+                    button.textContent = label;
+                }}
+            }}
+        </script>
     </head>
     <body class="p-6 max-w-4xl mx-auto">
         <div class="flex justify-between items-center mb-8">
@@ -278,6 +363,7 @@ def admin_portal():
                             <th class="pb-3 text-right">現價</th>
                             <th class="pb-3 text-right">市值</th>
                             <th class="pb-3 text-right">損益</th>
+                            <th class="pb-3"></th>
                         </tr>
                     </thead>
                     <tbody>
@@ -323,41 +409,82 @@ def start_webhook_server():
     print("🚀 啟動 Webhook 監聽伺服器 (Port 5000)...")
     app.run(host='0.0.0.0', port=5000, debug=False)
 
-# --- 多核心並行包裝器 ---
-def process_stock_wrapper(args):
-    stock_id, stock_name, api_token = args
-    # 每個進程需要獨立的 DataLoader 以避免 Session 衝突
-    try:
-        dl_proc = DataLoader()
-        if api_token: 
-            dl_proc.login_by_token(api_token=api_token)
-    except Exception as e:
-        print(f"⚠️ 進程 {stock_id} 登入失敗: {e}")
-        dl_proc = None
-        
+# --- 兩層並行包裝器：I/O 執行緒抓資料、進程池只做計算 ---
+# 計算進程共用的基準指數（由 main() 建立後透過進程池 initializer 傳入）
+_WORKER_BENCHMARKS = None
+_THREAD_LOCAL = threading.local()
+
+def init_worker(benchmarks):
+    global _WORKER_BENCHMARKS
+    _WORKER_BENCHMARKS = benchmarks
+
+def thread_loader(api_token):
+    """每條 I/O 執行緒一個 DataLoader，避免共用 Session"""
+    if not hasattr(_THREAD_LOCAL, 'dl'):
+        dl = DataLoader()
+        if api_token:
+            dl.login_by_token(api_token=api_token)
+        _THREAD_LOCAL.dl = dl
+    return _THREAD_LOCAL.dl
+
+def fetch_stock_wrapper(args, bucket, benchmarks):
+    """I/O 層：抓取單檔所需資料（在主進程的執行緒中執行）；單檔時間預算從這裡開始計算"""
+    stock_id, stock_name, api_token, is_holding, budget = args
+    budget.start()
+    print(f"🚀 掃描中: {stock_name} ({stock_id})...")
     try:
-        # 預設支援 SMA_custom 以演示功能
-        res = ProAnalyzer.analyze_stock(dl_proc, stock_id, stock_name, custom_indicators=['SMA_custom'])
-        if res:
-            # 只有評分極端時才進行深度 AI 分析，節省 API 額度
-            if res['評分'] >= 8 or res['評分'] <= 3:
-                chip_status = f"投信{res['投信動向']}張, 外資{res['外資動向']}張"
-                ai_pred = ProAnalyzer.ask_perplexity_prediction(stock_name, stock_id, res['評分'], res['詳細理由'], res['營收表現'], chip_status, res['收盤價'])
-                res['ai_insight'] = ai_pred
-        return res
+        # 所有 FinMind 請求經過共用額度排程器，持股可動用保留額度
+        dl = ThrottledDataLoader(thread_loader(api_token), bucket, priority=is_holding)
     except Exception as e:
-        print(f"❌ 進程分析出錯 ({stock_id}): {e}")
-        return None
+        print(f"⚠️ {stock_id} 登入失敗: {e}")
+        dl = None
+    fetched = ProAnalyzer.fetch_stock_data(dl, stock_id, custom_indicators=['SMA_custom'], benchmarks=benchmarks, budget=budget)
+    # 例外物件不一定能 pickle，傳給計算進程前轉成訊息（逾時保留型別，計算階段據此標記 partial）
+    fetched.errors = {name: e if type(e) is TimeoutError else RuntimeError(f"{type(e).__name__}: {e}")
+                      for name, e in fetched.errors.items()}
+    return fetched
+
+def compute_stock_wrapper(args, fetched):
+    """計算層：在進程池中完成指標、評分、模擬與回測"""
+    stock_id, stock_name, _, _, budget = args
+    # 預設支援 SMA_custom 以演示功能
+    return ProAnalyzer.compute_stock(stock_id, stock_name, fetched, custom_indicators=['SMA_custom'],
+                                     benchmarks=_WORKER_BENCHMARKS, budget=budget)
+
+def needs_ai_insight(res):
+    """只有評分極端時才進行深度 AI 分析，節省 API 額度"""
+    return res['評分'] >= 8 or res['評分'] <= 3
+
+def finish_stock_wrapper(args, res):
+    """I/O 層：評分極端時呼叫 Perplexity 深度分析；超過 ai 階段預算就放棄並標記 partial"""
+    stock_id, stock_name, _, _, budget = args
+    if needs_ai_insight(res):
+        chip_status = f"投信{res['投信動向']}張, 外資{res['外資動向']}張"
+        budget.begin('ai')
+        seconds = budget.timeout('ai')
+        timeout = AI_TIMEOUT if seconds is None else (min(AI_TIMEOUT[0], seconds), seconds)
+        try:
+            res['ai_insight'] = call_with_timeout(
+                lambda: ProAnalyzer.ask_perplexity_prediction(stock_name, stock_id, res['評分'], res['詳細理由'], res['營收表現'], chip_status, res['收盤價'], timeout=timeout),
+                seconds)
+        except TimeoutError:
+            print(f"⏱️ {stock_name} ({stock_id}) AI 分析超過時間預算，略過")
+            res.setdefault('skipped', []).append('ai_insight')
+            res['partial'] = True
+    return res
 
 # --- Backtrader 策略類別 ---
 class MiauBacktestStrategy(bt.Strategy):
-    params = (('sma_period', 60),)
+    # 預設值與 modules.backtest.StrategyParams 相同
+    params = (('sma_period', 60), ('rsi_exit', 80), ('rsi_period', 14),
+              ('macd_fast', 12), ('macd_slow', 26), ('macd_signal', 9))
 
     def __init__(self):
         self.dataclose = self.datas[0].close
         self.sma = bt.indicators.SimpleMovingAverage(self.datas[0], period=self.params.sma_period)
-        self.macd = bt.indicators.MACD(self.datas[0])
-        self.rsi = bt.indicators.RSI(self.datas[0])
+        self.macd = bt.indicators.MACD(self.datas[0], period_me1=self.params.macd_fast,
+                                       period_me2=self.params.macd_slow, period_signal=self.params.macd_signal)
+        self.rsi = bt.indicators.RSI(self.datas[0], period=self.params.rsi_period)
         self.order = None
 
     def next(self):
@@ -369,8 +496,8 @@ class MiauBacktestStrategy(bt.Strategy):
             if self.dataclose[0] > self.sma[0] and self.macd.macd[0] > self.macd.signal[0]:
                 self.order = self.buy()
         else:
-            # 賣出條件: 收盤價 < 季線 或 RSI 過熱 (> 80)
-            if self.dataclose[0] < self.sma[0] or self.rsi[0] > 80:
+            # 賣出條件: 收盤價 < 季線 或 RSI 過熱 (預設 > 80)
+            if self.dataclose[0] < self.sma[0] or self.rsi[0] > self.params.rsi_exit:
                 self.order = self.sell()
 
     def notify_order(self, order):
@@ -382,63 +509,44 @@ class MiauBacktestStrategy(bt.Strategy):
 class ProAnalyzer:
     @staticmethod
     def calculate_indicators(df, custom_indicators=None):
-        df = df.sort_values('date')
-        close = df['close']
-        df['SMA_60'] = close.rolling(window=60).mean()
-        
-        # 增補：客製化指標 (SMA_custom = 30日均線)
-        if custom_indicators and 'SMA_custom' in custom_indicators:
-            df['SMA_custom'] = close.rolling(window=30).mean()
-        
-        exp12 = close.ewm(span=12, adjust=False).mean()
-        exp26 = close.ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp12 - exp26
-        df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        
-        
-        # Bollinger Bands (20, 2)
-        df['SMA_20'] = close.rolling(window=20).mean()
-        df['STD_20'] = close.rolling(window=20).std()
-        df['BB_upper'] = df['SMA_20'] + 2 * df['STD_20']
-        df['BB_lower'] = df['SMA_20'] - 2 * df['STD_20']
-        
-        # Stochastic Oscillator (KD) (9,3,3)
-        low_min = df['min'].rolling(window=9).min()
-        high_max = df['max'].rolling(window=9).max()
-        rsv = 100 * ((df['close'] - low_min) / (high_max - low_min))
-        df['Stoch_K'] = rsv.ewm(alpha=1/3, adjust=False).mean().fillna(50)
-
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0))
-        loss = (-delta.where(delta < 0, 0))
-        avg_gain = gain.ewm(com=13, adjust=False).mean()
-        avg_loss = loss.ewm(com=13, adjust=False).mean()
-        rs = avg_gain / avg_loss
-        rs = avg_gain / avg_loss
-        df['RSI_14'] = 100 - (100 / (1 + rs))
-        
-        # 增補：計算Fibonacci回檔水平（基於最近高低點）
-        price_max = df['close'].max()
-        price_min = df['close'].min()
-        diff = price_max - price_min
-        df['Fib_236'] = price_max - 0.236 * diff
-        df['Fib_382'] = price_max - 0.382 * diff
-        df['Fib_500'] = price_max - 0.500 * diff
-        df['Fib_618'] = price_max - 0.618 * diff
-        df['Fib_786'] = price_max - 0.786 * diff
-        return df
+        """計算預設指標（加上 custom_indicators，例如 SMA_custom = 30日均線）"""
+        return compute_indicators(df, ProAnalyzer.indicator_names(custom_indicators))
+
+    @staticmethod
+    def indicator_names(custom_indicators=None):
+        return list(DEFAULT_INDICATORS) + list(custom_indicators or [])
 
     @staticmethod
     def backtest_strategy(df, stock_name):
         """
-        使用 Backtrader 進行歷史回測
+        歷史回測（向量化版本，規則與手續費同 MiauBacktestStrategy）
+        設定 BACKTEST_ENGINE=backtrader 時改用 Backtrader 驗證路徑
+        """
+        if os.getenv("BACKTEST_ENGINE") == "backtrader":
+            return ProAnalyzer.backtest_strategy_backtrader(df, stock_name)
+        if len(df) < 60:
+            return {"total_return": 0, "win_rate": 0, "max_drawdown": 0}
+
+        try:
+            result = run_backtest(df)
+            print(f"📉 {stock_name} 回測完成: 報酬率 {result['total_return']}%, 勝率 {result['win_rate']}%, 最大回撤 {result['max_drawdown']}%")
+            return result
+        except Exception as e:
+            print(f"⚠️ {stock_name} 回測失敗: {e}")
+            return {"total_return": 0, "win_rate": 0, "max_drawdown": 0}
+
+    @staticmethod
+    def backtest_strategy_backtrader(df, stock_name, params=None):
+        """
+        使用 Backtrader 進行歷史回測（較慢，用於驗證向量化回測）
+        params: modules.backtest.StrategyParams，預設為 MiauBacktestStrategy 的參數
         """
         if len(df) < 60:
             return {"total_return": 0, "win_rate": 0, "max_drawdown": 0}
 
         try:
             cerebro = bt.Cerebro()
-            cerebro.addstrategy(MiauBacktestStrategy)
+            cerebro.addstrategy(MiauBacktestStrategy, **(asdict(params) if params else {}))
 
             # 轉換資料格式 (Pandas -> Backtrader)
             # 確保日期是 Index 且格式正確
@@ -497,7 +605,7 @@ class ProAnalyzer:
             return {"total_return": 0, "win_rate": 0, "max_drawdown": 0}
 
     @staticmethod
-    def ask_perplexity_prediction(stock_name, stock_id, score, reasons, revenue_status, chip_status, close_price, additional_context=None):
+    def ask_perplexity_prediction(stock_name, stock_id, score, reasons, revenue_status, chip_status, close_price, additional_context=None, timeout=AI_TIMEOUT):
         if not PERPLEXITY_API_KEY: return None
         print(f"🔮 AI 正在進行深度分析: {stock_name}...")
         
@@ -525,13 +633,13 @@ class ProAnalyzer:
         headers = {"Authorization": f"Bearer {PERPLEXITY_API_KEY}", "Content-Type": "application/json"}
         
         try:
-            response = requests.post(url, json={
+            response = http_post(url, json={
                 "model": "sonar-pro", 
                 "messages": [
                     {"role": "system", "content": system_prompt}, 
                     {"role": "user", "content": user_content}
                 ]
-            }, headers=headers)
+            }, headers=headers, timeout=timeout)
             
             if response.status_code == 200: 
                 return response.json()['choices'][0]['message']['content']
@@ -558,10 +666,16 @@ class ProAnalyzer:
         finnhub_error = "未嘗試"
         if FINNHUB_API_KEY:
             try:
+                # 以每日報告相同區間的本地日 K 暖機，之後每筆成交 O(1) 更新盤中指標
+                live = ProAnalyzer.warm_streaming_indicators(stock_id)
+
                 def on_message(ws, message):
                     data = json.loads(message)
                     if data['type'] == 'update':
                         print(f"⚡ [Finnhub Real-time] {data['data']}")
+                        if live.last and data.get('data'):
+                            snap = live.tick(data['data'][-1]['p'])
+                            print(f"📈 盤中指標: RSI {snap['RSI_14']:.1f} | MACD {snap['MACD'] - snap['MACD_signal']:+.2f} | K {snap['Stoch_K']:.1f} | 布林 {snap['BB_lower']:.1f}~{snap['BB_upper']:.1f}")
                     else:
                         print(f"📡 [Finnhub] {data}")
 
@@ -581,7 +695,7 @@ class ProAnalyzer:
             try:
                 url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={stock_id}.TW&apikey={ALPHA_VANTAGE_API_KEY}"
                 print("📡 嘗試 Alpha Vantage 輪詢...")
-                response = requests.get(url)
+                response = http_get(url)
                 if response.status_code == 200:
                     data = response.json()
                     if "Global Quote" in data:
@@ -590,7 +704,7 @@ class ProAnalyzer:
                         for _ in range(60): # 限制輪詢次數或週期，避免無限阻塞
                             time.sleep(60)
                             try:
-                                response = requests.get(url, timeout=10)
+                                response = http_get(url, timeout=10)
                                 print(f"更新: {response.json().get('Global Quote', {}).get('05. price', 'N/A')}")
                             except:
                                 break
@@ -642,86 +756,194 @@ class ProAnalyzer:
             ProAnalyzer.realtime_stream(stock_id, retry_count + 1)
 
     @staticmethod
-    def analyze_stock(dl, stock_id, stock_name, custom_indicators=None):
-        print(f"🚀 掃描中: {stock_name} ({stock_id})...")
+    def indicator_window(custom_indicators=None):
+        """計算指標使用的日 K 區間 (start_date, end_date)：由指標登錄表的暖機長度決定"""
+        now = datetime.now()
+        lookback = lookback_days(ProAnalyzer.indicator_names(custom_indicators))
+        return (now - timedelta(days=lookback)).strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def warm_streaming_indicators(stock_id, custom_indicators=None):
+        """
+        以與每日報告相同的日 K 區間暖機串流指標
+
+        EMA / MACD / RSI 與 Fibonacci 高低點都與起算日有關，暖機資料必須和
+        compute_indicators 用的區間相同，盤中數值才會接續每日報告。
+        """
+        start_date, end_date = ProAnalyzer.indicator_window(custom_indicators)
+        history = PRICE_STORE.load(stock_id, start_date, end_date)
+        return StreamingIndicators.from_history(history, custom_indicators=custom_indicators)
+
+    @staticmethod
+    def fetch_daily_prices(dl, stock_id, start_date, end_date):
+        """
+        從遠端下載日 K（FinMind 優先，無資料時改用 Yahoo Finance）
+        回傳 None 代表下載失敗，供 PriceStore 判斷是否要重試
+        """
+        failed = False
         try:
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=200)).strftime('%Y-%m-%d')
-            
-            
-            
+            df = dl.taiwan_stock_daily(stock_id=stock_id, start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"⚠️ FinMind API Error: {e}")
+            df = pd.DataFrame()
+            failed = True
+        
+        # 增補：整合Yahoo Finance以支援全球股市 (若FinMind無資料)
+        if df.empty:
             try:
-                df = dl.taiwan_stock_daily(stock_id=stock_id, start_date=start_date, end_date=end_date)
-            except Exception as e:
-                print(f"⚠️ FinMind API Error: {e}")
-                df = pd.DataFrame()
-            
-            # 增補：整合Yahoo Finance以支援全球股市 (若FinMind無資料)
-            if df.empty:
-                try:
-                    print(f"🌍 FinMind 無資料，嘗試 Yahoo Finance: {stock_id}...")
-                    # 台灣股票優先嘗試加 .TW
-                    target_id = stock_id
-                    if stock_id.isdigit(): target_id = stock_id + ".TW"
+                print(f"🌍 FinMind 無資料，嘗試 Yahoo Finance: {stock_id}...")
+                # 台灣股票優先嘗試加 .TW
+                target_id = stock_id
+                if stock_id.isdigit(): target_id = stock_id + ".TW"
+                # Yahoo 的 end 不含當日，往後推一天才能抓到 end_date 的 K 棒
+                yf_end = (datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+                
+                yf_df = yf.download(target_id, start=start_date, end=yf_end, progress=False, multi_level_index=False)
+                
+                # 若失敗且原 ID 非純數字 (例如美股)，則已嘗試過；若原 ID 為純數字但 .TW 失敗 (不太可能，除非下市)，則嘗試不加 .TW (防呆)
+                if yf_df.empty and not stock_id.isdigit():
+                     pass # American stock failed
+                elif yf_df.empty and stock_id.isdigit():
+                     # 備援：試試看如果不加 .TW (雖然機率低)
+                     yf_df = yf.download(stock_id, start=start_date, end=yf_end, progress=False, multi_level_index=False)
+
+                if not yf_df.empty:
+                    yf_df.reset_index(inplace=True)
+                    yf_cols = [c.lower() for c in yf_df.columns]
+                    yf_df.columns = yf_cols
                     
-                    yf_df = yf.download(target_id, start=start_date, end=end_date, progress=False, multi_level_index=False)
+                    # Mapping Yahoo(Title/Lower) to FinMind(Lower)
+                    rename_map = {
+                        'date': 'date', 'datetime': 'date',
+                        'close': 'close', 'adj close': 'close',
+                        'open': 'open',
+                        'high': 'max', 
+                        'low': 'min', 
+                        'volume': 'Trading_Volume'
+                    }
+                    yf_df.rename(columns=rename_map, inplace=True)
                     
-                    # 若失敗且原 ID 非純數字 (例如美股)，則已嘗試過；若原 ID 為純數字但 .TW 失敗 (不太可能，除非下市)，則嘗試不加 .TW (防呆)
-                    if yf_df.empty and not stock_id.isdigit():
-                         pass # American stock failed
-                    elif yf_df.empty and stock_id.isdigit():
-                         # 備援：試試看如果不加 .TW (雖然機率低)
-                         yf_df = yf.download(stock_id, start=start_date, end=end_date, progress=False, multi_level_index=False)
-
-                    if not yf_df.empty:
-                        yf_df.reset_index(inplace=True)
-                        yf_cols = [c.lower() for c in yf_df.columns]
-                        yf_df.columns = yf_cols
-                        
-                        # Mapping Yahoo(Title/Lower) to FinMind(Lower)
-                        rename_map = {
-                            'date': 'date', 'datetime': 'date',
-                            'close': 'close', 'adj close': 'close',
-                            'open': 'open',
-                            'high': 'max', 
-                            'low': 'min', 
-                            'volume': 'Trading_Volume'
-                        }
-                        yf_df.rename(columns=rename_map, inplace=True)
-                        
-                        # Fallback for missing columns
-                        if 'max' not in yf_df.columns and 'high' in yf_df.columns: yf_df.rename(columns={'high': 'max'}, inplace=True)
-                        if 'min' not in yf_df.columns and 'low' in yf_df.columns: yf_df.rename(columns={'low': 'min'}, inplace=True)
+                    # Fallback for missing columns
+                    if 'max' not in yf_df.columns and 'high' in yf_df.columns: yf_df.rename(columns={'high': 'max'}, inplace=True)
+                    if 'min' not in yf_df.columns and 'low' in yf_df.columns: yf_df.rename(columns={'low': 'min'}, inplace=True)
 
-                        for col in ['close', 'open', 'max', 'min', 'Trading_Volume']:
-                            if col in yf_df.columns:
-                                yf_df[col] = pd.to_numeric(yf_df[col], errors='coerce')
-                        
-                        # Ensure required columns exist
-                        if 'close' in yf_df.columns and 'min' in yf_df.columns:
-                             df = yf_df
-                except Exception as e:
-                    print(f"❌ Yahoo Finance 下載失敗: {e}")
+                    for col in ['close', 'open', 'max', 'min', 'Trading_Volume']:
+                        if col in yf_df.columns:
+                            yf_df[col] = pd.to_numeric(yf_df[col], errors='coerce')
+                    
+                    # Ensure required columns exist
+                    if 'close' in yf_df.columns and 'min' in yf_df.columns:
+                         df = yf_df
+            except Exception as e:
+                print(f"❌ Yahoo Finance 下載失敗: {e}")
+                failed = True
+
+        if df.empty and failed:
+            return None
+        return df
 
+    @staticmethod
+    def fetch_institutional(dl, stock_id, start_date, end_date):
+        """
+        下載三大法人買賣超（長表）
+        回傳 None 代表下載失敗，供 ChipStore 判斷是否要重試
+        """
+        try:
+            return dl.taiwan_stock_institutional_investors(stock_id=stock_id, start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"⚠️ 法人籌碼下載失敗 ({stock_id}): {e}")
+            return None
+
+    @staticmethod
+    def fetch_market_day(dl, date):
+        """
+        下載單日全市場日 K（TaiwanStockPrice 不帶 stock_id）
+        回傳 None 代表下載失敗（含帳號等級不支援全市場查詢）
+        """
+        try:
+            return dl.taiwan_stock_daily(start_date=date, end_date=date)
+        except Exception as e:
+            print(f"⚠️ 全市場日 K 下載失敗 ({date}): {e}")
+            return None
+
+    @staticmethod
+    def analyze_stock(dl, stock_id, stock_name, custom_indicators=None, benchmarks=None, budget=None):
+        print(f"🚀 掃描中: {stock_name} ({stock_id})...")
+        fetched = ProAnalyzer.fetch_stock_data(dl, stock_id, custom_indicators, benchmarks, budget)
+        return ProAnalyzer.compute_stock(stock_id, stock_name, fetched, custom_indicators, benchmarks, budget)
+
+    @staticmethod
+    def fetch_stock_data(dl, stock_id, custom_indicators=None, benchmarks=None, budget=None):
+        """
+        I/O 階段：並行抓取單檔分析需要的所有資料（各資料來源同時送出，延遲取決於最慢的一個）
+
+        budget: modules.budget.Budget；新聞超過 fetch 階段預算就不再等待（必要資料仍等到完成）
+
+        Returns:
+            FetchReport: 交給 compute_stock；失敗的來源記錄在 errors
+        """
+        start_date, end_date = ProAnalyzer.indicator_window(custom_indicators)
+        chip_start = (datetime.now() - timedelta(days=CHIP_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+
+        jobs = {
+            # 先讀本地資料倉，只下載缺少的日期
+            'prices': lambda: PRICE_STORE.get_daily(
+                stock_id, start_date, end_date,
+                fetch=lambda s, e: ProAnalyzer.fetch_daily_prices(dl, stock_id, s, e)
+            ),
+            'chips': lambda: CHIP_STORE.get_daily(
+                stock_id, chip_start, end_date,
+                fetch=lambda s, e: ProAnalyzer.fetch_institutional(dl, stock_id, s, e)
+            ),
+            # 估值每交易日、營收每月公布期才會真的下載
+            'per': lambda: get_valuation(dl, stock_id, end_date),
+            'revenue': lambda: get_revenue(dl, stock_id, end_date),
+            'news': lambda: yf.Ticker(stock_id + ".TW").news,
+        }
+        if benchmarks is None:
+            jobs['benchmarks'] = lambda: load_benchmarks(start_date, end_date)
+        if budget is not None:
+            budget.begin('fetch')
+        fetched = fetch_concurrently(jobs, timeout=budget.timeout('fetch') if budget else None, optional=('news',))
+        print(f"⏱️ {stock_id} 資料抓取: {fetched.summary()}")
+        return fetched
+
+    @staticmethod
+    def compute_stock(stock_id, stock_name, fetched, custom_indicators=None, benchmarks=None, budget=None):
+        """
+        計算階段：指標、評分、Monte Carlo、回測（不發任何網路請求，可在進程池執行）
+
+        budget: 時間用完時略過 Monte Carlo 與回測，結果標記 partial
+        """
+        try:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+            if budget is not None:
+                budget.begin('compute')
+            # 因時間預算略過的步驟
+            skipped = ['news'] if isinstance(fetched.errors.get('news'), TimeoutError) else []
+            if benchmarks is None:
+                benchmarks = fetched.get('benchmarks', pd.DataFrame())
+
+            df = fetched.get('prices', pd.DataFrame())
             if df.empty: return None
-            df = ProAnalyzer.calculate_indicators(df, custom_indicators=custom_indicators)
+            # run_analysis 已以全市場矩陣算好指標時直接接回，單檔分析才逐檔計算
+            panel_rows = fetched.get('indicators')
+            if panel_rows:
+                df = attach_indicators(df, panel_rows, stock_id)
+            else:
+                df = ProAnalyzer.calculate_indicators(df, custom_indicators=custom_indicators)
 
             # --- 籌碼分析 (外資+投信) ---
-            try:
-                df_chips = dl.taiwan_stock_institutional_investors(stock_id=stock_id, start_date=start_date, end_date=end_date)
-            except:
-                df_chips = pd.DataFrame()
+            df_chips = fetched.get('chips', pd.DataFrame())
             
             foreign_net, trust_net = 0, 0
             chip_msg = []
             
             if not df_chips.empty:
-                # 外資
-                df_f = df_chips[df_chips['name'] == 'Foreign_Investor']
-                if not df_f.empty: foreign_net = (df_f.tail(5)['buy'].sum() - df_f.tail(5)['sell'].sum()) // 1000
-                # 投信
-                df_t = df_chips[df_chips['name'] == 'Investment_Trust']
-                if not df_t.empty: trust_net = (df_t.tail(5)['buy'].sum() - df_t.tail(5)['sell'].sum()) // 1000
+                # 寬表最後一列已含滾動淨買賣（股），換算成張
+                flows = ChipStore.latest_flows(df_chips)
+                foreign_net = flows.get('Foreign_Investor_5d', 0) // 1000
+                trust_net = flows.get('Investment_Trust_5d', 0) // 1000
                 
                 if trust_net > 500: chip_msg.append("🔥投信認養")
                 elif trust_net < -500: chip_msg.append("📉投信棄養")
@@ -732,7 +954,9 @@ class ProAnalyzer:
             pe_ratio, pb_ratio, dividend_yield = None, None, None
             valuation_msg = ""
             try:
-                df_per = dl.taiwan_stock_per(stock_id=stock_id, start_date=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'), end_date=end_date)
+                if 'per' in fetched.errors:
+                    raise fetched.errors['per']
+                df_per = fetched.get('per', pd.DataFrame())
                 if not df_per.empty:
                     latest_per = df_per.iloc[-1]
                     pe_ratio = round(float(latest_per.get('PER', 0)), 1) if latest_per.get('PER', 0) else None
@@ -748,21 +972,20 @@ class ProAnalyzer:
 
             # --- 營收分析 ---
             revenue_msg = "營收持平"
+            revenue_yoy = None
             try:
-                rev_start = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
-                try:
-                     df_rev = dl.taiwan_stock_month_revenue(stock_id=stock_id, start_date=rev_start, end_date=end_date)
-                except:
-                     df_rev = pd.DataFrame()
+                df_rev = fetched.get('revenue', pd.DataFrame())
 
                 if not df_rev.empty:
                     yoy = df_rev.iloc[-1].get('revenue_year_growth', 0)
+                    revenue_yoy = yoy
                     if yoy > 20: revenue_msg = f"🚀營收爆發(+{yoy}%)"
                     elif yoy < -20: revenue_msg = f"⚠️營收衰退({yoy}%)"
             except: pass
 
             # --- 成交量分析 ---
             vol_msg = ""
+            vol_ratio = None
             if 'Trading_Volume' in df.columns or 'Trading_money' in df.columns:
                 vol_col = 'Trading_Volume' if 'Trading_Volume' in df.columns else 'Trading_money'
                 recent_vol = df[vol_col].iloc[-1]
@@ -778,118 +1001,114 @@ class ProAnalyzer:
             close = latest['close']
             prev_close = df.iloc[-2]['close'] if len(df) >= 2 else close
             change_pct = round((close - prev_close) / prev_close * 100, 2)
-            score = 5.0
             reasons = []
             
             # --- 新聞情緒分析 ---
+            sentiment = None
             try:
-                stock_ticker = yf.Ticker(stock_id + ".TW")
-                news = stock_ticker.news
+                news = fetched.get('news')
                 if news:
-                    sia = SentimentIntensityAnalyzer()
-                    sentiment_scores = [sia.polarity_scores(article['title'])['compound'] for article in news[:5]]
-                    avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
-                    if avg_sentiment > 0.05: revenue_msg += " 😊正面情緒"
-                    elif avg_sentiment < -0.05: revenue_msg += " 😔負面情緒"
+                    # run_analysis 已整份清單批次評分時直接使用；單檔分析才在這裡評分（已評過的標題讀快取）
+                    sentiment = fetched.get('sentiment')
+                    if sentiment is None:
+                        sentiment = average_sentiment(stock_id, news[:5])
+                    label = sentiment_label(sentiment)
+                    if label: revenue_msg += f" {label}"
             except Exception as e:
                 pass
 
-            score += max(-3.0, min(3.0, trust_net / 500))
-            score += max(-2.5, min(2.5, foreign_net / 1000))
-            score += 2.0 if "爆發" in revenue_msg else (-2.0 if "衰退" in revenue_msg else 0)
-            
-            if pe_ratio and pe_ratio > 0:
-                if pe_ratio > 40: score -= 1.5
-                elif pe_ratio > 30: score -= 0.5
-                elif pe_ratio < 12: score += 1.0
             if valuation_msg:
                 reasons.append(valuation_msg)
             
             # --- 技術指標判定 ---
             if close < latest['BB_lower']: reasons.append("⚠️觸及Bollinger下軌")
             elif close > latest['BB_upper']: reasons.append("🔥觸及Bollinger上軌")
-            if latest['Stoch_K'] < 20: score += 1.0; reasons.append("💎Stochastic超賣")
+            if latest['Stoch_K'] < 20: reasons.append("💎Stochastic超賣")
 
             if abs(close - latest['Fib_618']) < close * 0.01: reasons.append("📍接近Fib 61.8%回檔")
             
-            # 增補：產業基準比較（與S&P 500相關性）
+            # 增補：產業基準比較（與 S&P 500 等基準的相關性，基準由 main() 預先載入共用）
+            benchmark_corr = {}
             try:
                 if 'date' in df.columns:
                     # 必須對齊日期
                     df_corr = df.set_index('date').sort_index()
                     df_corr.index = pd.to_datetime(df_corr.index)
-                    
-                    sp500 = yf.download("^GSPC", start=start_date, end=end_date, progress=False, multi_level_index=False)
-                    if not sp500.empty:
-                        sp500_close = sp500['Close']
-                        # 合併計算相關性
-                        aligned_df = pd.concat([df_corr['close'], sp500_close], axis=1, join='inner')
-                        if not aligned_df.empty:
-                            correlation = aligned_df.iloc[:, 0].corr(aligned_df.iloc[:, 1])
-                            if correlation > 0.8: reasons.append("🌍高度相關S&P 500")
+                    corr = correlation_matrix(df_corr[['close']].rename(columns={'close': stock_id}), benchmarks)
+                    if not corr.empty:
+                        benchmark_corr = {k: round(float(v), 3) for k, v in corr.loc[stock_id].items() if pd.notna(v)}
+                        reasons.extend(correlation_reasons(corr.loc[stock_id]))
             except Exception as e:
-                print(f"⚠️ S&P 500 Correlation Failed: {e}")
+                print(f"⚠️ Benchmark Correlation Failed: {e}")
 
             ma60 = latest['SMA_60'] if not pd.isna(latest['SMA_60']) else close
-            if close > ma60: score += 1.5; reasons.append("📈站上季線")
-            else: score -= 1.5; reasons.append("📉跌破季線")
+            if close > ma60: reasons.append("📈站上季線")
+            else: reasons.append("📉跌破季線")
 
             macd, signal = latest['MACD'], latest['MACD_signal']
             if macd > signal: reasons.append("🐂MACD金叉")
             else: reasons.append("🐻MACD死叉")
             
             rsi = latest['RSI_14']
-            if rsi > 80: score -= 0.5; reasons.append("⚠️過熱")
-            elif rsi < 20: score += 1.0; reasons.append("💎超賣")
+            if rsi > 80: reasons.append("⚠️過熱")
+            elif rsi < 20: reasons.append("💎超賣")
 
             reasons.extend(chip_msg)
             if vol_msg:
                 reasons.append(vol_msg)
-            score = max(1, min(10, score))
-            
-            if score >= 8: rec, rec_class = "🚀 強力買進", "action-buy"
-            elif score >= 6.5: rec, rec_class = "🔥 偏多操作", "action-bullish"
-            elif score <= 3.5: rec, rec_class = "⚠️ 建議賣出", "action-sell"
-            else: rec, rec_class = "⏸️ 觀望持有", "action-hold"
+
+            # --- 評分：依規則表計算（modules/scoring，rescore.py 可對已存特徵重新評分）---
+            features = {
+                'stock_id': stock_id, 'name': stock_name, 'close': close, 'change_pct': change_pct,
+                'sma_60': latest['SMA_60'], 'macd': macd, 'macd_signal': signal, 'rsi_14': rsi,
+                'bb_upper': latest['BB_upper'], 'bb_lower': latest['BB_lower'],
+                'stoch_k': latest['Stoch_K'], 'fib_618': latest['Fib_618'],
+                'trust_net': trust_net, 'foreign_net': foreign_net,
+                'pe': pe_ratio, 'pb': pb_ratio, 'dividend_yield': dividend_yield,
+                'revenue_yoy': revenue_yoy, 'vol_ratio': vol_ratio, 'sentiment': sentiment,
+                **{f'corr_{k.lower()}': v for k, v in benchmark_corr.items()},
+            }
+            score = score_features(features)
+            rec, rec_class = recommendation(score)
 
             # --- 停損參考 ---
             stop_loss = round(ma60 * 0.97, 1)  # 季線下方 3%
             target_price = round(close * 1.10, 1)  # 目標報酬 10%
             risk_reward = round((target_price - close) / (close - stop_loss), 1) if close > stop_loss else 0
 
-            # --- 多角色分析 ---
-            role_analysis = None
-            try:
-                multi_role = MultiRoleAnalyzer()
-                role_analysis = multi_role.analyze(
-                    foreign_net_volume=int((foreign_net + trust_net) * 1000), 
-                    positive_days=3 if foreign_net > 0 else 0,
-                    close=close, ma60=ma60, ma20=ma60, rsi=rsi, macd_diff=macd-signal,
-                    price_change_5d=0, has_positive_news=score>=7, has_negative_news=score<=3,
-                    sector_trend="up", market_sentiment="neutral"
-                )
-            except: pass
+            # --- 多角色分析輸入（run_analysis 每累積一組完成的股票以 analyze_batch 一次計算）---
+            role_inputs = {
+                'foreign_net_volume': int((foreign_net + trust_net) * 1000),
+                'positive_days': 3 if foreign_net > 0 else 0,
+                'close': float(close), 'ma60': float(ma60), 'ma20': float(ma60), 'rsi': float(rsi),
+                'macd_diff': float(macd - signal), 'price_change_5d': 0,
+                'has_positive_news': score >= 7, 'has_negative_news': score <= 3,
+                'sector_trend': "up", 'market_sentiment': "neutral",
+            }
 
             # --- Monte Carlo 模擬 (預測未來 100 日風險) ---
-            var_95 = 0
+            var_95, cvar_95 = 0, 0
             try:
                 returns = df['close'].pct_change().dropna()
-                if len(returns) > 20:
-                    mean_return = returns.mean()
-                    std_return = returns.std()
-                    sims = 1000
-                    time_horizon = 100
-                    price_sims = np.zeros((sims, time_horizon))
-                    price_sims[:, 0] = close
-                    for t in range(1, time_horizon):
-                        price_sims[:, t] = price_sims[:, t-1] * (1 + np.random.normal(mean_return, std_return, sims))
-                    var_95 = float(np.percentile(price_sims[:, -1], 5))  # 95% VaR
+                if budget is not None and budget.expired('compute'):
+                    skipped.append('monte_carlo')
+                elif len(returns) > 20:
+                    # 一次產生所有報酬、只保留期末價格（大量模擬時分批計算）
+                    mc = simulate_var(
+                        float(close), returns.mean(), returns.std(),
+                        horizon=100, sims=MONTE_CARLO_SIMS, rng=get_rng(stock_id)
+                    )
+                    var_95, cvar_95 = mc.var[0.95], mc.cvar[0.95]  # 95% VaR / CVaR
                     if var_95 < close * 0.9: 
                         reasons.append("⚠️高風險 (Monte Carlo VaR)")
             except: pass
             
             # --- 歷史回測 ---
-            backtest_results = ProAnalyzer.backtest_strategy(df, stock_name)
+            backtest_results = None
+            if budget is not None and budget.expired('compute'):
+                skipped.append('backtest')
+            else:
+                backtest_results = ProAnalyzer.backtest_strategy(df, stock_name)
 
             # --- 白話決策摘要 ---
             summary_parts = []
@@ -961,6 +1180,9 @@ class ProAnalyzer:
                 '目標價': target_price,
                 'risk_reward': risk_reward,
                 'monte_carlo_var': var_95,
+                'monte_carlo_cvar': cvar_95,
+                'benchmark_corr': benchmark_corr,
+                'fetch_timings_ms': fetched.timings_ms(),
                 'backtest': backtest_results,
                 '本益比': pe_ratio,
                 '股價淨值比': pb_ratio,
@@ -975,17 +1197,81 @@ class ProAnalyzer:
                     'tech_rsi': rsi,
                     'score': score * 10
                 },
-                'role_analysis': role_analysis
+                'role_inputs': role_inputs,
+                'role_analysis': None,
+                'partial': bool(skipped), 'skipped': skipped,
+                'features': {**features, 'var_95': var_95 or None, 'cvar_95': cvar_95 or None, 'score': score}
             }
         except Exception as e:
             traceback.print_exc()
             print(f"❌ Error: {e}")
             return None
 
+def attach_panel_indicators(todo, payloads, custom_indicators=('SMA_custom',)):
+    """
+    全市場指標：所有股票抓完後以 calculate_indicators_panel 一次算完整個觀察清單，
+    每檔的指標列放進 FetchReport 的 'indicators' 交給 compute_stock（矩陣計算失敗時 compute_stock 逐檔計算）
+    """
+    frames = {}
+    for (stock_id, *_), payload in zip(todo, payloads):
+        df = payload.get('prices') if payload is not None else None
+        if df is not None and not df.empty:
+            frames[stock_id] = df
+    if not frames:
+        return
+    try:
+        panel = calculate_indicators_panel(*pivot_panel(frames), custom_indicators=list(custom_indicators))
+    except Exception as e:
+        print(f"⚠️ 全市場指標計算失敗，改為逐檔計算: {e}")
+        return
+    for (stock_id, *_), payload in zip(todo, payloads):
+        if stock_id in frames:
+            payload.results['indicators'] = {name: frame[[stock_id]] for name, frame in panel.items()}
+    print(f"📐 全市場指標: {len(frames)} 檔一次計算 {len(panel)} 個欄位")
+
+def attach_watchlist_sentiment(todo, payloads):
+    """整份觀察清單的新聞標題以 score_watchlist 一次評分，每檔分數放進 FetchReport 的 'sentiment' 交給 compute_stock"""
+    news = {}
+    for (stock_id, *_), payload in zip(todo, payloads):
+        articles = payload.get('news') if payload is not None else None
+        if articles:
+            news[stock_id] = articles[:5]
+    if not news:
+        return
+    try:
+        scores = score_watchlist(news)
+    except Exception as e:
+        print(f"⚠️ 新聞情緒批次評分失敗，改為逐檔評分: {e}")
+        return
+    for (stock_id, *_), payload in zip(todo, payloads):
+        if stock_id in scores:
+            payload.results['sentiment'] = scores[stock_id]
+
+def attach_role_analysis(data):
+    """
+    以 MultiRoleAnalyzer.analyze_batch 一次評估一組股票的多角色分析（報告中每檔都有 AI 分頁，全部產生證據文字）
+
+    run_analysis 每累積 ROLE_BATCH_SIZE 檔完成的結果（以及最後剩下的一組）呼叫一次；
+    完成後移除 role_inputs，沒有 role_inputs 的項目略過。
+    """
+    items = [item for item in data if item.get('role_inputs')]
+    if not items:
+        return
+    try:
+        columns = {key: [item['role_inputs'][key] for item in items] for key in items[0]['role_inputs']}
+        batch = MultiRoleAnalyzer().analyze_batch(**columns)
+        for item, rendered in zip(items, batch.render()):
+            item['role_analysis'] = rendered
+    except Exception as e:
+        print(f"⚠️ 多角色分析失敗: {e}")
+    for item in items:
+        item.pop('role_inputs', None)
+
 def send_line_push(data):
+    """推播每日摘要；確實送出才回傳 True（未設定 Token 或發送失敗回傳 False，檢查點不會標記完成）"""
     if not LINE_CHANNEL_TOKEN or not YOUR_USER_ID:
         print("❌ LINE Token 或 User ID 未設定，跳過通知")
-        return
+        return False
 
     url = "https://api.line.me/v2/bot/message/push"
     headers = {
@@ -1036,13 +1322,176 @@ def send_line_push(data):
     }
 
     try:
-        res = requests.post(url, headers=headers, json=payload)
+        res = http_post(url, headers=headers, json=payload)
         if res.status_code == 200:
             print("✅ LINE 通知已發送 (含重點摘要)")
-        else:
-            print(f"❌ LINE 發送失敗: {res.text}")
+            return True
+        print(f"❌ LINE 發送失敗: {res.text}")
     except Exception as e:
         print(f"❌ LINE 發送錯誤: {e}")
+    return False
+
+def finmind_session():
+    """登入 FinMind 並建立共用額度排程器 -> (ThrottledDataLoader 或 None, TokenBucket)"""
+    try:
+        dl = DataLoader()
+        if FINMIND_TOKEN: dl.login_by_token(api_token=FINMIND_TOKEN)
+    except Exception as e:
+        print(f"⚠️ FinMind Login Failed: {e}")
+        dl = None
+
+    # FinMind 額度排程器：所有執行緒共用，額度不足時排隊而非失敗
+    hourly_limit, remaining = resolve_quota(dl if FINMIND_TOKEN else None, has_token=bool(FINMIND_TOKEN))
+    bucket = TokenBucket(hourly_limit, initial_tokens=remaining)
+    print(f"🪣 FinMind 額度排程: 每小時 {hourly_limit} 次，本小時剩餘 {remaining} 次")
+    if dl:
+        dl = ThrottledDataLoader(dl, bucket, priority=True)
+    return dl, bucket
+
+def checkpointed_fetch(task, fetch, checkpoint):
+    """抓取階段：讀取今日檢查點，沒有才抓；完整抓到（無錯誤）才存檔"""
+    stock_id = task[0]
+    fetched = checkpoint.load('fetch', stock_id)
+    if fetched is None:
+        fetched = fetch(task)
+        if fetched is not None and not fetched.errors:
+            checkpoint.save('fetch', stock_id, fetched)
+    return fetched
+
+def checkpointed_finish(task, res, checkpoint):
+    """AI 階段：先存計算結果，AI 分析成功（或不需要）後才標記此檔完成"""
+    stock_id = task[0]
+    # 因時間預算略過步驟的結果不算完成，重新執行時補做
+    if not checkpoint.has('compute', stock_id) and not res.get('partial'):
+        checkpoint.save('compute', stock_id, res)
+    res = finish_stock_wrapper(task, res)
+    if res.get('partial'):
+        return res
+    if res.get('ai_insight') or not needs_ai_insight(res) or not PERPLEXITY_API_KEY:
+        checkpoint.save('ai', stock_id, res)
+    return res
+
+def run_analysis(tasks, bucket, benchmarks, end_date, executor=None, checkpoint=None, on_result=None):
+    """
+    抓取（全部完成後以全市場矩陣計算指標、整份清單評新聞情緒）→ 計算 → AI 收尾，補上多角色分析並把特徵寫入當天分區
+
+    executor: 常駐服務傳入已啟動的 TwoTierExecutor；None 時建立一次性的執行器
+    checkpoint: RunCheckpoint；已完成的股票直接讀取，只補做缺少或失敗的階段
+    on_result: 完成的結果每累積 ROLE_BATCH_SIZE 檔批次做完多角色分析後，逐檔呼叫 on_result(result)
+               （依完成順序，含從檢查點讀回的股票）
+    """
+    fetch = lambda task: fetch_stock_wrapper(task, bucket, benchmarks)
+    finish = finish_stock_wrapper
+    results = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    ready = []   # 已完成、等待多角色批次分析的結果
+
+    def flush():
+        attach_role_analysis(ready)
+        for res in ready:
+            if on_result is None:
+                continue
+            try:
+                on_result(res)
+            except Exception as e:
+                print(f"⚠️ 結果串流失敗 ({res.get('代號')}): {e}")
+        ready.clear()
+
+    def emit(res):
+        if res is None:
+            return
+        ready.append(res)
+        if len(ready) >= ROLE_BATCH_SIZE:
+            flush()
+
+    if checkpoint is not None:
+        raw_fetch = fetch
+        fetch = lambda task: checkpointed_fetch(task, raw_fetch, checkpoint)
+        finish = lambda task, res: checkpointed_finish(task, res, checkpoint)
+        pending, ai_only = [], []
+        for i, (stock_id, *_) in enumerate(tasks):
+            results[i] = checkpoint.load('ai', stock_id)
+            if results[i] is not None:
+                emit(results[i])
+                continue
+            computed = checkpoint.load('compute', stock_id)
+            if computed is not None:
+                ai_only.append((i, computed))
+            else:
+                pending.append(i)
+        print(f"♻️ 檢查點 {end_date}: {len(tasks) - len(pending) - len(ai_only)} 檔已完成，"
+              f"{len(ai_only)} 檔補做 AI 分析，{len(pending)} 檔需要分析")
+        if ai_only:
+            with ThreadPoolExecutor(max_workers=DEFAULT_IO_WORKERS) as pool:
+                finished = pool.map(lambda item: finish(tasks[item[0]], item[1]), ai_only)
+                for (i, _), res in zip(ai_only, finished):
+                    results[i] = res
+                    emit(res)
+
+    todo = [tasks[i] for i in pending]
+    owned = executor is None
+    if owned:
+        executor = TwoTierExecutor(initializer=init_worker, initargs=(benchmarks,))
+    try:
+        # 先抓完所有股票，全市場指標矩陣與新聞情緒一次算完，再交給計算層
+        fetched_at = {}
+
+        def fetch_and_stamp(task):
+            payload = fetch(task)
+            fetched_at[task[0]] = time.time()
+            return payload
+
+        payloads = executor.fetch_all(todo, fetch_and_stamp)
+        attach_panel_indicators(todo, payloads)
+        attach_watchlist_sentiment(todo, payloads)
+        now = time.time()
+        for task in todo:
+            # 等待其他股票抓完的時間不算在這檔的時間預算內
+            if task[0] in fetched_at:
+                task[4].extend(now - fetched_at[task[0]])
+        prepared = {task[0]: payload for task, payload in zip(todo, payloads)}
+
+        # 依完成順序取得結果，不必等最慢的一檔
+        for j, res in executor.imap_unordered(todo, lambda task: prepared.pop(task[0]), compute_stock_wrapper, finish):
+            results[pending[j]] = res
+            emit(res)
+    finally:
+        if owned:
+            executor.close()
+    flush()
+
+    # 過濾失敗結果
+    excel_data = [r for r in results if r is not None]
+
+    print(f"✅ 完成 {len(excel_data)} 檔股票分析。")
+    partial = [r['代號'] for r in excel_data if r.get('partial')]
+    if partial:
+        print(f"⏱️ {len(partial)} 檔超過時間預算，為部分結果: {', '.join(partial)}")
+    print(f"⏱️ 資料來源耗時: {summarize_timings(r.get('fetch_timings_ms') for r in excel_data)}")
+
+    # 中間特徵存成當天的分區，供策略會議 / 後台 / 重新評分直接讀取
+    features = [item.pop('features') for item in excel_data if 'features' in item]
+    try:
+        FEATURE_STORE.write(end_date, features)
+        print(f"🗂️ 特徵表已存檔 ({len(features)} 檔, {end_date})")
+    except Exception as e:
+        print(f"⚠️ 特徵表存檔失敗: {e}")
+    return excel_data
+
+def stream_record(res):
+    """
+    串流用的單檔結果：與 daily_analysis.json 的項目相同格式（不含中間特徵）
+
+    run_analysis 在呼叫 on_result 前已批次完成這一組的多角色分析，這裡不做任何計算。
+    """
+    record = dict(res)
+    record.pop('features', None)
+    return record
+
+def save_daily_analysis(data):
+    with open("daily_analysis.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, cls=NpEncoder, indent=2)
+    return True
 
 def main():
     print("\n🐱 啟動喵姆 AI 股市偵測站 v14.0 (並行與安全強固版)\n")
@@ -1066,27 +1515,54 @@ def main():
                         ("0056", "元大高股息"), ("2603", "長榮"), ("1519", "華城"),
                         ("3293", "鈊象"), ("3035", "智原"), ("3680", "家登")]
 
-    try:
-        dl = DataLoader()
-        if FINMIND_TOKEN: dl.login_by_token(api_token=FINMIND_TOKEN)
-    except Exception as e:
-        print(f"⚠️ FinMind Login Failed: {e}")
-        dl = None
+    dl, bucket = finmind_session()
+
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=lookback_days(DEFAULT_INDICATORS))).strftime('%Y-%m-%d')
+
+    # 全市場批次匯入：每個交易日一次請求，補齊所有代號的日 K（失敗時由各進程逐檔補抓）
+    if dl and os.getenv("BULK_PRICE_SYNC", "1") != "0":
+        PRICE_STORE.sync_market(
+            lambda d: ProAnalyzer.fetch_market_day(dl, d),
+            start_date, end_date, [stock_id for stock_id, _ in my_portfolio]
+        )
     
     excel_data = []
     
-    # 準備並行運算參數
-    tasks = [(stock_id, stock_name, FINMIND_TOKEN) for stock_id, stock_name in my_portfolio]
+    # 準備並行運算參數（持股排在最前面，確保優先分析）
+    held = {h['symbol'] for h in portfolio.get('current_holdings', [])}
+    tasks = [(stock_id, stock_name, FINMIND_TOKEN, stock_id in held, Budget()) for stock_id, stock_name in my_portfolio]
+    tasks.sort(key=lambda t: not t[3])
     
-    print(f"🔥 啟動 {cpu_count()} 個並行核心進行分析...")
+    print(f"🔥 啟動 {DEFAULT_IO_WORKERS} 條抓取執行緒 + {cpu_count()} 個計算核心進行分析...")
     
-    with Pool(processes=cpu_count()) as pool:
-        results = pool.map(process_stock_wrapper, tasks)
+    # 基準指數每次執行只下載一次，所有進程共用
+    benchmarks = load_benchmarks(start_date, end_date)
     
-    # 過濾失敗結果並存回 excel_data
-    excel_data = [r for r in results if r is not None]
-
-    print(f"✅ 完成 {len(excel_data)} 檔股票分析。")
+    # 今日檢查點：中途失敗時重新執行只補做缺少的股票與階段（RESUME_RUN=0 從頭開始）
+    checkpoint = RunCheckpoint(end_date)
+    if os.getenv("RESUME_RUN", "1") == "0":
+        checkpoint.clear()
+    prune_runs()
+
+    # 逐檔串流：每完成一檔就附加到 daily_analysis.ndjson，並定期以已完成的股票重新產生報告
+    streamed = []
+    last_render = time.monotonic()
+
+    def on_result(res):
+        nonlocal last_render
+        record = stream_record(res)
+        # 特徵列跟著結果寫入串流（當天的特徵分區要到整輪結束才寫入）
+        stream.append({**record, 'features': res.get('features')})
+        streamed.append(record)
+        if REPORT_REFRESH_SECONDS > 0 and time.monotonic() - last_render >= REPORT_REFRESH_SECONDS:
+            print(f"📰 進度報告: {len(streamed)}/{len(tasks)} 檔")
+            generate_index_html(list(streamed), portfolio)
+            last_render = time.monotonic()
+
+    # 依序開始抓取，持股最先被處理
+    with ResultStream(encoder=NpEncoder).open(end_date, len(tasks)) as stream:
+        excel_data = run_analysis(tasks, bucket, benchmarks, end_date, checkpoint=checkpoint, on_result=on_result)
 
     # 注入持股資訊
     holdings_map = {h['symbol']: h for h in portfolio.get('current_holdings', [])}
@@ -1103,16 +1579,14 @@ def main():
             item['持股'] = 0
             item['損益%'] = 0
 
-    generate_index_html(excel_data, portfolio)
-    send_line_push(excel_data)
+    # 整體階段：失敗不影響後續階段，重新執行時補做；推播每天只發一次
+    checkpoint.run_stage('render', lambda: generate_index_html(excel_data, portfolio))
+    checkpoint.run_stage('notify', lambda: send_line_push(excel_data), once=True)
     
     # [新增] 儲存數據給晚上的 AI 策略會議用
-    try:
-        with open("daily_analysis.json", "w", encoding="utf-8") as f:
-            json.dump(excel_data, f, ensure_ascii=False, cls=NpEncoder, indent=2)
+    if checkpoint.run_stage('save', lambda: save_daily_analysis(excel_data)):
         print("✅ 數據已存檔 (daily_analysis.json)，準備進行晚間策略會議。")
-    except Exception as e:
-        print(f"❌ JSON 存檔失敗: {e}")
+    print(f"📌 今日檢查點: {checkpoint.summary()}")
 
     # 增補：啟動 webhook 伺服器 (保持運行以供 AI 戰情室使用)
     server_thread = threading.Thread(target=start_webhook_server)
@@ -1242,6 +1716,8 @@ def generate_index_html(data, portfolio=None):
                 let trustTag = item['投信動向'] > 0 ? `<span class="badge bg-purple-600 text-white">🔥投信+${{item['投信動向']}}</span>` : (item['投信動向'] < 0 ? `<span class="badge bg-gray-600 text-white">📉投信${{item['投信動向']}}</span>` : '');
                 let revTag = item['營收表現'].includes('爆發') ? `<span class="badge bg-pink-500 text-white">${{item['營收表現']}}</span>` : `<span class="badge bg-gray-700 text-gray-300">${{item['營收表現']}}</span>`;
                 let holdTag = '';
+                // 超過時間預算、略過部分步驟的股票
+                let partialTag = item.partial ? `<span class="badge bg-yellow-700 text-white" title="略過: ${{(item.skipped || []).join(', ')}}">⏱️部分結果</span>` : '';
 
                 const card = document.createElement('div');
                 card.className = 'glass-card';
@@ -1256,7 +1732,7 @@ def generate_index_html(data, portfolio=None):
                                         ${{item['漲跌幅']>=0?'▲':'▼'}}${{Math.abs(item['漲跌幅'])}}%
                                     </span>
                                 </div>
-                                <div class="flex gap-2 mt-2 flex-wrap">${{trustTag}} ${{revTag}} ${{holdTag}}</div>
+                                <div class="flex gap-2 mt-2 flex-wrap">${{trustTag}} ${{revTag}} ${{holdTag}} ${{partialTag}}</div>
                             </div>
                             <div class="text-right">
                                 <div class="text-4xl font-bold ${{item['評分']>=8?'text-green-400':(item['評分']<=3?'text-red-400':'text-blue-400')}}">${{item['評分']}}</div>
@@ -1337,7 +1813,7 @@ def generate_index_html(data, portfolio=None):
                                 </div>
                                 ${{item.monte_carlo_var > 0 ? `
                                 <div class="flex justify-between text-xs text-gray-300">
-                                    <span class="cursor-help" title="Monte Carlo 模擬：用 1000 次隨機模擬預測 100 天後的最差情境（95% 信心水準）">🎲 模擬最差價位(VaR)</span>
+                                    <span class="cursor-help" title="Monte Carlo 模擬：用 10 萬次隨機模擬預測 100 天後的最差情境（95% 信心水準）">🎲 模擬最差價位(VaR)</span>
                                     <span class="font-mono text-orange-400">$${{Number(item.monte_carlo_var).toFixed(1)}}</span>
                                 </div>
                                 ` : ''}}
@@ -1502,6 +1978,7 @@ def generate_index_html(data, portfolio=None):
     with open("index.html", "w", encoding="utf-8") as f:
         f.write(html)
     print("✅ v14.0 系統升級完成 (並行、安全與教育增強版)")
+    return True
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
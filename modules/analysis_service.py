@@ -0,0 +1,208 @@
+"""
+常駐分析服務的通訊層 (Analysis Service)
+
+analysis_daemon.py 常駐一個進程，保持計算進程池、已登入的 DataLoader、
+基準指數與各種快取都是熱的；/admin 或命令列透過本機 socket 送出
+「分析這些股票」的請求，不必每次重新啟動直譯器、匯入套件與登入。
+
+通訊使用 multiprocessing.connection（只綁 127.0.0.1，以 data/daemon.key 驗證）：
+    請求  {'cmd': 'analyze', 'tickers': ['2330']}
+    回覆  {'ok': True, 'result': ...} 或 {'ok': False, 'error': '...'}
+
+服務一次只跑一個分析請求（其餘排隊），分析請求的等待上限依
+「排隊中與本次的股票數 × 單檔時間預算」決定；逾時後以 ping 區分「忙碌中」與「沒有回應」。
+"""
+import os
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .budget import STOCK_BUDGET_SECONDS
+from .storage import DATA_DIR
+
+
+DAEMON_ADDRESS: Tuple[str, int] = ('127.0.0.1', int(os.getenv("ANALYSIS_DAEMON_PORT", "6001")))
+KEY_FILE = DATA_DIR / "daemon.key"
+DEFAULT_TIMEOUT = 120.0
+
+# ping 不經過分析佇列，應該立即回覆
+PING_TIMEOUT = 5.0
+
+# 分析請求在股票時間預算之外的餘裕（換日時重新載入基準指數、重建執行器）
+ANALYZE_MARGIN_SECONDS = 60.0
+
+
+class DaemonUnavailable(RuntimeError):
+    """常駐服務沒有啟動、驗證失敗或逾時"""
+
+
+class DaemonBusy(DaemonUnavailable):
+    """常駐服務正常運作，但仍在處理排在前面或本次的分析，等待時間內沒有完成"""
+
+
+def analyze_timeout(tickers: int) -> Optional[float]:
+    """
+    分析 tickers 檔（含排在前面的股票）最多等待的秒數
+
+    每檔從開始抓取起最多 STOCK_BUDGET_SECONDS（含 AI 分析）；單檔預算不限時則不設上限（None）
+    """
+    if STOCK_BUDGET_SECONDS <= 0:
+        return None
+    return ANALYZE_MARGIN_SECONDS + max(tickers, 1) * STOCK_BUDGET_SECONDS
+
+
+def load_authkey(path: Path = KEY_FILE, create: bool = False) -> bytes:
+    """讀取（或建立）驗證金鑰；只有同一使用者能讀取這個檔案"""
+    path = Path(path)
+    if create and not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    try:
+        return path.read_text().strip().encode()
+    except OSError as e:
+        raise DaemonUnavailable(f"找不到常駐服務金鑰 ({path})，請先啟動 analysis_daemon.py") from e
+
+
+class AnalysisServer:
+    """
+    本機請求伺服器：每個連線一條執行緒，依 cmd 呼叫對應的 handler(**payload)
+
+    內建 'ping'（回傳 status()）與 'shutdown'；其餘指令由 handlers 提供。
+    status() 的 active 為執行中的 handler 數（不含 ping），客戶端逾時後據此判斷是否忙碌。
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[..., Any]],
+                 address: Tuple[str, int] = DAEMON_ADDRESS, authkey: Optional[bytes] = None,
+                 status: Optional[Callable[[], dict]] = None):
+        self.handlers = dict(handlers)
+        self.authkey = authkey if authkey is not None else load_authkey(create=True)
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.started = time.time()
+        self.served = 0
+        self.active = 0
+        self._active_lock = threading.Lock()
+        self._status = status
+        self._stopping = threading.Event()
+
+    def status(self) -> dict:
+        info = {'uptime_s': round(time.time() - self.started, 1), 'served': self.served,
+                'active': self.active, 'commands': sorted(self.handlers)}
+        if self._status:
+            info.update(self._status())
+        return info
+
+    def serve_forever(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                print(f"⚠️ 常駐服務連線失敗: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        self.listener.close()
+
+    def shutdown(self) -> None:
+        """停止接受新連線（以一個空連線喚醒 accept）"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+    def _run(self, cmd: str, payload: dict) -> Any:
+        with self._active_lock:
+            self.active += 1
+        try:
+            return self.handlers[cmd](**payload)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+    def _handle(self, conn) -> None:
+        with conn:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            cmd = message.pop('cmd', None) if isinstance(message, dict) else None
+            try:
+                if cmd == 'ping':
+                    reply = {'ok': True, 'result': self.status()}
+                elif cmd == 'shutdown':
+                    reply = {'ok': True, 'result': 'bye'}
+                elif cmd in self.handlers:
+                    reply = {'ok': True, 'result': self._run(cmd, message)}
+                else:
+                    reply = {'ok': False, 'error': f"未知的指令: {cmd}"}
+            except Exception as e:
+                reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+            self.served += 1
+            try:
+                conn.send(reply)
+            except OSError:
+                pass
+        if cmd == 'shutdown':
+            self.shutdown()
+
+
+def call(cmd: str, address: Tuple[str, int] = DAEMON_ADDRESS, authkey: Optional[bytes] = None,
+         timeout: Optional[float] = None, **payload) -> Any:
+    """
+    送出一個請求並等待回覆
+
+    timeout: 等待回覆的秒數；未指定時 analyze 依排隊中與本次的股票數計算（analyze_timeout），
+             其他指令為 DEFAULT_TIMEOUT
+
+    Raises:
+        DaemonBusy: 服務仍在分析（排隊或本次請求），等待時間內沒有完成
+        DaemonUnavailable: 服務沒有啟動 / 驗證失敗 / 沒有回應
+        RuntimeError: 服務端執行指令失敗
+    """
+    authkey = authkey if authkey is not None else load_authkey()
+    if timeout is None:
+        if cmd == 'analyze':
+            # 服務一次只跑一個分析請求：排在前面的股票也要等
+            queued = call('ping', address, authkey, timeout=PING_TIMEOUT).get('queued_tickers', 0)
+            timeout = analyze_timeout(queued + len(payload.get('tickers') or ()))
+        else:
+            timeout = DEFAULT_TIMEOUT
+    try:
+        conn = Client(address, authkey=authkey)
+    except (OSError, EOFError, AuthenticationError) as e:
+        raise DaemonUnavailable(f"無法連線常駐服務 {address[0]}:{address[1]} ({e})") from e
+    with conn:
+        conn.send({'cmd': cmd, **payload})
+        if not conn.poll(timeout):
+            raise _timeout_error(cmd, address, authkey, timeout)
+        try:
+            reply = conn.recv()
+        except EOFError as e:
+            raise DaemonUnavailable("常駐服務中斷連線") from e
+    if not reply.get('ok'):
+        raise RuntimeError(reply.get('error', '常駐服務執行失敗'))
+    return reply['result']
+
+
+def _timeout_error(cmd: str, address: Tuple[str, int], authkey: bytes, timeout: float) -> DaemonUnavailable:
+    """逾時後以 ping 確認服務狀態：還在執行請求為忙碌，ping 也沒有回應才是服務異常"""
+    if cmd != 'ping':
+        try:
+            status = call('ping', address, authkey, timeout=PING_TIMEOUT)
+        except DaemonUnavailable:
+            status = None
+        if status is not None and status.get('active'):
+            queued = status.get('queued_tickers')
+            detail = f"，佇列中 {queued} 檔" if queued else ""
+            return DaemonBusy(f"常駐服務忙碌中{detail}，{timeout:.0f} 秒內未完成，請稍後再試")
+    return DaemonUnavailable(f"常駐服務 {timeout:.0f} 秒內沒有回應")
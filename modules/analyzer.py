@@ -1,8 +1,18 @@
 import os
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
 
+from .price_store import PriceStore
+from .fundamentals_cache import get_valuation
+from .indicators import compute_indicators, lookback_days
+from .http_client import http_post, AI_TIMEOUT
+
+# 本地日 K 資料倉（與 main.py 共用 data/prices）
+PRICE_STORE = PriceStore()
+
+# 風險雷達與證據層使用的指標
+INDICATORS = ('SMA_60', 'MACD', 'RSI_14')
+
 def ask_perplexity(stock_name, stock_id, risk_summary, behavior_desc, api_key):
     """
     [Logic Layer] 呼叫 Perplexity API 進行深度辯證 (3分鐘層級)
@@ -30,7 +40,7 @@ def ask_perplexity(stock_name, stock_id, risk_summary, behavior_desc, api_key):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_post(url, json=payload, headers=headers, timeout=AI_TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             return data['choices'][0]['message']['content']
@@ -65,7 +75,7 @@ def ask_ai_custom(query, stock_name, stock_id, api_key):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_post(url, json=payload, headers=headers, timeout=AI_TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             content = data['choices'][0]['message']['content']
@@ -79,31 +89,9 @@ def ask_ai_custom(query, stock_name, stock_id, api_key):
 
 def calculate_indicators(df):
     """
-    [Analysis Core] 計算技術指標
+    [Analysis Core] 計算技術指標（只算風險雷達用得到的指標）
     """
-    df = df.sort_values('date')
-    close = df['close']
-
-    # MA
-    df['SMA_60'] = close.rolling(window=60).mean()
-    df['SMA_20'] = close.rolling(window=20).mean()
-
-    # MACD
-    exp12 = close.ewm(span=12, adjust=False).mean()
-    exp26 = close.ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp12 - exp26
-    df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-
-    # RSI
-    delta = close.diff()
-    gain = (delta.where(delta > 0, 0))
-    loss = (-delta.where(delta < 0, 0))
-    avg_gain = gain.ewm(com=13, adjust=False).mean()
-    avg_loss = loss.ewm(com=13, adjust=False).mean()
-    rs = avg_gain / avg_loss
-    df['RSI_14'] = 100 - (100 / (1 + rs))
-    
-    return df
+    return compute_indicators(df, INDICATORS)
 
 def analyze_foreign_behavior(df_foreign):
     """
@@ -206,6 +194,16 @@ def get_human_summary(name, risks, behavior_desc, behavior_tag):
         
     return score, action, action_class, summary
 
+def _finmind_daily_fetcher(dl, stock_id):
+    """建立 PriceStore 使用的 FinMind 下載函式（失敗回傳 None）"""
+    def fetch(start_date, end_date):
+        try:
+            return dl.taiwan_stock_daily(stock_id=stock_id, start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"⚠️ FinMind API Error: {e}")
+            return None
+    return fetch
+
 def analyze_stock(dl, stock_id, stock_name, perplexity_api_key=None):
     """
     [Controller] 核心分析入口，組裝 StockDecisionPacket
@@ -213,10 +211,10 @@ def analyze_stock(dl, stock_id, stock_name, perplexity_api_key=None):
     print(f"🚀 [v12.0 Risk Core] 分析中: {stock_name} ({stock_id})...")
     try:
         end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=200)).strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=lookback_days(INDICATORS))).strftime('%Y-%m-%d')
         
         # 1. 獲取數據
-        df = dl.taiwan_stock_daily(stock_id=stock_id, start_date=start_date, end_date=end_date)
+        df = PRICE_STORE.get_daily(stock_id, start_date, end_date, fetch=_finmind_daily_fetcher(dl, stock_id))
         if df.empty: return None
 
         df = calculate_indicators(df)
@@ -234,6 +232,10 @@ def analyze_stock(dl, stock_id, stock_name, perplexity_api_key=None):
         
         # Human Summary + Action Badge
         score, action, action_class, summary = get_human_summary(stock_name, radar, behavior_desc, behavior_tag)
+
+        # Valuation（共用基本面快取，每個交易日最多下載一次）
+        df_per = get_valuation(dl, stock_id, end_date)
+        latest_per = df_per.iloc[-1] if not df_per.empty else {}
         
         # 3. 組裝 Packet
         packet = {
@@ -267,6 +269,11 @@ def analyze_stock(dl, stock_id, stock_name, perplexity_api_key=None):
                 "technical": {
                     "rsi": float(round(latest.get('RSI_14', 50), 1)),
                     "macd_diff": float(round(latest.get('MACD', 0) - latest.get('MACD_signal', 0), 2))
+                },
+                "valuation": {
+                    "per": float(latest_per.get('PER', 0) or 0),
+                    "pbr": float(latest_per.get('PBR', 0) or 0),
+                    "dividend_yield": float(latest_per.get('dividend_yield', 0) or 0)
                 }
             },
             
@@ -0,0 +1,170 @@
+"""
+向量化回測 (Vectorized Backtest)
+
+以陣列運算重現 main.MiauBacktestStrategy 在 backtrader 上的結果：
+- 進場：收盤價 > SMA 且 MACD > Signal；出場：收盤價 < SMA 或 RSI > rsi_exit（預設 80）
+- 訊號於當根收盤判斷，下一根開盤價成交（backtrader 市價單）
+- 每次 1 股（backtrader 預設 FixedSize sizer），手續費 0.1425%（雙邊）
+- 指標採 backtrader 的定義：EMA / SMMA 以前 N 根的簡單平均為起始值，
+  與 modules/indicators 的 pandas ewm(adjust=False) 在前段數值不同
+- 所有指標都算得出來（最長的暖機期之後）才開始判斷訊號
+
+backtrader 版本保留為較慢的驗證路徑（ProAnalyzer.backtest_strategy_backtrader）。
+"""
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+COMMISSION = 0.001425
+START_CASH = 100000.0
+STAKE = 1
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """策略參數（預設值與 MiauBacktestStrategy 相同）"""
+    sma_period: int = 60
+    rsi_exit: float = 80.0
+    rsi_period: int = 14
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+
+    @property
+    def warmup(self) -> int:
+        """第一次判斷訊號前需要的 K 棒數（backtrader minperiod）"""
+        return max(self.sma_period, self.macd_slow + self.macd_signal - 1, self.rsi_period + 1)
+
+
+def _seeded_ewm(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """backtrader 的 EMA / SMMA：第一個有效值起算 period 根的平均為起點，之後遞迴"""
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0 or valid[0] + period > len(values):
+        return out
+    seed_at = valid[0] + period - 1
+    seeded = values.astype(float).copy()
+    seeded[:seed_at] = np.nan
+    seeded[seed_at] = values[valid[0]:seed_at + 1].mean()
+    return pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def strategy_signals(close: np.ndarray, params: StrategyParams = StrategyParams()) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    計算每根 K 棒收盤時的進場 / 出場訊號
+
+    Returns:
+        (entry, exit): bool 陣列；暖機期內皆為 False
+    """
+    close = np.asarray(close, dtype=float)
+    sma = pd.Series(close).rolling(params.sma_period).mean().to_numpy()
+
+    fast = _seeded_ewm(close, params.macd_fast, 2.0 / (params.macd_fast + 1))
+    slow = _seeded_ewm(close, params.macd_slow, 2.0 / (params.macd_slow + 1))
+    macd = fast - slow
+    signal = _seeded_ewm(macd, params.macd_signal, 2.0 / (params.macd_signal + 1))
+
+    change = np.diff(close, prepend=np.nan)
+    up = np.where(np.isnan(change), np.nan, np.maximum(change, 0.0))
+    down = np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0))
+    avg_up = _seeded_ewm(up, params.rsi_period, 1.0 / params.rsi_period)
+    avg_down = _seeded_ewm(down, params.rsi_period, 1.0 / params.rsi_period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+
+    ready = np.arange(len(close)) >= params.warmup - 1
+    with np.errstate(invalid='ignore'):
+        entry = ready & (close > sma) & (macd > signal)
+        exit_ = ready & ((close < sma) | (rsi > params.rsi_exit))
+    return entry, exit_
+
+
+def fill_bars(entry: np.ndarray, exit_: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    由訊號推得成交的 K 棒（訊號隔天開盤成交）
+
+    空手時只看進場、持有時只看出場，只需走訪有訊號的 K 棒
+
+    Returns:
+        (buy_bars, sell_bars): 成交 K 棒索引
+    """
+    n = len(entry)
+    buys, sells = [], []
+    holding = False
+    for t in np.flatnonzero((entry | exit_)[:n - 1]):
+        if not holding and entry[t]:
+            buys.append(t + 1)
+            holding = True
+        elif holding and exit_[t]:
+            sells.append(t + 1)
+            holding = False
+    return np.array(buys, dtype=int), np.array(sells, dtype=int)
+
+
+def equity_curve(open_: np.ndarray, close: np.ndarray, buy_bars: np.ndarray, sell_bars: np.ndarray,
+                 start_cash: float = START_CASH, commission: float = COMMISSION,
+                 stake: float = STAKE) -> np.ndarray:
+    """每根 K 棒收盤後的帳戶淨值（現金 + 持股市值）"""
+    n = len(close)
+    cash_flow = np.zeros(n)
+    position = np.zeros(n)
+    np.add.at(cash_flow, buy_bars, -open_[buy_bars] * stake * (1 + commission))
+    np.add.at(cash_flow, sell_bars, open_[sell_bars] * stake * (1 - commission))
+    np.add.at(position, buy_bars, stake)
+    np.add.at(position, sell_bars, -stake)
+    return start_cash + np.cumsum(cash_flow) + np.cumsum(position) * close
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    """最大回撤（%）"""
+    if len(values) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(values)
+    return float(np.max((peak - values) / peak) * 100)
+
+
+def run_backtest(df: pd.DataFrame, params: StrategyParams = StrategyParams(),
+                 start_cash: float = START_CASH, commission: float = COMMISSION) -> Dict[str, float]:
+    """
+    對單檔日 K（FinMind 欄位 date / open / close）回測
+
+    Returns:
+        dict: total_return / win_rate / max_drawdown / compound_return / marked_return (%) 與 final_value、trades
+    """
+    df = df.sort_values('date')
+    open_ = df['open'].to_numpy(dtype=float)
+    close = df['close'].to_numpy(dtype=float)
+    return backtest_arrays(open_, close, params, start_cash, commission)
+
+
+def backtest_arrays(open_: np.ndarray, close: np.ndarray, params: StrategyParams = StrategyParams(),
+                    start_cash: float = START_CASH, commission: float = COMMISSION) -> Dict[str, float]:
+    """run_backtest 的陣列版本（參數最佳化時可共用同一組價格陣列）"""
+    entry, exit_ = strategy_signals(close, params)
+    buy_bars, sell_bars = fill_bars(entry, exit_)
+    values = equity_curve(open_, close, buy_bars, sell_bars, start_cash, commission)
+    final_value = float(values[-1]) if len(values) else start_cash
+
+    closed = len(sell_bars)
+    buy_price, sell_price = open_[buy_bars[:closed]], open_[sell_bars]
+    pnl = (sell_price - buy_price) * STAKE - (buy_price + sell_price) * STAKE * commission
+    win_rate = round(float((pnl >= 0).sum()) / closed * 100, 2) if closed else 0
+    # 每次全額投入的複利報酬（不受每次 1 股的部位大小影響，供參數最佳化比較）
+    growth = (sell_price * (1 - commission)) / (buy_price * (1 + commission))
+    # 期末仍持有的部位以最後收盤價（扣賣出手續費）計價，區間結束時的未實現損益也算進來
+    open_growth = 1.0
+    if len(buy_bars) > closed:
+        open_growth = close[-1] * (1 - commission) / (open_[buy_bars[-1]] * (1 + commission))
+
+    return {
+        "total_return": round((final_value - start_cash) / start_cash * 100, 2),
+        "win_rate": win_rate,
+        "max_drawdown": round(max_drawdown(values), 2),
+        "final_value": round(final_value, 0),
+        "trades": closed,
+        "compound_return": round(float(np.prod(growth) - 1) * 100, 2),
+        "marked_return": round(float(np.prod(growth) * open_growth - 1) * 100, 2),
+    }
@@ -0,0 +1,122 @@
+"""
+市場基準指數 (Benchmarks)
+
+基準指數每次執行只下載一次（一次 yf.download 取回所有指數），再交給各進程共用；
+相關係數以矩陣方式計算：多檔股票 × 多個基準一次算完，
+新增基準（加權指數、費城半導體）不會增加任何個股層級的下載。
+"""
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# 基準代號 -> (Yahoo 代碼, 顯示名稱)
+BENCHMARKS: Dict[str, Tuple[str, str]] = {
+    "SP500": ("^GSPC", "S&P 500"),
+    "TAIEX": ("^TWII", "加權指數"),
+    "SOX": ("^SOX", "費城半導體"),
+}
+
+DEFAULT_BENCHMARKS = ("SP500",)
+
+# 相關係數高於此值時加入「高度相關」理由
+HIGH_CORRELATION = 0.8
+
+
+def selected_benchmarks() -> List[str]:
+    """由環境變數 BENCHMARKS (例如 "SP500,TAIEX,SOX") 決定要比較的基準"""
+    raw = os.getenv("BENCHMARKS")
+    if not raw:
+        return list(DEFAULT_BENCHMARKS)
+    keys = [k.strip().upper() for k in raw.split(",")]
+    return [k for k in keys if k in BENCHMARKS]
+
+
+def load_benchmarks(start_date: str, end_date: str, keys: List[str] = None) -> pd.DataFrame:
+    """
+    下載基準指數收盤價
+
+    Returns:
+        DataFrame: index 為日期、欄位為基準代號；下載失敗回傳空 DataFrame
+    """
+    import yfinance as yf
+
+    keys = keys or selected_benchmarks()
+    symbols = {BENCHMARKS[k][0]: k for k in keys}
+    try:
+        raw = yf.download(list(symbols), start=start_date, end=end_date, progress=False)
+    except Exception as e:
+        print(f"⚠️ 基準指數下載失敗: {e}")
+        return pd.DataFrame()
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+
+    closes = raw['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=next(iter(symbols)))
+    closes = closes.rename(columns=symbols)
+    closes.index = pd.to_datetime(closes.index).tz_localize(None)
+    return closes[[k for k in keys if k in closes.columns]]
+
+
+def _demean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """扣除各欄有效值的平均，缺值補 0"""
+    count = mask.sum(axis=0)
+    total = np.where(mask, values, 0.0).sum(axis=0)
+    mean = np.divide(total, count, out=np.zeros(values.shape[1]), where=count > 0)
+    return np.where(mask, values - mean, 0.0)
+
+
+def correlation_matrix(closes: pd.DataFrame, benchmarks: pd.DataFrame) -> pd.DataFrame:
+    """
+    計算多檔股票對多個基準的相關係數（一次 NumPy 運算）
+
+    每一組 (股票, 基準) 只使用兩邊都有報價的日期，結果與逐檔
+    pd.concat(join='inner') 後 Series.corr 相同。
+
+    Args:
+        closes: index 為日期、欄位為股票代號的收盤價
+        benchmarks: load_benchmarks 的結果
+
+    Returns:
+        DataFrame: index 為股票代號、欄位為基準代號
+    """
+    if closes.empty or benchmarks.empty:
+        return pd.DataFrame(index=closes.columns, columns=benchmarks.columns, dtype=float)
+
+    dates = closes.index.intersection(benchmarks.index)
+    x = closes.loc[dates].to_numpy(dtype=float)
+    y = benchmarks.loc[dates].to_numpy(dtype=float)
+
+    mx = ~np.isnan(x)
+    my = ~np.isnan(y)
+    # 先扣除欄平均以降低大數相減的誤差（相關係數不受平移影響）
+    x = _demean(x, mx)
+    y = _demean(y, my)
+    fx, fy = mx.astype(float), my.astype(float)
+
+    n = fx.T @ fy
+    sx = x.T @ fy
+    sy = fx.T @ y
+    sxx = (x * x).T @ fy
+    syy = fx.T @ (y * y)
+    sxy = x.T @ y
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        corr = cov / np.sqrt(var)
+    corr[n < 2] = np.nan
+
+    return pd.DataFrame(corr, index=closes.columns, columns=benchmarks.columns)
+
+
+def correlation_reasons(correlations: pd.Series) -> List[str]:
+    """將單檔股票對各基準的相關係數轉為理由標籤"""
+    reasons = []
+    for key, value in correlations.items():
+        if pd.notna(value) and value > HIGH_CORRELATION:
+            reasons.append(f"🌍高度相關{BENCHMARKS[key][1]}")
+    return reasons
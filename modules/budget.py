@@ -0,0 +1,96 @@
+"""
+單檔時間預算 (Time Budget)
+
+每檔股票從開始抓取起有一個總預算，各階段另有自己的上限（實際可用時間取兩者較小值）：
+
+    fetch    等待可省略的來源（新聞）的時間；價格 / 籌碼等必要資料仍會等到完成
+    compute  指標與評分一定完成；Monte Carlo、回測在時間用完時略過
+    ai       Perplexity 深度分析的等待上限，時間不足時不呼叫
+
+被略過的步驟記在結果的 skipped，並標記 partial，
+一檔卡住的股票不會拖住 15:30 的每日報告。
+預算以 time.time() 記錄絕對期限，可隨任務一起 pickle 到計算進程。
+設為 0 代表不限時。
+"""
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+
+STOCK_BUDGET_SECONDS = float(os.getenv("STOCK_BUDGET_SECONDS", "120"))
+STAGE_BUDGETS: Dict[str, float] = {
+    'fetch': float(os.getenv("FETCH_BUDGET_SECONDS", "20")),
+    'compute': float(os.getenv("COMPUTE_BUDGET_SECONDS", "30")),
+    'ai': float(os.getenv("AI_BUDGET_SECONDS", "60")),
+}
+
+# 時間不足時可以略過的步驟
+OPTIONAL_STEPS = ('news', 'monte_carlo', 'backtest', 'ai_insight')
+
+# 逾時呼叫放到背景執行緒後放手不管（呼叫本身仍受 http timeout 限制，最終會結束）
+_ABANDON_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="budget")
+
+
+def _limit(seconds: float) -> float:
+    return math.inf if seconds is None or seconds <= 0 else seconds
+
+
+class Budget:
+    """一檔股票的時間預算"""
+
+    def __init__(self, total: Optional[float] = None, stages: Optional[Dict[str, float]] = None):
+        self.total = _limit(STOCK_BUDGET_SECONDS if total is None else total)
+        self.stages = {name: _limit(seconds) for name, seconds in (STAGE_BUDGETS if stages is None else stages).items()}
+        self.deadline: Optional[float] = None
+        self.stage_deadlines: Dict[str, float] = {}
+
+    def start(self) -> 'Budget':
+        """開始計時（重複呼叫不會重設）"""
+        if self.deadline is None:
+            self.deadline = time.time() + self.total
+        return self
+
+    def extend(self, seconds: float) -> None:
+        """期限往後延（例如等待其他股票抓完的時間不算在這檔的預算內）"""
+        if self.deadline is not None and seconds > 0:
+            self.deadline += seconds
+
+    def begin(self, stage: str) -> float:
+        """進入某階段，回傳此階段可用的秒數"""
+        self.start()
+        self.stage_deadlines[stage] = min(time.time() + self.stages.get(stage, math.inf), self.deadline)
+        return self.remaining(stage)
+
+    def remaining(self, stage: Optional[str] = None) -> float:
+        """剩餘秒數（stage 有值時為該階段的剩餘時間）；不限時為 inf"""
+        self.start()
+        deadline = self.stage_deadlines.get(stage, self.deadline) if stage else self.deadline
+        return max(0.0, deadline - time.time())
+
+    def expired(self, stage: Optional[str] = None) -> bool:
+        return self.remaining(stage) <= 0
+
+    def timeout(self, stage: Optional[str] = None) -> Optional[float]:
+        """給 wait / result 使用的逾時秒數（不限時為 None）"""
+        remaining = self.remaining(stage)
+        return None if math.isinf(remaining) else remaining
+
+
+def call_with_timeout(fn: Callable[[], Any], seconds: Optional[float]) -> Any:
+    """
+    在 seconds 秒內取得 fn() 的結果，逾時拋出 TimeoutError
+
+    逾時的呼叫不會被中斷，只是不再等待（Python 執行緒無法強制停止）。
+    """
+    if seconds is None:
+        return fn()
+    if seconds <= 0:
+        raise TimeoutError("時間預算已用完")
+    future = _ABANDON_POOL.submit(fn)
+    try:
+        return future.result(timeout=seconds)
+    except FutureTimeout:
+        future.cancel()
+        raise TimeoutError(f"超過 {seconds:.1f} 秒") from None
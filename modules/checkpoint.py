@@ -0,0 +1,114 @@
+"""
+每日執行檢查點 (Run Checkpoint)
+
+每日分析拆成明確的階段，完成的部分存到 data/runs/<日期>/，
+中途失敗（例如產生報告或 LINE 推播時出錯）重新執行會跳過已完成的工作：
+
+    逐檔階段  fetch    抓取結果（無錯誤才存，有缺漏下次重抓）
+              compute  指標 / 評分 / Monte Carlo / 回測（進程池一次算完）
+              ai       AI 深度分析完成（或不需要）的最終結果
+    整體階段  render → notify → save，記在 state.json
+
+    data/runs/2026-02-07/fetch/2330.pkl
+    data/runs/2026-02-07/compute/2330.pkl
+    data/runs/2026-02-07/ai/2330.pkl
+    data/runs/2026-02-07/state.json     {"stages": {"render": "15:32:10", ...}}
+"""
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from .storage import DATA_DIR, atomic_write_json, atomic_write_pickle, read_json, read_pickle
+
+
+RUNS_DIR = DATA_DIR / "runs"
+STOCK_STAGES = ('fetch', 'compute', 'ai')
+RUN_STAGES = ('render', 'notify', 'save')
+
+
+class RunCheckpoint:
+    """一天的執行檢查點"""
+
+    def __init__(self, date: str, root: Path = RUNS_DIR):
+        self.date = date
+        self.root = Path(root)
+        self.dir = self.root / date
+
+    # --- 逐檔階段 ---
+
+    def _path(self, stage: str, stock_id: str) -> Path:
+        if stage not in STOCK_STAGES:
+            raise ValueError(f"未知的逐檔階段: {stage}")
+        return self.dir / stage / f"{stock_id}.pkl"
+
+    def has(self, stage: str, stock_id: str) -> bool:
+        return self._path(stage, stock_id).exists()
+
+    def load(self, stage: str, stock_id: str, default=None) -> Any:
+        return read_pickle(self._path(stage, stock_id), default)
+
+    def save(self, stage: str, stock_id: str, payload: Any) -> None:
+        atomic_write_pickle(payload, self._path(stage, stock_id))
+
+    def completed(self, stage: str) -> List[str]:
+        """某階段已完成的股票代號"""
+        folder = self.dir / stage
+        return sorted(p.stem for p in folder.glob("*.pkl")) if folder.exists() else []
+
+    # --- 整體階段 ---
+
+    def _state(self) -> dict:
+        return read_json(self.dir / "state.json", default={}) or {}
+
+    def is_done(self, stage: str) -> bool:
+        return stage in self._state().get('stages', {})
+
+    def mark(self, stage: str) -> None:
+        state = self._state()
+        state.setdefault('stages', {})[stage] = datetime.now().strftime('%H:%M:%S')
+        atomic_write_json(state, self.dir / "state.json")
+
+    def run_stage(self, stage: str, fn: Callable[[], Any], once: bool = False) -> Optional[Any]:
+        """
+        執行一個整體階段：fn 回傳真值才標記完成，失敗只記錄不中斷後續階段
+
+        fn 拋出例外或回傳 None / False 都視為失敗（例如推播沒有送出），
+        重新執行時會再做一次。
+        once: 已完成就跳過（例如推播，重跑不應重複發送）
+        """
+        if once and self.is_done(stage):
+            print(f"⏭️ {stage} 今日已完成，略過")
+            return None
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"❌ 階段 {stage} 失敗（重新執行可從此處繼續）: {e}")
+            return None
+        if not result:
+            print(f"⚠️ 階段 {stage} 未完成（重新執行會再試一次）")
+            return result
+        self.mark(stage)
+        return result
+
+    # --- 維護 ---
+
+    def clear(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def summary(self) -> str:
+        parts = [f"{stage} {len(self.completed(stage))}" for stage in STOCK_STAGES]
+        done = [stage for stage in RUN_STAGES if self.is_done(stage)]
+        return f"{' | '.join(parts)} 檔；已完成: {', '.join(done) or '無'}"
+
+
+def prune_runs(keep: int = 7, root: Path = RUNS_DIR) -> List[str]:
+    """只保留最近 keep 天的檢查點，回傳刪除的日期"""
+    root = Path(root)
+    if not root.exists():
+        return []
+    dates = sorted(p.name for p in root.iterdir() if p.is_dir())
+    removed = dates[:-keep] if keep > 0 else dates
+    for date in removed:
+        shutil.rmtree(root / date, ignore_errors=True)
+    return removed
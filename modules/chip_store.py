@@ -0,0 +1,101 @@
+"""
+本地籌碼資料倉 (Pivoted Institutional Investors Store)
+
+FinMind 三大法人資料是長表（每天每種法人一列，買/賣分開），
+這裡轉成每檔一張寬表：date × 法人類別 → 淨買賣股數，
+並在寫入時預先算好 5/10/20 日滾動淨買賣，分析時只需讀最後一列。
+
+增量規則與 PriceStore 相同（meta 記錄已確認的日期區間，只補缺少的日期）。
+"""
+import re
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+from .price_store import DATE_FORMAT, PriceStore
+from .storage import DATA_DIR, atomic_write_csv
+
+
+CHIP_DIR = DATA_DIR / "chips"
+
+# FinMind TaiwanStockInstitutionalInvestorsBuySell 的 name 欄位
+INVESTOR_TYPES = ['Foreign_Investor', 'Investment_Trust', 'Dealer_self',
+                  'Dealer_Hedging', 'Foreign_Dealer_Self']
+
+# 預先計算的滾動天數（交易日）
+ROLLING_WINDOWS = (5, 10, 20)
+
+_ROLLING_PATTERN = re.compile(r'_\d+d$')
+
+
+def rolling_column(investor: str, window: int) -> str:
+    """例如 Foreign_Investor_5d"""
+    return f"{investor}_{window}d"
+
+
+def pivot_chips(df: pd.DataFrame, stock_id: str) -> pd.DataFrame:
+    """長表 (date, name, buy, sell) 轉為寬表 (date, stock_id, 各法人淨買賣股數)"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['date', 'stock_id'])
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date']).dt.strftime(DATE_FORMAT)
+    df['net'] = df['buy'] - df['sell']
+    wide = df.pivot_table(index='date', columns='name', values='net',
+                          aggfunc='sum', fill_value=0).reset_index()
+    wide.columns.name = None
+    wide.insert(1, 'stock_id', str(stock_id))
+    return wide
+
+
+def add_rolling_flows(wide: pd.DataFrame) -> pd.DataFrame:
+    """依日期排序後為每個法人欄位加上滾動淨買賣（不足天數時以現有天數加總）"""
+    investors = [c for c in wide.columns if c not in ('date', 'stock_id')]
+    wide = wide.sort_values('date').reset_index(drop=True)
+    wide[investors] = wide[investors].fillna(0).astype('int64')
+    rolled = {
+        rolling_column(name, window): wide[name].rolling(window, min_periods=1).sum().astype('int64')
+        for window in ROLLING_WINDOWS for name in investors
+    }
+    return pd.concat([wide, pd.DataFrame(rolled)], axis=1)
+
+
+class ChipStore(PriceStore):
+    """
+    本地籌碼資料倉
+
+    用法：
+        store = ChipStore()
+        df = store.get_daily(stock_id, start_date, end_date, fetch)
+        flows = ChipStore.latest_flows(df)
+        flows['Foreign_Investor_5d']
+    """
+
+    def __init__(self, root: Path = CHIP_DIR):
+        super().__init__(root)
+
+    def _normalize(self, df: pd.DataFrame, stock_id: str) -> pd.DataFrame:
+        return pivot_chips(df, stock_id)
+
+    def _merge(self, stock_id: str, new: pd.DataFrame) -> None:
+        """只合併原始淨買賣欄位，滾動欄位整張重算後寫回"""
+        if new.empty:
+            return
+        base = self.load(stock_id)
+        base = base[[c for c in base.columns if not _ROLLING_PATTERN.search(c)]]
+        merged = pd.concat([base, new], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='last')
+        atomic_write_csv(add_rolling_flows(merged), self._data_path(stock_id))
+
+    @staticmethod
+    def latest_flows(wide: pd.DataFrame) -> Dict[str, int]:
+        """
+        取最後一個交易日的各法人淨買賣與滾動淨買賣（股）
+
+        Returns:
+            dict: 例如 {'Foreign_Investor': ..., 'Foreign_Investor_5d': ...}；無資料回傳空 dict
+        """
+        if wide is None or wide.empty:
+            return {}
+        last = wide.iloc[-1]
+        return {c: int(last[c]) for c in wide.columns if c not in ('date', 'stock_id') and pd.notna(last[c])}
@@ -0,0 +1,134 @@
+"""
+每日特徵表 (Feature Store)
+
+analyze_stock 計算出的中間特徵（最新指標、法人買賣超、估值、營收年增、量比、
+新聞情緒、基準相關係數、VaR）每次執行存成一個日期分區：
+
+    data/features/2026-02-07.csv   一列一檔，欄位與型別固定 (FEATURE_COLUMNS)
+
+strategy_meeting.py、/admin 與重新評分都直接讀這張表，
+不必重跑整個流程，也不用解析中文欄位的報告 dict。
+同一天重跑時只覆蓋這次有分析到的股票，其餘保留。
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .benchmarks import BENCHMARKS
+from .storage import DATA_DIR, atomic_write_csv, read_csv
+
+
+FEATURES_DIR = DATA_DIR / "features"
+
+# 欄位 -> 型別（Int64 / float 允許缺值）
+FEATURE_COLUMNS: Dict[str, str] = {
+    'stock_id': 'str',
+    'name': 'str',
+    'close': 'float',
+    'change_pct': 'float',
+    'sma_60': 'float',
+    'macd': 'float',
+    'macd_signal': 'float',
+    'rsi_14': 'float',
+    'bb_upper': 'float',
+    'bb_lower': 'float',
+    'stoch_k': 'float',
+    'fib_618': 'float',
+    'trust_net': 'Int64',          # 投信近 5 日買賣超（張）
+    'foreign_net': 'Int64',        # 外資近 5 日買賣超（張）
+    'pe': 'float',
+    'pb': 'float',
+    'dividend_yield': 'float',
+    'revenue_yoy': 'float',        # 最新月營收年增率 (%)
+    'vol_ratio': 'float',          # 今日量 / 20 日均量
+    'sentiment': 'float',          # 新聞 VADER compound 平均
+    'var_95': 'float',
+    'cvar_95': 'float',
+    **{f'corr_{key.lower()}': 'float' for key in BENCHMARKS},
+    'score': 'float',              # 當次的喵姆評分
+}
+
+_PARTITION = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def to_frame(rows: Iterable[dict]) -> pd.DataFrame:
+    """依 FEATURE_COLUMNS 建立型別固定的特徵表（未知欄位丟棄、缺少的欄位補缺值）"""
+    df = pd.DataFrame(list(rows)).reindex(columns=list(FEATURE_COLUMNS))
+    for column, dtype in FEATURE_COLUMNS.items():
+        if dtype == 'str':
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+        elif dtype == 'Int64':
+            df[column] = pd.to_numeric(df[column], errors='coerce').round().astype('Int64')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(float)
+    return df
+
+
+def by_stock(df: pd.DataFrame) -> Dict[str, dict]:
+    """特徵表 -> {股票代號: {欄位: 值}}（缺值為 None）"""
+    if df.empty:
+        return {}
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return {row['stock_id']: row for row in records}
+
+
+class FeatureStore:
+    """日期分區的特徵表，每個分區一個 CSV"""
+
+    def __init__(self, root: Path = FEATURES_DIR):
+        self.root = Path(root)
+
+    def _path(self, date: str) -> Path:
+        return self.root / f"{date}.csv"
+
+    def dates(self) -> List[str]:
+        """已儲存的分區日期（由舊到新）"""
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob("*.csv") if _PARTITION.match(p.stem))
+
+    def write(self, date: str, rows: Iterable[dict]) -> pd.DataFrame:
+        """寫入一天的特徵；同一天已有資料時，以新資料覆蓋相同股票"""
+        new = to_frame(rows)
+        existing = self.load(date)
+        if not existing.empty:
+            existing = existing[~existing['stock_id'].isin(new['stock_id'])]
+            new = pd.concat([existing, new], ignore_index=True)
+        new = new.sort_values('stock_id', ignore_index=True)
+        atomic_write_csv(new, self._path(date))
+        return new
+
+    def load(self, date: Optional[str] = None) -> pd.DataFrame:
+        """讀取某一天（預設最新一天）的特徵表；沒有資料時回傳空 DataFrame"""
+        if date is None:
+            dates = self.dates()
+            if not dates:
+                return pd.DataFrame()
+            date = dates[-1]
+        df = read_csv(self._path(date), dtype={'stock_id': str, 'name': str})
+        return to_frame(df.to_dict('records')) if not df.empty else df
+
+    def history(self, stock_id: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None) -> pd.DataFrame:
+        """跨分區讀取（加上 date 欄位），可只取單檔"""
+        frames = []
+        for date in self.dates():
+            if (start and date < start) or (end and date > end):
+                continue
+            df = self.load(date)
+            if stock_id is not None and not df.empty:
+                df = df[df['stock_id'] == str(stock_id)]
+            if not df.empty:
+                frames.append(df.assign(date=date))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def latest(self) -> Dict[str, dict]:
+        """最新分區的特徵：{股票代號: {欄位: 值}}（缺值為 None）"""
+        return by_stock(self.load())
+
+
+FEATURE_STORE = FeatureStore()
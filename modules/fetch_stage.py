@@ -0,0 +1,108 @@
+"""
+並行資料抓取階段 (Concurrent Fetch Stage)
+
+把彼此獨立的網路請求（日 K、籌碼、估值、營收、新聞、基準指數）同時送出，
+單檔延遲由「所有請求相加」降為「最慢的那一個」；
+並記錄每個資料來源的耗時，方便找出瓶頸供應商。
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+@dataclass
+class FetchReport:
+    """並行抓取結果"""
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)   # 秒
+    elapsed: float = 0.0                                        # 整體耗時（秒）
+
+    def get(self, name: str, default=None):
+        """取得結果；失敗或不存在時回傳 default"""
+        value = self.results.get(name)
+        return default if value is None else value
+
+    def slowest(self) -> Optional[str]:
+        if not self.timings:
+            return None
+        return max(self.timings, key=self.timings.get)
+
+    def summary(self) -> str:
+        """例如：prices 0.12s | chips 1.05s ✗ | 合計 1.06s"""
+        parts = []
+        for name, seconds in sorted(self.timings.items(), key=lambda kv: -kv[1]):
+            mark = " ✗" if name in self.errors else ""
+            parts.append(f"{name} {seconds:.2f}s{mark}")
+        parts.append(f"合計 {self.elapsed:.2f}s")
+        return " | ".join(parts)
+
+    def timings_ms(self) -> Dict[str, int]:
+        return {name: int(seconds * 1000) for name, seconds in self.timings.items()}
+
+
+def fetch_concurrently(jobs: Dict[str, Callable[[], Any]], max_workers: int = None,
+                       timeout: Optional[float] = None, optional: Iterable[str] = ()) -> FetchReport:
+    """
+    同時執行多個抓取函式並等待全部完成
+
+    Args:
+        jobs: 名稱 -> 無參數函式
+        max_workers: 執行緒數，預設每個 job 一條
+        timeout: 可省略的 job 最多等待的秒數（None = 不限）
+        optional: 可省略的 job 名稱；逾時記錄為 TimeoutError，不再等待（必要的 job 一定等到完成）
+
+    Returns:
+        FetchReport: 失敗的 job 不會丟錯，例外記錄在 errors
+    """
+    report = FetchReport()
+    if not jobs:
+        return report
+
+    def timed(name, func):
+        t0 = time.perf_counter()
+        try:
+            return name, func(), None, time.perf_counter() - t0
+        except Exception as e:
+            return name, None, e, time.perf_counter() - t0
+
+    optional = set(optional)
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(jobs))
+    try:
+        futures = {name: executor.submit(timed, name, func) for name, func in jobs.items()}
+        wait(futures.values(), timeout=timeout)
+        for name, future in futures.items():
+            if name in optional and not future.done():
+                report.timings[name] = time.perf_counter() - started
+                report.errors[name] = TimeoutError(f"超過時間預算 {timeout:.1f} 秒")
+                continue
+            name, value, error, seconds = future.result()
+            report.timings[name] = seconds
+            if error is not None:
+                report.errors[name] = error
+            else:
+                report.results[name] = value
+    finally:
+        # 逾時的 job 留在背景執行緒自行結束，不阻塞此檔的後續階段
+        executor.shutdown(wait=False, cancel_futures=True)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def summarize_timings(timings_list) -> str:
+    """
+    彙總多檔股票的各來源耗時（毫秒），回傳平均/最大值由慢到快排序的摘要
+
+    Args:
+        timings_list: 每檔的 {來源: 毫秒}
+    """
+    totals: Dict[str, list] = {}
+    for timings in timings_list:
+        for name, ms in (timings or {}).items():
+            totals.setdefault(name, []).append(ms)
+    if not totals:
+        return "無資料"
+    rows = sorted(totals.items(), key=lambda kv: -sum(kv[1]) / len(kv[1]))
+    return " | ".join(f"{name} 平均 {sum(v) / len(v):.0f}ms / 最大 {max(v)}ms" for name, v in rows)
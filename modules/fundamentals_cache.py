@@ -0,0 +1,184 @@
+"""
+基本面資料快取 (Publication-aware Fundamentals Cache)
+
+月營收與估值（本益比 / 股價淨值比 / 殖利率）更新頻率遠低於執行頻率，
+這裡依各資料集的公布節奏決定是否需要重新下載：
+- 月營收：上個月營收已在本地就不抓；公布期間（每月 1~10 日）每天最多檢查一次，
+  截止日後再確認一次，之後等到下個月
+- 估值：每個交易日最多下載一次（週末沿用週五的資料）
+
+下載時只補本地最後一筆之後的日期。讀取端：main.py 的 fetch_stock_data
+（每日掃描與 analysis_daemon.py 常駐服務）以及 modules/analyzer.py；
+strategy_meeting.py 不讀這份快取，估值改取每日掃描寫出的特徵（modules/feature_store）。
+"""
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .price_store import DATE_FORMAT
+from .storage import DATA_DIR, atomic_write_csv, atomic_write_json, read_csv, read_json
+
+
+FUNDAMENTALS_DIR = DATA_DIR / "fundamentals"
+
+VALUATION = "valuation"
+REVENUE = "revenue"
+
+# 上市櫃公司須於每月 10 日前公布上月營收
+REVENUE_PUBLISH_DEADLINE = 10
+
+VALUATION_LOOKBACK_DAYS = 30
+REVENUE_LOOKBACK_DAYS = 400
+
+# fetch(start_date, end_date) -> DataFrame | None
+Fetcher = Callable[[str, str], Optional[pd.DataFrame]]
+
+
+def last_trading_day(today: datetime) -> str:
+    """最近一個交易日（不考慮國定假日）"""
+    while today.weekday() >= 5:
+        today -= timedelta(days=1)
+    return today.strftime(DATE_FORMAT)
+
+
+def valuation_is_stale(df: pd.DataFrame, meta: dict, today: datetime) -> bool:
+    """估值每個交易日下載一次"""
+    checked = meta.get('checked')
+    return df.empty or not checked or checked < last_trading_day(today)
+
+
+def revenue_is_stale(df: pd.DataFrame, meta: dict, today: datetime) -> bool:
+    """上個月營收尚未入庫時，依公布期間決定是否重新下載"""
+    first_of_month = today.replace(day=1)
+    target = first_of_month - timedelta(days=1)   # 上個月
+    if not df.empty and {'revenue_year', 'revenue_month'} <= set(df.columns):
+        latest = df.iloc[-1]
+        if (int(latest['revenue_year']), int(latest['revenue_month'])) >= (target.year, target.month):
+            return False
+
+    checked = meta.get('checked')
+    today_str = today.strftime(DATE_FORMAT)
+    if not checked:
+        return True
+    if checked >= today_str:
+        return False
+    if today.day <= REVENUE_PUBLISH_DEADLINE:
+        return True   # 公布期間每天檢查一次
+    deadline = first_of_month.replace(day=REVENUE_PUBLISH_DEADLINE).strftime(DATE_FORMAT)
+    return checked <= deadline   # 截止日後再確認一次
+
+
+STALENESS = {
+    VALUATION: valuation_is_stale,
+    REVENUE: revenue_is_stale,
+}
+
+
+class FundamentalsCache:
+    """
+    基本面資料快取
+
+    用法：
+        cache = FundamentalsCache()
+        df_per = cache.get(VALUATION, stock_id, start_date, end_date, fetch)
+    """
+
+    def __init__(self, root: Path = FUNDAMENTALS_DIR):
+        self.root = Path(root)
+
+    def _key(self, stock_id: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_\-]', '_', str(stock_id))
+
+    def _data_path(self, dataset: str, stock_id: str) -> Path:
+        return self.root / dataset / f"{self._key(stock_id)}.csv"
+
+    def _meta_path(self, dataset: str, stock_id: str) -> Path:
+        return self.root / dataset / f"{self._key(stock_id)}.meta.json"
+
+    def load(self, dataset: str, stock_id: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """只讀本地資料，不會觸發下載"""
+        df = read_csv(self._data_path(dataset, stock_id), dtype={'date': str, 'stock_id': str})
+        if df.empty:
+            return df
+        if start_date:
+            df = df[df['date'] >= start_date]
+        if end_date:
+            df = df[df['date'] <= end_date]
+        return df.reset_index(drop=True)
+
+    def get(self, dataset: str, stock_id: str, start_date: str, end_date: str,
+            fetch: Fetcher, now: datetime = None) -> pd.DataFrame:
+        """
+        依公布節奏決定是否下載，回傳 [start_date, end_date] 區間的資料
+
+        Args:
+            dataset: VALUATION 或 REVENUE
+            fetch: fetch(start, end) -> DataFrame；失敗回傳 None（不記錄檢查時間，下次重試）
+            now: 測試用，預設為現在時間
+        """
+        now = now or datetime.now()
+        cached = self.load(dataset, stock_id)
+        meta = read_json(self._meta_path(dataset, stock_id), default={}) or {}
+
+        covers_start = meta.get('fetched_from') and meta['fetched_from'] <= start_date
+        if covers_start and not STALENESS[dataset](cached, meta, now):
+            return self.load(dataset, stock_id, start_date, end_date)
+
+        # 只補本地最後一筆之後（含當筆，以新資料為準）
+        fetch_start = cached['date'].iloc[-1] if covers_start and not cached.empty else start_date
+        df_new = fetch(fetch_start, end_date)
+        if df_new is None:
+            return self.load(dataset, stock_id, start_date, end_date)
+
+        if not df_new.empty:
+            df_new = df_new.copy()
+            df_new['date'] = pd.to_datetime(df_new['date']).dt.strftime(DATE_FORMAT)
+            df_new['stock_id'] = str(stock_id)
+            merged = pd.concat([cached, df_new], ignore_index=True)
+            merged = merged.drop_duplicates(subset='date', keep='last').sort_values('date')
+            atomic_write_csv(merged, self._data_path(dataset, stock_id))
+
+        meta['checked'] = now.strftime(DATE_FORMAT)
+        meta['fetched_from'] = min(start_date, meta.get('fetched_from') or start_date)
+        atomic_write_json(meta, self._meta_path(dataset, stock_id))
+        return self.load(dataset, stock_id, start_date, end_date)
+
+
+FUNDAMENTALS_CACHE = FundamentalsCache()
+
+
+def _finmind_fetcher(method: str, dl, stock_id: str) -> Fetcher:
+    def fetch(start_date, end_date):
+        try:
+            return getattr(dl, method)(stock_id=stock_id, start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"⚠️ FinMind {method} 下載失敗 ({stock_id}): {e}")
+            return None
+    return fetch
+
+
+def get_valuation(dl, stock_id: str, end_date: str = None,
+                  cache: FundamentalsCache = None) -> pd.DataFrame:
+    """近 30 日本益比 / 股價淨值比 / 殖利率（TaiwanStockPER）"""
+    now = datetime.now()
+    end_date = end_date or now.strftime(DATE_FORMAT)
+    start_date = (now - timedelta(days=VALUATION_LOOKBACK_DAYS)).strftime(DATE_FORMAT)
+    return (cache or FUNDAMENTALS_CACHE).get(
+        VALUATION, stock_id, start_date, end_date,
+        fetch=_finmind_fetcher('taiwan_stock_per_pbr', dl, stock_id)
+    )
+
+
+def get_revenue(dl, stock_id: str, end_date: str = None,
+                cache: FundamentalsCache = None) -> pd.DataFrame:
+    """近 400 日月營收（TaiwanStockMonthRevenue）"""
+    now = datetime.now()
+    end_date = end_date or now.strftime(DATE_FORMAT)
+    start_date = (now - timedelta(days=REVENUE_LOOKBACK_DAYS)).strftime(DATE_FORMAT)
+    return (cache or FUNDAMENTALS_CACHE).get(
+        REVENUE, stock_id, start_date, end_date,
+        fetch=_finmind_fetcher('taiwan_stock_month_revenue', dl, stock_id)
+    )
@@ -0,0 +1,66 @@
+"""
+共用對外 HTTP 連線層
+
+所有對外 API（Perplexity、LINE、Alpha Vantage）統一經過這裡：
+- 每個進程一個 requests.Session，依主機保留連線池（keep-alive，不必每次重新 TLS 握手）
+- 預設 timeout，避免卡住的請求無限期佔住 pool worker
+- GET 遇到 429 / 5xx / 讀取逾時以指數退避自動重試，並遵守 Retry-After
+- POST 只重試連線失敗（請求尚未送出）；LINE 推播、Perplexity 查詢不是冪等操作，
+  送出後的 5xx 或讀取逾時重送會造成重複訊息與重複計費，且 90 秒的 AI 讀取逾時會被放大數倍
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# (連線逾時, 讀取逾時) 秒
+DEFAULT_TIMEOUT = (5, 30)
+# AI 生成內容較慢，讀取逾時放寬
+AI_TIMEOUT = (5, 90)
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# 讀取錯誤與狀態碼只對這些方法重試；連線錯誤（請求未送出）不分方法都會重試
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=3,
+        backoff_factor=1.0,                     # 1s, 2s, 4s
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,                  # 重試用盡後回傳最後的 response，由呼叫端判斷
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """取得目前進程的共用 Session（fork 後的子進程會建立自己的連線池）"""
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _lock:
+            session = _sessions.get(pid)
+            if session is None:
+                session = _build_session()
+                _sessions[pid] = session
+    return session
+
+
+def http_get(url: str, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def http_post(url: str, timeout=DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    return get_session().post(url, timeout=timeout, **kwargs)
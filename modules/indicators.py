@@ -0,0 +1,207 @@
+"""
+技術指標登錄表 (Indicator Registry)
+
+每個指標宣告自己的暖機長度（交易日）與計算方式，資料抓取的區間由「要算哪些指標」
+決定，也只計算被要求的指標。ProAnalyzer.calculate_indicators 與
+modules/analyzer.calculate_indicators 都經由這裡計算。
+
+計算函式同時接受單檔 Series 與 (日期 × 股票) 矩陣：
+全市場模式 (panel) 以相同的函式一次算完整個觀察清單，結果與逐檔計算相同。
+各檔的交易日不一定相同（新上市、停牌），直接在對齊後的矩陣上做 rolling
+會把缺值算進視窗。因此先把每一欄的有效值「靠下對齊」（缺值移到最前面），
+在這個座標上計算（等同逐檔只用自己的交易日），最後再放回原本的日期。
+"""
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+FIB_RATIOS = {'Fib_236': 0.236, 'Fib_382': 0.382, 'Fib_500': 0.500, 'Fib_618': 0.618, 'Fib_786': 0.786}
+
+# 交易日換算日曆天時預留的連假緩衝
+HOLIDAY_BUFFER_DAYS = 14
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """
+    指標定義
+
+    lookback: 算出穩定數值所需的交易日數（EMA 類取到初始值權重低於約 0.5%）
+    compute: compute(close, high, low) -> {欄位名稱: 與 close 同形狀的結果}
+    """
+    name: str
+    columns: Tuple[str, ...]
+    lookback: int
+    compute: Callable[..., Dict[str, object]]
+
+
+def _sma(column, window):
+    def compute(close, high, low):
+        return {column: close.rolling(window=window).mean()}
+    return compute
+
+
+def _macd(close, high, low):
+    exp12 = close.ewm(span=12, adjust=False).mean()
+    exp26 = close.ewm(span=26, adjust=False).mean()
+    macd = exp12 - exp26
+    return {'MACD': macd, 'MACD_signal': macd.ewm(span=9, adjust=False).mean()}
+
+
+def _bollinger(close, high, low):
+    """Bollinger Bands (20, 2)"""
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    return {'SMA_20': sma, 'STD_20': std, 'BB_upper': sma + 2 * std, 'BB_lower': sma - 2 * std}
+
+
+def _kd(close, high, low):
+    """Stochastic Oscillator (KD) (9,3,3)"""
+    low_min = low.rolling(window=9).min()
+    high_max = high.rolling(window=9).max()
+    rsv = 100 * ((close - low_min) / (high_max - low_min))
+    return {'Stoch_K': rsv.ewm(alpha=1/3, adjust=False).mean().fillna(50)}
+
+
+def _rsi(close, high, low):
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    rs = gain.ewm(com=13, adjust=False).mean() / loss.ewm(com=13, adjust=False).mean()
+    return {'RSI_14': 100 - (100 / (1 + rs))}
+
+
+def _fibonacci(close, high, low):
+    """以整段期間的最高 / 最低收盤價計算回檔水平"""
+    price_max, price_min = close.max(), close.min()
+    diff = price_max - price_min
+    base = close.where(close.isna(), 0.0)   # 與 close 同形狀，有效值為 0
+    return {name: base + (price_max - ratio * diff) for name, ratio in FIB_RATIOS.items()}
+
+
+# 依計算順序排列（輸出欄位順序與原本 calculate_indicators 相同）
+REGISTRY: Dict[str, IndicatorSpec] = {spec.name: spec for spec in (
+    IndicatorSpec('SMA_60', ('SMA_60',), 60, _sma('SMA_60', 60)),
+    IndicatorSpec('SMA_custom', ('SMA_custom',), 30, _sma('SMA_custom', 30)),      # 客製化指標：30 日均線
+    IndicatorSpec('MACD', ('MACD', 'MACD_signal'), 3 * 26 + 9, _macd),
+    IndicatorSpec('Bollinger', ('SMA_20', 'STD_20', 'BB_upper', 'BB_lower'), 20, _bollinger),
+    IndicatorSpec('KD', ('Stoch_K',), 9 + 15, _kd),
+    IndicatorSpec('RSI_14', ('RSI_14',), 5 * 14, _rsi),
+    IndicatorSpec('Fibonacci', tuple(FIB_RATIOS), 130, _fibonacci),  # 約半年的高低點
+)}
+
+# ProAnalyzer 預設計算的指標（SMA_custom 需由 custom_indicators 指定）
+DEFAULT_INDICATORS = ('SMA_60', 'MACD', 'Bollinger', 'KD', 'RSI_14', 'Fibonacci')
+
+
+def resolve(names: Iterable[str]) -> List[IndicatorSpec]:
+    """依登錄順序取出指標定義，未登錄的名稱忽略"""
+    wanted = set(names or ())
+    return [spec for name, spec in REGISTRY.items() if name in wanted]
+
+
+def lookback_rows(names: Iterable[str]) -> int:
+    """計算這組指標需要的交易日數"""
+    return max((spec.lookback for spec in resolve(names)), default=0)
+
+
+def lookback_days(names: Iterable[str]) -> int:
+    """需要向前抓取的日曆天數（交易日 × 7/5 再加連假緩衝）"""
+    return math.ceil(lookback_rows(names) * 7 / 5) + HOLIDAY_BUFFER_DAYS
+
+
+def compute_indicators(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """
+    計算指定的指標並加到日 K 上（依日期排序）
+
+    Args:
+        df: FinMind 日 K（close / max / min）
+        names: 登錄表中的指標名稱
+    """
+    df = df.sort_values('date')
+    for spec in resolve(names):
+        for column, values in spec.compute(df['close'], df['max'], df['min']).items():
+            df[column] = values
+    return df
+
+
+def pivot_panel(frames: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    將逐檔 FinMind 日 K 轉成收盤 / 最高 / 最低價矩陣
+
+    Args:
+        frames: {股票代號: 含 date, close, max, min 欄位的 DataFrame}
+
+    Returns:
+        (close, high, low): index 為日期字串、欄位為股票代號
+    """
+    columns = {'close': {}, 'max': {}, 'min': {}}
+    for stock_id, df in frames.items():
+        if df is None or df.empty:
+            continue
+        indexed = df.drop_duplicates('date', keep='last').set_index('date')
+        for col, series in columns.items():
+            series[stock_id] = indexed[col]
+    close, high, low = (pd.DataFrame(columns[c]).sort_index() for c in ('close', 'max', 'min'))
+    return close, high, low
+
+
+def _compact_order(valid: np.ndarray) -> np.ndarray:
+    """每欄的排列順序：缺值在前、有效值依原順序在後"""
+    return np.argsort(valid, axis=0, kind='stable')
+
+
+def _compact(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+    return np.take_along_axis(values, order, axis=0)
+
+
+def _expand(values: np.ndarray, order: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    out = np.empty_like(values)
+    np.put_along_axis(out, order, values, axis=0)
+    out[~valid] = np.nan
+    return out
+
+
+def calculate_indicators_panel(close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame,
+                               custom_indicators: Iterable[str] = None,
+                               names: Iterable[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    一次計算所有股票的技術指標
+
+    Args:
+        close / high / low: 相同 index / columns 的價格矩陣（缺值代表該檔當天沒有交易）
+        custom_indicators: 與 ProAnalyzer.calculate_indicators 相同（例如 ['SMA_custom']）
+        names: 指定要算的指標，預設為 DEFAULT_INDICATORS
+
+    Returns:
+        dict: 欄位名稱 -> (日期 × 股票) DataFrame
+    """
+    index, columns = close.index, close.columns
+    valid = close.notna().to_numpy()
+    order = _compact_order(valid)
+
+    def compact(frame):
+        return pd.DataFrame(_compact(frame.reindex(index=index, columns=columns).to_numpy(dtype=float), order))
+
+    c, h, l = compact(close), compact(high), compact(low)
+    names = list(names or DEFAULT_INDICATORS) + list(custom_indicators or ())
+
+    result = {}
+    for spec in resolve(names):
+        for column, frame in spec.compute(c, h, l).items():
+            result[column] = pd.DataFrame(_expand(frame.to_numpy(dtype=float), order, valid),
+                                          index=index, columns=columns)
+    return result
+
+
+def attach_indicators(df: pd.DataFrame, panel: Dict[str, pd.DataFrame], stock_id: str) -> pd.DataFrame:
+    """把 panel 結果接回單檔日 K（依日期排序，欄位與 calculate_indicators 相同）"""
+    df = df.sort_values('date')
+    dates = df['date']
+    for name, frame in panel.items():
+        df[name] = frame[stock_id].reindex(dates).to_numpy()
+    return df
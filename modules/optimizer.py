@@ -0,0 +1,305 @@
+"""
+策略參數最佳化 (Parameter Sweep + Walk-forward)
+
+對觀察清單每一檔、每一組參數（SMA 週期、RSI 出場門檻、MACD 週期）跑向量化回測：
+- 價格陣列在進程池啟動時交給每個 worker 一次（initializer），任務只傳參數
+- 結果依 (股票, 資料雜湊, 參數) 快取，資料沒變的組合不會重跑
+- Walk-forward：在每個訓練區間選出最佳參數，再到緊接著的測試區間驗證，
+  以樣本外 (out-of-sample) 表現評估參數，避免過度擬合
+- 有日期時區間固定在日曆季度上，資料窗每天往後滑動也不會改變既有區間，快取才重複用得到
+"""
+import hashlib
+import re
+from dataclasses import asdict
+from itertools import product
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .backtest import StrategyParams, backtest_arrays
+from .storage import DATA_DIR, atomic_write_json, read_json
+
+
+OPTIMIZER_DIR = DATA_DIR / "optimizer"
+
+DEFAULT_SMA_PERIODS = (20, 40, 60, 90)
+DEFAULT_RSI_EXITS = (70, 75, 80, 85)
+DEFAULT_MACD_SPANS = ((12, 26, 9), (8, 17, 9), (5, 35, 5))
+
+# 訓練 / 測試區間長度（交易日，沒有日期時使用）
+DEFAULT_TRAIN_SIZE = 250
+DEFAULT_TEST_SIZE = 60
+# 日曆區間（月）：測試區間為完整季度，訓練區間為其前一年
+DEFAULT_TRAIN_MONTHS = 12
+DEFAULT_TEST_MONTHS = 3
+
+# 回測結果欄位改變時遞增（舊版雜湊不會再被查詢，存檔時清除）
+CACHE_VERSION = 2
+
+# (開盤價, 收盤價)
+PriceArrays = Tuple[np.ndarray, np.ndarray]
+
+_WORKER_PRICES: Dict[str, PriceArrays] = {}
+
+
+def param_grid(sma_periods: Iterable[int] = DEFAULT_SMA_PERIODS,
+               rsi_exits: Iterable[float] = DEFAULT_RSI_EXITS,
+               macd_spans: Iterable[Tuple[int, int, int]] = DEFAULT_MACD_SPANS) -> List[StrategyParams]:
+    return [
+        StrategyParams(sma_period=sma, rsi_exit=float(rsi), macd_fast=fast, macd_slow=slow, macd_signal=signal)
+        for sma, rsi, (fast, slow, signal) in product(sma_periods, rsi_exits, macd_spans)
+    ]
+
+
+def params_key(params: StrategyParams) -> str:
+    """例如 sma60_rsi80_macd12-26-9"""
+    return (f"sma{params.sma_period}_rsi{params.rsi_exit:g}"
+            f"_macd{params.macd_fast}-{params.macd_slow}-{params.macd_signal}")
+
+
+def data_hash(prices: PriceArrays) -> str:
+    digest = hashlib.sha1()
+    for array in prices:
+        digest.update(np.ascontiguousarray(array, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def walk_forward_splits(n: int, train_size: int = DEFAULT_TRAIN_SIZE,
+                        test_size: int = DEFAULT_TEST_SIZE) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    滾動切分 [(訓練區間), (測試區間)]，每段往後推一個測試區間長度
+
+    資料不足一組時回傳空 list（只能做全樣本最佳化）
+    """
+    splits = []
+    start = 0
+    while start + train_size + test_size <= n:
+        train = (start, start + train_size)
+        splits.append((train, (train[1], train[1] + test_size)))
+        start += test_size
+    return splits
+
+
+def calendar_splits(dates: Sequence, train_months: int = DEFAULT_TRAIN_MONTHS,
+                    test_months: int = DEFAULT_TEST_MONTHS,
+                    min_start: int = 0) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    以固定的日曆邊界切分（格式與 walk_forward_splits 相同，內容為索引）
+
+    測試區間從 1 月起每 test_months 個月一段（預設為季度），訓練區間為其前 train_months 個月。
+    以下區間略過，其餘區間的 K 棒不隨資料窗滑動而改變：
+    - 資料從訓練區間第一個月之後才開始（訓練區間不完整）
+    - 訓練區間前的暖機 K 棒不足 min_start 根
+    - 測試區間還沒結束（資料中沒有下一段的交易日）
+    """
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if len(days) == 0:
+        return []
+    months = days.astype('datetime64[M]').astype(int)   # 1970-01 起算的月份
+    first, last = int(months[0]), int(months[-1])
+
+    def index(month: int) -> int:
+        return int(np.searchsorted(days, np.datetime64(month, 'M').astype('datetime64[D]')))
+
+    splits = []
+    boundary = -(-(first + train_months + 1) // test_months) * test_months
+    while boundary + test_months <= last:
+        train = (index(boundary - train_months), index(boundary))
+        test = (train[1], index(boundary + test_months))
+        if train[0] >= min_start and train[0] < train[1] and test[0] < test[1]:
+            splits.append((train, test))
+        boundary += test_months
+    return splits
+
+
+def evaluate_segment(prices: PriceArrays, start: int, end: int, params: StrategyParams) -> Dict[str, float]:
+    """
+    回測 [start, end) 區間
+
+    往前多取暖機所需的 K 棒，讓第一個訊號剛好落在 start（不使用區間外的交易）
+    """
+    lead = max(0, start - (params.warmup - 1))
+    open_, close = prices
+    return backtest_arrays(open_[lead:end], close[lead:end], params)
+
+
+def score(metrics: Dict[str, float]) -> Tuple[float, float]:
+    """排序依據：複利報酬（期末持股以收盤價計價）高者優先，相同時回撤小者優先"""
+    return metrics['marked_return'], -metrics['max_drawdown']
+
+
+class OptimizerCache:
+    """
+    每檔一個 JSON：{資料雜湊: {參數鍵: 回測結果}}（只由主進程寫入）
+
+    只保留本次查詢過的資料雜湊，已經滑出資料窗的區間在下次存檔時清除。
+    """
+
+    def __init__(self, root: Path = OPTIMIZER_DIR):
+        self.root = Path(root)
+        self._entries: Dict[str, dict] = {}
+        self._used: Dict[str, Set[str]] = {}
+
+    def _path(self, stock_id: str) -> Path:
+        key = re.sub(r'[^A-Za-z0-9_\-]', '_', str(stock_id))
+        return self.root / f"{key}.json"
+
+    def _load(self, stock_id: str) -> dict:
+        if stock_id not in self._entries:
+            self._entries[stock_id] = read_json(self._path(stock_id), default={}) or {}
+        return self._entries[stock_id]
+
+    def get(self, stock_id: str, digest: str, key: str) -> Optional[Dict[str, float]]:
+        self._used.setdefault(stock_id, set()).add(digest)
+        return self._load(stock_id).get(digest, {}).get(key)
+
+    def put(self, stock_id: str, digest: str, key: str, metrics: Dict[str, float]) -> None:
+        self._used.setdefault(stock_id, set()).add(digest)
+        self._load(stock_id).setdefault(digest, {})[key] = metrics
+
+    def prune(self) -> int:
+        """移除本次沒有查詢過的資料雜湊，回傳移除數量"""
+        removed = 0
+        for stock_id, entries in self._entries.items():
+            for digest in set(entries) - self._used.get(stock_id, set()):
+                del entries[digest]
+                removed += 1
+        return removed
+
+    def save(self) -> None:
+        self.prune()
+        for stock_id, entries in self._entries.items():
+            atomic_write_json(entries, self._path(stock_id))
+
+
+def _init_worker(prices: Dict[str, PriceArrays]) -> None:
+    """每個 worker 只接收一次價格陣列，之後任務只傳區間與參數"""
+    global _WORKER_PRICES
+    _WORKER_PRICES = prices
+    for open_, close in prices.values():
+        open_.flags.writeable = False
+        close.flags.writeable = False
+
+
+def _run_task(task):
+    stock_id, start, end, params_list = task
+    prices = _WORKER_PRICES[stock_id]
+    return stock_id, start, end, [(p, evaluate_segment(prices, start, end, p)) for p in params_list]
+
+
+def sweep(prices: Dict[str, PriceArrays], segments: Dict[str, List[Tuple[int, int]]],
+          grid: List[StrategyParams], processes: int = None,
+          cache: OptimizerCache = None) -> Dict[Tuple[str, int, int], Dict[str, Dict[str, float]]]:
+    """
+    對每檔、每個區間回測整組參數
+
+    Returns:
+        dict: (股票, start, end) -> {參數鍵: 回測結果}
+    """
+    cache = cache or OptimizerCache()
+    results: Dict[Tuple[str, int, int], Dict[str, Dict[str, float]]] = {}
+    digests: Dict[Tuple[str, int, int, int], str] = {}
+
+    def digest_for(stock_id, start, end, params):
+        """雜湊只涵蓋這組參數實際用到的 K 棒 [暖機起點, end)"""
+        lead = max(0, start - (params.warmup - 1))
+        key = (stock_id, start, end, lead)
+        if key not in digests:
+            digests[key] = f"{data_hash(tuple(a[lead:end] for a in prices[stock_id]))}_{start - lead}_v{CACHE_VERSION}"
+        return digests[key]
+
+    tasks = []
+    for stock_id, ranges in segments.items():
+        for start, end in ranges:
+            found, missing = {}, []
+            for params in grid:
+                hit = cache.get(stock_id, digest_for(stock_id, start, end, params), params_key(params))
+                if hit is None:
+                    missing.append(params)
+                else:
+                    found[params_key(params)] = hit
+            results[(stock_id, start, end)] = found
+            if missing:
+                tasks.append((stock_id, start, end, missing))
+
+    if tasks:
+        processes = min(processes or cpu_count(), len(tasks))
+        with Pool(processes, initializer=_init_worker, initargs=(prices,)) as pool:
+            for stock_id, start, end, evaluated in pool.imap_unordered(_run_task, tasks):
+                for params, metrics in evaluated:
+                    results[(stock_id, start, end)][params_key(params)] = metrics
+                    cache.put(stock_id, digest_for(stock_id, start, end, params), params_key(params), metrics)
+    if tasks or cache.prune():
+        cache.save()
+    return results
+
+
+def optimize(prices: Dict[str, PriceArrays], grid: List[StrategyParams] = None,
+             train_size: int = DEFAULT_TRAIN_SIZE, test_size: int = DEFAULT_TEST_SIZE,
+             processes: int = None, cache: OptimizerCache = None,
+             dates: Dict[str, Sequence] = None, train_months: int = DEFAULT_TRAIN_MONTHS,
+             test_months: int = DEFAULT_TEST_MONTHS) -> Dict[str, dict]:
+    """
+    Walk-forward 參數最佳化
+
+    Args:
+        prices: {股票代號: (開盤價陣列, 收盤價陣列)}，依日期排序
+        grid: 參數組合，預設 param_grid()
+        dates: {股票代號: 與價格對應的日期}；有日期的股票以 calendar_splits 切分
+            （train_months / test_months），否則以 train_size / test_size 交易日滾動切分
+
+    Returns:
+        dict: {股票代號: {
+            'best': 最近一個訓練區間選出的參數,
+            'stability': 各訓練區間選出同一組參數的比例,
+            'oos_return': 樣本外複利報酬 (%)，各測試區間結束時仍持有的部位以收盤價計價,
+            'splits': [{'train', 'test', 'params', 'in_sample', 'out_of_sample'}, ...],
+        }}
+        資料不足一組 walk-forward 時以全樣本最佳化，oos_return 為 None
+    """
+    grid = grid or param_grid()
+    by_key = {params_key(p): p for p in grid}
+    cache = cache or OptimizerCache()
+
+    dates = dates or {}
+    warmup = max(p.warmup for p in grid) - 1
+    splits = {
+        sid: (calendar_splits(dates[sid], train_months, test_months, min_start=warmup) if sid in dates
+              else walk_forward_splits(len(arrays[1]), train_size, test_size))
+        for sid, arrays in prices.items()
+    }
+    train_segments = {
+        sid: [train for train, _ in s] or [(0, len(prices[sid][1]))] for sid, s in splits.items()
+    }
+    train_results = sweep(prices, train_segments, grid, processes, cache)
+
+    # 各訓練區間的最佳參數，只需在測試區間跑那一組
+    chosen = {
+        (sid, start, end): max(results, key=lambda k: score(results[k]))
+        for (sid, start, end), results in train_results.items() if results
+    }
+    report = {}
+    for sid, arrays in prices.items():
+        rows, growth = [], 1.0
+        for train, test in splits[sid]:
+            key = chosen.get((sid, *train))
+            if key is None:
+                continue
+            oos = evaluate_segment(arrays, test[0], test[1], by_key[key])
+            growth *= 1 + oos['marked_return'] / 100
+            rows.append({'train': train, 'test': test, 'params': key,
+                         'in_sample': train_results[(sid, *train)][key], 'out_of_sample': oos})
+        if rows:
+            picks = [row['params'] for row in rows]
+            best = picks[-1]
+            report[sid] = {'best': asdict(by_key[best]), 'stability': round(picks.count(best) / len(picks), 2),
+                           'oos_return': round((growth - 1) * 100, 2), 'splits': rows}
+        elif (sid, *train_segments[sid][0]) in chosen:
+            best = chosen[(sid, *train_segments[sid][0])]
+            report[sid] = {'best': asdict(by_key[best]), 'stability': None, 'oos_return': None,
+                           'splits': [{'train': train_segments[sid][0], 'test': None, 'params': best,
+                                       'in_sample': train_results[(sid, *train_segments[sid][0])][best],
+                                       'out_of_sample': None}]}
+    return report
@@ -0,0 +1,151 @@
+"""
+投資組合回測 (Portfolio Backtest)
+
+與 modules/backtest 相同的進出場規則，但整個觀察清單共用一筆現金：
+- 所有股票對齊到同一組交易日，逐日走訪一次（每天的運算都是整排股票的陣列運算）
+- 訊號於當根收盤判斷，該檔下一個交易日開盤成交；先賣後買
+- 進場金額不超過總資產的 max_weight（/admin 建議單一個股 15%），
+  並保留 cash_reserve 比例的現金（/admin 建議 20%）
+- 同一天現金不足以買進全部訊號時，依欄位（觀察清單）順序分配
+- 成交股數以 lot_size 為單位無條件捨去（預設 1 股，與單檔回測相同）
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import COMMISSION, StrategyParams, max_drawdown, strategy_signals
+
+
+DEFAULT_MAX_WEIGHT = 0.15
+DEFAULT_CASH_RESERVE = 0.20
+DEFAULT_LOT_SIZE = 1
+
+
+@dataclass
+class PortfolioResult:
+    """回測結果（equity / cash / drawdown 以日期為 index）"""
+    equity: pd.Series
+    cash: pd.Series
+    drawdown: pd.Series
+    start_cash: float
+    traded_value: float = 0.0
+    trades: int = 0
+    positions: Dict[str, float] = field(default_factory=dict)   # 期末持股數
+
+    def summary(self) -> Dict[str, float]:
+        """total_return / max_drawdown (%)、turnover（成交金額 / 平均淨值）"""
+        final_value = float(self.equity.iloc[-1]) if len(self.equity) else self.start_cash
+        mean_equity = float(self.equity.mean()) if len(self.equity) else self.start_cash
+        return {
+            "total_return": round((final_value - self.start_cash) / self.start_cash * 100, 2),
+            "max_drawdown": round(max_drawdown(self.equity.to_numpy()), 2),
+            "final_value": round(final_value, 0),
+            "turnover": round(float(self.traded_value / mean_equity), 2) if mean_equity else 0.0,
+            "trades": self.trades,
+        }
+
+
+def price_panel(frames: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    將逐檔 FinMind 日 K 轉成開盤 / 收盤價矩陣
+
+    Returns:
+        (open, close): index 為日期字串、欄位為股票代號（該檔沒有交易的日子為 NaN）
+    """
+    opens, closes = {}, {}
+    for stock_id, df in frames.items():
+        if df is None or df.empty:
+            continue
+        indexed = df.drop_duplicates('date', keep='last').set_index('date')
+        opens[stock_id], closes[stock_id] = indexed['open'], indexed['close']
+    return pd.DataFrame(opens).sort_index(), pd.DataFrame(closes).sort_index()
+
+
+def _order_flags(close: pd.DataFrame, params: StrategyParams) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每檔只用自己的交易日算訊號，再標記到「下一個交易日」作為成交日
+
+    Returns:
+        (buy, sell): (日期 × 股票) bool 陣列，True 代表當天開盤有掛單
+    """
+    values = close.to_numpy(dtype=float)
+    buy = np.zeros(values.shape, dtype=bool)
+    sell = np.zeros(values.shape, dtype=bool)
+    for j in range(values.shape[1]):
+        rows = np.flatnonzero(~np.isnan(values[:, j]))
+        if len(rows) < 2:
+            continue
+        entry, exit_ = strategy_signals(values[rows, j], params)
+        buy[rows[1:], j] = entry[:-1]
+        sell[rows[1:], j] = exit_[:-1]
+    return buy, sell
+
+
+def run_portfolio_backtest(open_: pd.DataFrame, close: pd.DataFrame, start_cash: float,
+                           params: StrategyParams = StrategyParams(),
+                           max_weight: float = DEFAULT_MAX_WEIGHT,
+                           cash_reserve: float = DEFAULT_CASH_RESERVE,
+                           lot_size: int = DEFAULT_LOT_SIZE,
+                           commission: float = COMMISSION) -> PortfolioResult:
+    """
+    以共用現金回測整個觀察清單
+
+    Args:
+        open_ / close: price_panel() 的開盤 / 收盤價矩陣
+        start_cash: 起始現金（portfolio.json 的 cash_position）
+    """
+    open_ = open_.reindex(index=close.index, columns=close.columns)
+    opens = open_.to_numpy(dtype=float)
+    closes = close.to_numpy(dtype=float)
+    want_buy, want_sell = _order_flags(close, params)
+
+    n_days, n_stocks = closes.shape
+    shares = np.zeros(n_stocks)
+    last_close = np.zeros(n_stocks)   # 停牌日以最後收盤價計算市值
+    equity = np.empty(n_days)
+    cash_curve = np.empty(n_days)
+    cash, traded_value, trades = float(start_cash), 0.0, 0
+
+    for t in range(n_days):
+        price = opens[t]
+
+        selling = want_sell[t] & (shares > 0)
+        if selling.any():
+            gross = float(shares[selling] @ price[selling])
+            cash += gross * (1 - commission)
+            traded_value += gross
+            trades += int(selling.sum())
+            shares[selling] = 0
+
+        buying = np.flatnonzero(want_buy[t] & (shares == 0) & (price > 0))
+        if len(buying):
+            total = cash + float(shares @ last_close)
+            budget = cash - cash_reserve * total
+            unit_cost = price * (1 + commission) * lot_size
+            for j in buying:
+                lots = np.floor(min(max_weight * total, budget) / unit_cost[j])
+                if lots <= 0:
+                    continue
+                cost = lots * unit_cost[j]
+                cash -= cost
+                budget -= cost
+                shares[j] = lots * lot_size
+                traded_value += lots * lot_size * price[j]
+
+        np.copyto(last_close, closes[t], where=~np.isnan(closes[t]))
+        equity[t] = cash + shares @ last_close
+        cash_curve[t] = cash
+
+    curve = pd.Series(equity, index=close.index, name='equity')
+    peak = curve.cummax()
+    return PortfolioResult(
+        equity=curve,
+        cash=pd.Series(cash_curve, index=close.index, name='cash'),
+        drawdown=((peak - curve) / peak * 100).rename('drawdown'),
+        start_cash=float(start_cash),
+        traded_value=traded_value,
+        trades=trades,
+        positions={sid: float(q) for sid, q in zip(close.columns, shares) if q > 0},
+    )
@@ -0,0 +1,252 @@
+"""
+本地日 K 資料倉 (Incremental OHLCV Store)
+
+每檔股票一個 CSV（以 date 為鍵、FinMind 欄位為欄），搭配一個 meta 檔記錄
+已確認下載過的日期區間。分析時先讀本地，只對缺少的日期呼叫 FinMind / Yahoo：
+- 尾端缺口：從「已確認日期」的下一天抓到 end_date（每日通常只有 1 天）
+- 頭端缺口：要求的 start_date 比已下載的起點更早時才回補
+
+規則：
+- fetch 回傳 None 代表「下載失敗」，不推進 meta，下次重試
+- fetch 回傳空 DataFrame 代表「該區間確實沒有資料」（例如假日），照常推進 meta
+- 今天的資料可能尚未公布，除非已拿到當日 K 棒，否則只確認到昨天
+"""
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from .storage import DATA_DIR, atomic_write_csv, atomic_write_json, read_csv, read_json
+
+
+PRICE_DIR = DATA_DIR / "prices"
+
+# FinMind TaiwanStockPrice 欄位（Yahoo 資料會先轉成同一套欄位名稱）
+PRICE_COLUMNS = ['date', 'stock_id', 'Trading_Volume', 'Trading_money',
+                 'open', 'max', 'min', 'close', 'spread', 'Trading_turnover']
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# fetch(start_date, end_date) -> DataFrame | None
+Fetcher = Callable[[str, str], Optional[pd.DataFrame]]
+
+
+def _shift_date(date_str: str, days: int) -> str:
+    return (datetime.strptime(date_str, DATE_FORMAT) + timedelta(days=days)).strftime(DATE_FORMAT)
+
+
+def _is_weekend(date_str: str) -> bool:
+    return datetime.strptime(date_str, DATE_FORMAT).weekday() >= 5
+
+
+def _count_weekdays(days: List[str]) -> int:
+    return sum(1 for d in days if not _is_weekend(d))
+
+
+def normalize_prices(df: pd.DataFrame, stock_id: str) -> pd.DataFrame:
+    """統一日期格式為 YYYY-MM-DD 字串並補上 stock_id 欄位"""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date']).dt.strftime(DATE_FORMAT)
+    df['stock_id'] = str(stock_id)
+    ordered = [c for c in PRICE_COLUMNS if c in df.columns]
+    return df[ordered]
+
+
+class PriceStore:
+    """
+    本地日 K 資料倉
+
+    用法：
+        store = PriceStore()
+        df = store.get_daily(stock_id, start_date, end_date, fetch)
+    """
+
+    def __init__(self, root: Path = PRICE_DIR):
+        self.root = Path(root)
+
+    # --------------------------------------------------------
+    # 檔案路徑
+    # --------------------------------------------------------
+
+    def _key(self, stock_id: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_\-]', '_', str(stock_id))
+
+    def _data_path(self, stock_id: str) -> Path:
+        return self.root / f"{self._key(stock_id)}.csv"
+
+    def _meta_path(self, stock_id: str) -> Path:
+        return self.root / f"{self._key(stock_id)}.meta.json"
+
+    # --------------------------------------------------------
+    # 讀寫
+    # --------------------------------------------------------
+
+    def load(self, stock_id: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """讀取本地資料（可指定日期區間）"""
+        df = read_csv(self._data_path(stock_id), dtype={'date': str, 'stock_id': str})
+        if df.empty:
+            return df
+        if start_date:
+            df = df[df['date'] >= start_date]
+        if end_date:
+            df = df[df['date'] <= end_date]
+        return df.reset_index(drop=True)
+
+    def _normalize(self, df: pd.DataFrame, stock_id: str) -> pd.DataFrame:
+        """將遠端資料轉成本地儲存格式（子類別可覆寫）"""
+        return normalize_prices(df, stock_id)
+
+    def _merge(self, stock_id: str, new: pd.DataFrame) -> None:
+        """合併已正規化的新資料（同日期以新資料為準）後寫回"""
+        if new.empty:
+            return
+        merged = pd.concat([self.load(stock_id), new], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='last').sort_values('date')
+        atomic_write_csv(merged, self._data_path(stock_id))
+
+    def upsert(self, stock_id: str, df: pd.DataFrame) -> None:
+        """合併遠端格式的新資料後寫回"""
+        self._merge(stock_id, self._normalize(df, stock_id))
+
+    def load_meta(self, stock_id: str) -> dict:
+        return read_json(self._meta_path(stock_id), default={}) or {}
+
+    def save_meta(self, stock_id: str, meta: dict) -> None:
+        atomic_write_json(meta, self._meta_path(stock_id))
+
+    # --------------------------------------------------------
+    # 增量下載
+    # --------------------------------------------------------
+
+    def missing_ranges(self, stock_id: str, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """計算需要向遠端下載的日期區間"""
+        meta = self.load_meta(stock_id)
+        fetched_from = meta.get('fetched_from')
+        fetched_through = meta.get('fetched_through')
+        if not fetched_from or not fetched_through:
+            return [(start_date, end_date)]
+
+        ranges = []
+        if start_date < fetched_from:
+            ranges.append((start_date, _shift_date(fetched_from, -1)))
+        if fetched_through < end_date:
+            ranges.append((_shift_date(fetched_through, 1), end_date))
+        return ranges
+
+    def get_daily(self, stock_id: str, start_date: str, end_date: str, fetch: Fetcher) -> pd.DataFrame:
+        """
+        先讀本地，只下載缺少的日期
+
+        Args:
+            stock_id: 股票代號
+            start_date / end_date: YYYY-MM-DD
+            fetch: fetch(start, end) -> DataFrame；失敗回傳 None
+
+        Returns:
+            DataFrame: [start_date, end_date] 區間的日 K（FinMind 欄位）
+        """
+        meta = self.load_meta(stock_id)
+        today = datetime.now().strftime(DATE_FORMAT)
+
+        for range_start, range_end in self.missing_ranges(stock_id, start_date, end_date):
+            df_new = fetch(range_start, range_end)
+            if df_new is None:
+                continue  # 下載失敗：不推進 meta，下次重試
+            df_new = self._normalize(df_new, stock_id)
+            self._merge(stock_id, df_new)
+
+            # 當天 K 棒可能尚未公布，只確認到昨天
+            confirmed = range_end
+            if range_end >= today and not (df_new['date'] == range_end).any():
+                confirmed = _shift_date(today, -1)
+
+            meta['fetched_through'] = max(confirmed, meta.get('fetched_through', confirmed))
+            meta['fetched_from'] = min(range_start, meta.get('fetched_from', range_start))
+            self.save_meta(stock_id, meta)
+
+        return self.load(stock_id, start_date, end_date)
+
+    # --------------------------------------------------------
+    # 全市場批次匯入
+    # --------------------------------------------------------
+
+    def sync_market(self, fetch_day: Callable[[str], Optional[pd.DataFrame]],
+                    start_date: str, end_date: str, universe: List[str]) -> int:
+        """
+        以「每日全市場」查詢一次補齊整個 universe 的尾端缺口
+
+        一天一次請求（不帶 stock_id 的 TaiwanStockPrice），再依 stock_id 分派到
+        各檔的本地資料，請求數從 O(檔數) 降為 O(天數)。
+        補不到的部分（頭端缺口、Yahoo 專屬代號）仍由 get_daily 逐檔處理。
+
+        Args:
+            fetch_day: fetch_day(date) -> 當日全市場 DataFrame；失敗回傳 None
+            start_date / end_date: 需要涵蓋的區間
+            universe: 要維護的股票代號
+
+        Returns:
+            int: 實際發出的請求數（0 代表缺口太大、不划算而跳過）
+        """
+        metas = {sid: self.load_meta(sid) for sid in universe}
+        need_start = {
+            sid: _shift_date(m['fetched_through'], 1) if m.get('fetched_through') else start_date
+            for sid, m in metas.items()
+        }
+
+        def plan(candidates):
+            pending = [need_start[sid] for sid in candidates if need_start[sid] <= end_date]
+            if not pending:
+                return []
+            days, day = [], min(pending)
+            while day <= end_date:
+                days.append(day)
+                day = _shift_date(day, 1)
+            return days
+
+        # 交易日數比檔數還多時，逐檔下載反而較省：
+        # 先排除尚未建檔的新代號（由 get_daily 逐檔初始化），仍不划算就整批跳過
+        days = plan(universe)
+        if _count_weekdays(days) > len(universe):
+            days = plan([sid for sid in universe if metas[sid].get('fetched_through')])
+        if not days or _count_weekdays(days) > len(universe):
+            return 0
+        sweep_start = days[0]
+
+        today = datetime.now().strftime(DATE_FORMAT)
+        frames = []
+        confirmed = None
+        calls = 0
+        for day in days:
+            if _is_weekend(day):
+                confirmed = day  # 週末不開盤
+                continue
+            df_day = fetch_day(day)
+            calls += 1
+            if df_day is None:
+                break  # 失敗即停，確保已確認的日期連續
+            if df_day.empty and day >= today:
+                break  # 今日資料尚未公布
+            frames.append(df_day)
+            confirmed = day
+
+        if confirmed is None or not frames:
+            return calls
+
+        market = pd.concat(frames, ignore_index=True)
+        market['stock_id'] = market['stock_id'].astype(str)
+        wanted = set(universe)
+        for sid, rows in market[market['stock_id'].isin(wanted)].groupby('stock_id'):
+            self.upsert(sid, rows)
+            if need_start[sid] < sweep_start:
+                continue  # 新代號但本次未涵蓋其起始日，交給 get_daily 回補
+            meta = metas[sid]
+            meta['fetched_from'] = min(meta.get('fetched_from', sweep_start), sweep_start)
+            meta['fetched_through'] = max(meta.get('fetched_through', confirmed), confirmed)
+            self.save_meta(sid, meta)
+
+        print(f"📦 全市場批次匯入: {len(frames)} 個交易日, {calls} 次請求")
+        return calls
@@ -0,0 +1,204 @@
+"""
+FinMind 額度排程器 (Quota-aware Token Bucket)
+
+所有進程共用同一個 token bucket（multiprocessing 共享記憶體 + Lock），
+每次 DataLoader 呼叫前先取得一個 token：
+- 額度用完時「排隊等待」而不是直接失敗
+- 保留一小部分額度給持股（priority）請求，確保持股一定先分析完
+- 遇到 FinMind 回報超過上限時清空 bucket，所有進程一起等到整點額度重置後再重試
+"""
+import multiprocessing
+import os
+import re
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+# FinMind 每小時請求上限（有 token 600 次、匿名 300 次）
+DEFAULT_HOURLY_LIMIT = 600
+ANONYMOUS_HOURLY_LIMIT = 300
+
+# 保留給持股請求的額度比例
+PRIORITY_RESERVE_RATIO = 0.05
+
+# FinMind 額度每小時整點重置；多等幾秒避免與伺服器時鐘的誤差
+QUOTA_WINDOW_SECONDS = 3600
+QUOTA_RESET_MARGIN = 5.0
+
+# FinMind 超過上限的回應：{"msg": "Requests reach the upper limit. ...", "status": 402}
+_QUOTA_STATUS = re.compile(r"""['"]status['"]\s*:\s*402\b""")
+
+
+def resolve_quota(dl=None, has_token: bool = True) -> Tuple[int, int]:
+    """
+    決定每小時請求上限與本小時剩餘額度
+
+    上限來源：環境變數 FINMIND_HOURLY_LIMIT > FinMind 帳號設定 > 預設值；
+    剩餘額度扣除本小時已用次數（查不到時視為全新額度）
+
+    Returns:
+        (hourly_limit, remaining)
+    """
+    env_limit = os.getenv("FINMIND_HOURLY_LIMIT")
+    if env_limit:
+        return int(env_limit), int(env_limit)
+    limit = DEFAULT_HOURLY_LIMIT if has_token else ANONYMOUS_HOURLY_LIMIT
+    if dl is None:
+        return limit, limit
+    try:
+        account_limit = int(dl.api_usage_limit)
+        if account_limit > 0:
+            limit = account_limit
+        used = int(dl.api_usage)
+        return limit, max(0, limit - used)
+    except Exception as e:
+        print(f"⚠️ 無法查詢 FinMind 額度: {e}")
+        return limit, limit
+
+
+def next_reset(now: Optional[float] = None) -> float:
+    """下一次整點額度重置的時間 (time.time())"""
+    now = time.time() if now is None else now
+    return (now // QUOTA_WINDOW_SECONDS + 1) * QUOTA_WINDOW_SECONDS + QUOTA_RESET_MARGIN
+
+
+class TokenBucket:
+    """
+    跨進程共用的 token bucket
+
+    state[0] = 目前 token 數, state[1] = 上次補充時間 (time.time()),
+    state[2] = 遠端額度用完時暫停到的時間（0 代表沒有暫停）
+    """
+
+    def __init__(self, hourly_limit: int, initial_tokens: float = None,
+                 reserve: float = None, lock=None, state=None):
+        self.capacity = float(hourly_limit)
+        self.rate = hourly_limit / 3600.0           # 每秒補充量
+        self.reserve = hourly_limit * PRIORITY_RESERVE_RATIO if reserve is None else reserve
+        self.lock = lock or multiprocessing.Lock()
+        if state is None:
+            tokens = self.capacity if initial_tokens is None else initial_tokens
+            state = multiprocessing.Array('d', [tokens, time.time(), 0.0])
+        self.state = state
+
+    def _refill(self, now: float) -> None:
+        blocked_until = self.state[2]
+        if blocked_until:
+            if now < blocked_until:
+                self.state[0], self.state[1] = 0.0, now
+                return
+            # 遠端額度已重置：整桶補滿
+            self.state[0], self.state[1], self.state[2] = self.capacity, now, 0.0
+            return
+        tokens, last = self.state[0], self.state[1]
+        self.state[0] = min(self.capacity, tokens + (now - last) * self.rate)
+        self.state[1] = now
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill(time.time())
+            return self.state[0]
+
+    def acquire(self, priority: bool = False) -> float:
+        """
+        取得一個 token，不足時等待
+
+        Args:
+            priority: 持股請求可以動用保留額度
+
+        Returns:
+            float: 等待秒數
+        """
+        floor = 1.0 if priority else 1.0 + self.reserve
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.time()
+                self._refill(now)
+                if self.state[0] >= floor:
+                    self.state[0] -= 1.0
+                    return waited
+                if self.state[2]:
+                    wait = self.state[2] - now
+                else:
+                    wait = (floor - self.state[0]) / self.rate
+            wait = min(max(wait, 0.05), 60.0)
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self, until: Optional[float] = None) -> None:
+        """
+        遠端回報已達上限：清空 token，所有進程一起等待
+
+        until: 遠端額度重置的時間；到達前不發出任何 token，之後整桶補滿
+        """
+        with self.lock:
+            self._refill(time.time())
+            self.state[0] = 0.0
+            if until is not None:
+                self.state[2] = max(self.state[2], until)
+
+
+def is_quota_error(error: Exception) -> bool:
+    """
+    FinMind 超過上限：DataLoader 找不到 data 欄位（KeyError: 'data'）、
+    upper limit 訊息，或回應 / 訊息中的 402 狀態碼（不比對任意含 402 的字串，例如股票代號 2402）
+    """
+    if isinstance(error, KeyError) and error.args == ('data',):
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 402:
+        return True
+    message = str(error)
+    return "upper limit" in message.lower() or bool(_QUOTA_STATUS.search(message))
+
+
+class ThrottledDataLoader:
+    """
+    DataLoader 代理：所有 taiwan_* 資料查詢都先經過 TokenBucket
+
+    用法：
+        dl = ThrottledDataLoader(DataLoader(), bucket, priority=True)
+        dl.taiwan_stock_daily(...)
+    """
+
+    def __init__(self, dl, bucket: Optional[TokenBucket], priority: bool = False,
+                 max_wait: float = 2 * QUOTA_WINDOW_SECONDS):
+        """
+        Args:
+            max_wait: 額度用完時最多等待的秒數（預設涵蓋兩次整點重置），超過才放棄
+        """
+        self._dl = dl
+        self._bucket = bucket
+        self._priority = priority
+        self._max_wait = max_wait
+
+    def _quota_exhausted(self) -> bool:
+        """向 FinMind 確認本小時額度確實用完（KeyError: 'data' 也可能是參數錯誤）；查不到時視為用完"""
+        try:
+            limit = int(self._dl.api_usage_limit)
+            return limit <= 0 or int(self._dl.api_usage) >= limit
+        except Exception:
+            return True
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._dl, name)
+        if self._bucket is None or not callable(attr) or not name.startswith("taiwan_"):
+            return attr
+
+        def throttled(*args, **kwargs):
+            deadline = time.time() + self._max_wait
+            while True:
+                self._bucket.acquire(self._priority)
+                try:
+                    return attr(*args, **kwargs)
+                except Exception as e:
+                    if not is_quota_error(e) or time.time() >= deadline or not self._quota_exhausted():
+                        raise
+                    reset = next_reset()
+                    print(f"🕒 FinMind 額度已滿，等到 {datetime.fromtimestamp(reset):%H:%M:%S} 額度重置後重試 ({name})")
+                    self._bucket.drain(until=reset)
+        return throttled
@@ -0,0 +1,122 @@
+"""
+逐檔結果串流 (NDJSON Result Stream)
+
+每日分析時每完成一檔就附加一行到 daily_analysis.ndjson，不必等最慢的股票：
+
+    {"_meta": {"date": "2026-02-07", "total": 120, "started": "15:30:02"}}
+    {"代號": "2330", "名稱": "台積電", "評分": 8.5, ..., "features": {"stock_id": "2330", "pe": 18.2, ...}}
+    ...
+    {"_meta": {"date": "2026-02-07", "total": 120, "count": 118, "complete": true}}
+
+第一行與最後一行是中繼資料；沒有結尾行代表掃描仍在進行（或中途失敗）。
+每筆結果帶著這檔的特徵列 (features)：特徵分區要等整輪分析結束才寫入，
+掃描中途讀取時不能拿前一天的分區來配對。
+strategy_meeting.py 等讀取端可用 read_stream() / tail() 讀取目前已完成的部分。
+"""
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+from .storage import BASE_DIR
+
+
+RESULTS_PATH = BASE_DIR / "daily_analysis.ndjson"
+
+
+class StreamSnapshot(NamedTuple):
+    meta: dict           # 開頭的中繼資料（date / total）
+    records: List[dict]  # 目前已完成的結果
+    complete: bool       # 是否已寫入結尾行
+    offset: int          # 已讀取到的位元組位置（tail 續讀用）
+
+
+class ResultStream:
+    """寫入端：一次執行一個檔案，每筆結果一行並立即 flush"""
+
+    def __init__(self, path: Path = RESULTS_PATH, encoder: type = json.JSONEncoder):
+        self.path = Path(path)
+        self.encoder = encoder
+        self.meta = {}
+        self.count = 0
+        self._file = None
+
+    def open(self, date: str, total: int) -> 'ResultStream':
+        """清空檔案並寫入開頭行"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.meta = {'date': date, 'total': total, 'started': datetime.now().strftime('%H:%M:%S')}
+        self.count = 0
+        self._write({'_meta': self.meta})
+        return self
+
+    def append(self, record: dict) -> None:
+        self._write(record)
+        self.count += 1
+
+    def close(self, complete: bool = True) -> None:
+        """寫入結尾行（complete=False 時只關閉檔案，讀取端會視為未完成）"""
+        if self._file is None:
+            return
+        if complete:
+            self._write({'_meta': {**self.meta, 'count': self.count, 'complete': True,
+                                   'finished': datetime.now().strftime('%H:%M:%S')}})
+        self._file.close()
+        self._file = None
+
+    def _write(self, obj: dict) -> None:
+        # 一次寫入整行，讀取端不會看到半行
+        self._file.write(json.dumps(obj, ensure_ascii=False, cls=self.encoder) + "\n")
+        self._file.flush()
+
+    def __enter__(self) -> 'ResultStream':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self.close(complete=exc_type is None)
+
+
+def read_stream(path: Path = RESULTS_PATH, offset: int = 0, meta: Optional[dict] = None) -> StreamSnapshot:
+    """
+    讀取串流檔（從 offset 開始）；最後一行若還沒寫完則留待下次讀取
+
+    檔案被新的執行清空（大小小於 offset）時從頭讀起。
+    """
+    path = Path(path)
+    meta = dict(meta or {})
+    records, complete = [], False
+    if not path.exists():
+        return StreamSnapshot(meta, records, complete, 0)
+    if os.path.getsize(path) < offset:
+        offset, meta = 0, {}
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                continue
+            if '_meta' in obj:
+                meta.update(obj['_meta'])
+                complete = bool(obj['_meta'].get('complete'))
+            else:
+                records.append(obj)
+    return StreamSnapshot(meta, records, complete, offset)
+
+
+def tail(path: Path = RESULTS_PATH, poll: float = 2.0, timeout: Optional[float] = None) -> Iterator[dict]:
+    """持續產出新完成的結果，直到出現結尾行（或 timeout 秒內沒有完成）"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    offset, meta = 0, {}
+    while True:
+        snapshot = read_stream(path, offset, meta)
+        offset, meta = snapshot.offset, snapshot.meta
+        yield from snapshot.records
+        if snapshot.complete or (deadline is not None and time.monotonic() >= deadline):
+            return
+        time.sleep(poll)
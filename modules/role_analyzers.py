@@ -8,10 +8,13 @@ Multi-Role Stock Analyzer - Official Specification Compliant
 3. 雙層語言：人話版本 + 專業版本
 """
 
-from dataclasses import dataclass, field, asdict
-from typing import List, Literal, Optional
+import inspect
+from dataclasses import dataclass, field
+from typing import Iterable, List, Literal, Optional, Tuple
 from enum import Enum
 
+import numpy as np
+
 
 # ============================================================
 # 1. 標準輸出資料結構 (v13 Spec Compliant)
@@ -23,7 +26,12 @@ class Direction(Enum):
     NEUTRAL = "neutral"
 
 
-@dataclass
+def _plain(value):
+    """numpy 純量轉成 Python 原生型別（json.dumps 不需再經過 NpEncoder）"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+@dataclass(slots=True)
 class RoleOutput:
     """每個分析角色的標準輸出格式 (v13)"""
     role_name: str                          # 角色名稱
@@ -33,12 +41,17 @@ class RoleOutput:
     raw_data: dict = field(default_factory=dict)
     
     def to_dict(self) -> dict:
-        d = asdict(self)
-        d['role_conclusion'] = self.role_conclusion.value
-        return d
+        # 欄位皆為純量 / 字串清單，直接組出 dict（asdict 會遞迴深拷貝，全市場時成本明顯）
+        return {
+            'role_name': self.role_name,
+            'role_conclusion': self.role_conclusion.value,
+            'confidence': _plain(self.confidence),
+            'key_evidence': list(self.key_evidence),
+            'raw_data': {k: _plain(v) for k, v in self.raw_data.items()},
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class ConflictReport:
     """衝突分析報告 (v13)"""
     has_conflict: bool
@@ -50,9 +63,15 @@ class ConflictReport:
     final_confidence: int                   # 0-100
     
     def to_dict(self) -> dict:
-        d = asdict(self)
-        d['final_direction'] = self.final_direction.value
-        return d
+        return {
+            'has_conflict': self.has_conflict,
+            'conflict_intensity': self.conflict_intensity,
+            'conflict_roles': list(self.conflict_roles),
+            'conflict_summary': self.conflict_summary,
+            'integration_reason': self.integration_reason,
+            'final_direction': self.final_direction.value,
+            'final_confidence': self.final_confidence,
+        }
 
 
 # ============================================================
@@ -76,6 +95,81 @@ def get_role_weights(market_state: str = "normal") -> dict:
         return {"籌碼分析官": 0.35, "技術分析官": 0.40, "情境分析官": 0.25}
 
 
+# 沒有列在權重表中的角色（風險評估官）
+DEFAULT_ROLE_WEIGHT = 0.33
+
+
+# ============================================================
+# 2.5 判斷門檻（逐檔 analyze / evidence 與批次版 analyze_batch 共用）
+# ============================================================
+
+# 籌碼分析官
+CHIP_FLOW_VOLUME = 5000             # 外資淨買賣超過此張數才算大買 / 大賣
+CHIP_BUY_DAYS = 4                   # 大買：至少連續買超天數
+CHIP_SELL_DAYS = 1                  # 大賣：買超天數至多
+CHIP_CONFIDENCE = 85
+CHIP_NEUTRAL_CONFIDENCE = 45
+CHIP_ALIGNED_BONUS = 15             # 外資與投信同向
+CHIP_OPPOSED_PENALTY = 10           # 外資買、法人合計賣
+
+# 技術分析官（分數 -4 ~ +4）
+TECH_MA60_POINTS = 1.0
+TECH_MA20_POINTS = 0.5
+TECH_MACD_POINTS = 1.0
+TECH_RSI_OVERBOUGHT = 70
+TECH_RSI_OVERSOLD = 30
+TECH_RSI_POINTS = 0.5               # 過熱扣分、超賣加分
+TECH_MOVE_PCT = 5                   # 近 5 日漲跌幅門檻 (%)
+TECH_DROP_POINTS = -1.0
+TECH_RALLY_POINTS = 0.5
+TECH_DIRECTION_SCORE = 1.5          # 分數絕對值達此門檻才有方向
+TECH_BASE_CONFIDENCE = 50
+TECH_MAX_CONFIDENCE = 90
+TECH_NEUTRAL_CONFIDENCE = 35
+
+# 情境分析官
+CONTEXT_NEWS_POINTS = 1.0
+CONTEXT_SECTOR_POINTS = {"up": 0.5, "down": -0.5}
+CONTEXT_SENTIMENT_POINTS = {"bullish": 0.5, "bearish": -0.5}
+CONTEXT_CATALYST_POINTS = 0.3
+CONTEXT_DIRECTION_SCORE = 1
+CONTEXT_CONFIDENCE = 60
+CONTEXT_NEUTRAL_CONFIDENCE = 40
+
+# 風險評估官：(門檻, 風險分數) 由高到低比對，超過第一個符合的門檻就加分
+RISK_VOLATILITY_LEVELS = ((5, 30), (3, 15))      # 日波動率 (%)
+RISK_DRAWDOWN_LEVELS = ((20, 25), (10, 15))      # 回檔幅度 (%)
+RISK_RSI_HOT = 80
+RISK_RSI_COLD = 20
+RISK_RSI_HOT_POINTS = 20
+RISK_RSI_COLD_POINTS = 10
+RISK_DIVERGENCE_VOLUME = 5000       # 外資大買 / 大賣
+RISK_DIVERGENCE_HIGH_SCORE = 6      # 外資大賣但評分高於此值
+RISK_DIVERGENCE_LOW_SCORE = 4       # 外資大買但評分低於此值
+RISK_DIVERGENCE_POINTS = 15
+RISK_HIGH_LEVEL = 50                # 以上為偏空（謹慎）
+RISK_MEDIUM_LEVEL = 25              # 以上為中性
+RISK_BASE_CONFIDENCE = 50           # 高風險時 50 + risk_level // 2
+RISK_MAX_CONFIDENCE = 90
+RISK_MEDIUM_CONFIDENCE = 50
+RISK_LOW_CONFIDENCE = 70            # 低風險時 70 - risk_level
+RISK_LOW_MAX_CONFIDENCE = 80
+
+# 衝突解決器：加權分數絕對值達此門檻才有最終方向
+FINAL_DIRECTION_SCORE = 0.15
+
+
+def _level_points(value, levels) -> int:
+    """依 (門檻, 分數) 表取得分數（逐檔用；批次版以 np.select 套用同一張表）"""
+    return next((points for threshold, points in levels if value > threshold), 0)
+
+
+def _risk_divergence(foreign_net, score):
+    """外資動向與評分背離（純量與陣列皆可）"""
+    return (((foreign_net < -RISK_DIVERGENCE_VOLUME) & (score > RISK_DIVERGENCE_HIGH_SCORE))
+            | ((foreign_net > RISK_DIVERGENCE_VOLUME) & (score < RISK_DIVERGENCE_LOW_SCORE)))
+
+
 # ============================================================
 # 3. 分析角色實作
 # ============================================================
@@ -92,43 +186,31 @@ class ChipAnalyzer:
     
     def analyze(self, foreign_net_volume: int, positive_days: int, 
                 trust_net_volume: int = 0, dealer_net_volume: int = 0) -> RoleOutput:
-        evidence = []
-        confidence = 50  # 基準 50
-        
         # 外資判斷 (不看價格!)
-        if foreign_net_volume > 5000 and positive_days >= 4:
+        if foreign_net_volume > CHIP_FLOW_VOLUME and positive_days >= CHIP_BUY_DAYS:
             direction = Direction.BULLISH
-            confidence = 85
-            evidence.append(f"🔥 外資強勢掃貨：連續 {positive_days} 日買超，累計吸籌 {foreign_net_volume:,} 張，吃貨意願極強。")
-        elif foreign_net_volume < -5000 and positive_days <= 1:
+            confidence = CHIP_CONFIDENCE
+        elif foreign_net_volume < -CHIP_FLOW_VOLUME and positive_days <= CHIP_SELL_DAYS:
             direction = Direction.BEARISH
-            confidence = 85
-            evidence.append(f"💸 外資大舉提款：單日或連續賣超達 {abs(foreign_net_volume):,} 張，資金明顯撤離，需避開賣壓。")
+            confidence = CHIP_CONFIDENCE
         else:
             direction = Direction.NEUTRAL
-            confidence = 45
-            if foreign_net_volume > 0:
-                evidence.append(f"⚖️ 外資小幅買進：淨買 {foreign_net_volume:,} 張，力道有限，尚未形成明確趨勢。")
-            else:
-                evidence.append(f"⚖️ 外資小幅調節：淨賣 {abs(foreign_net_volume):,} 張，觀望氣氛濃厚。")
+            confidence = CHIP_NEUTRAL_CONFIDENCE
         
         # 三大法人一致性
         total_inst = foreign_net_volume + trust_net_volume + dealer_net_volume
         if total_inst > 0 and foreign_net_volume > 0 and trust_net_volume > 0:
-            evidence.append("🤝 土洋合作：外資與投信同步站在買方，籌碼歸宿集中，有利波段攻擊。")
-            confidence = min(100, confidence + 15)
+            confidence = min(100, confidence + CHIP_ALIGNED_BONUS)
         elif total_inst < 0 and foreign_net_volume < 0 and trust_net_volume < 0:
-            evidence.append("📉 土洋對作失敗：外資與投信同步賣超，籌碼鬆動，多方防線潰敗。")
-            confidence = min(100, confidence + 15)
+            confidence = min(100, confidence + CHIP_ALIGNED_BONUS)
         elif total_inst < 0 and foreign_net_volume > 0:
-            evidence.append("⚠️ 籌碼對作：外資雖買，但內資(投信/自營)倒貨，導致股價震盪，需留意內資動向。")
-            confidence = max(0, confidence - 10)
+            confidence = max(0, confidence - CHIP_OPPOSED_PENALTY)
         
         return RoleOutput(
             role_name=self.ROLE_NAME,
             role_conclusion=direction,
             confidence=confidence,
-            key_evidence=evidence,
+            key_evidence=self.evidence(foreign_net_volume, positive_days, trust_net_volume, dealer_net_volume),
             raw_data={
                 "foreign_net": foreign_net_volume,
                 "positive_days": positive_days,
@@ -136,6 +218,28 @@ class ChipAnalyzer:
                 "dealer_net": dealer_net_volume
             }
         )
+    
+    def evidence(self, foreign_net_volume: int, positive_days: int,
+                 trust_net_volume: int = 0, dealer_net_volume: int = 0) -> List[str]:
+        """證據文字（與 analyze 的判斷條件相同，批次分析只對要顯示的列呼叫）"""
+        evidence = []
+        if foreign_net_volume > CHIP_FLOW_VOLUME and positive_days >= CHIP_BUY_DAYS:
+            evidence.append(f"🔥 外資強勢掃貨：連續 {positive_days} 日買超，累計吸籌 {foreign_net_volume:,} 張，吃貨意願極強。")
+        elif foreign_net_volume < -CHIP_FLOW_VOLUME and positive_days <= CHIP_SELL_DAYS:
+            evidence.append(f"💸 外資大舉提款：單日或連續賣超達 {abs(foreign_net_volume):,} 張，資金明顯撤離，需避開賣壓。")
+        elif foreign_net_volume > 0:
+            evidence.append(f"⚖️ 外資小幅買進：淨買 {foreign_net_volume:,} 張，力道有限，尚未形成明確趨勢。")
+        else:
+            evidence.append(f"⚖️ 外資小幅調節：淨賣 {abs(foreign_net_volume):,} 張，觀望氣氛濃厚。")
+        
+        total_inst = foreign_net_volume + trust_net_volume + dealer_net_volume
+        if total_inst > 0 and foreign_net_volume > 0 and trust_net_volume > 0:
+            evidence.append("🤝 土洋合作：外資與投信同步站在買方，籌碼歸宿集中，有利波段攻擊。")
+        elif total_inst < 0 and foreign_net_volume < 0 and trust_net_volume < 0:
+            evidence.append("📉 土洋對作失敗：外資與投信同步賣超，籌碼鬆動，多方防線潰敗。")
+        elif total_inst < 0 and foreign_net_volume > 0:
+            evidence.append("⚠️ 籌碼對作：外資雖買，但內資(投信/自營)倒貨，導致股價震盪，需留意內資動向。")
+        return evidence
 
 
 class TechAnalyzer:
@@ -151,65 +255,43 @@ class TechAnalyzer:
     def analyze(self, close: float, ma60: float, ma20: float,
                 rsi: float, macd_diff: float, 
                 price_change_5d: float, volume_ratio: float = 1.0) -> RoleOutput:
-        evidence = []
         score = 0  # -4 to +4
         
         # 均線位置 (純技術，不猜原因)
-        # 均線位置 (純技術，不猜原因)
-        if close > ma60:
-            score += 1
-            evidence.append("📈 多頭格局：股價穩站季線(生命線)之上，中長線趨勢偏多。")
-        else:
-            score -= 1
-            evidence.append("📉 空頭壓制：股價跌破季線，上方套牢賣壓沈重，反彈易受阻。")
-        
-        if close > ma20:
-            score += 0.5
-            evidence.append("✅ 短線強勢：股價位於月線之上，短期動能強。")
-        else:
-            score -= 0.5
-            evidence.append("❌ 短線轉弱：股價跌破月線，短期防守失敗。")
+        score += TECH_MA60_POINTS if close > ma60 else -TECH_MA60_POINTS
+        score += TECH_MA20_POINTS if close > ma20 else -TECH_MA20_POINTS
         
         # MACD
-        if macd_diff > 0:
-            score += 1
-            evidence.append("🐂 MACD 黃金交叉：OSC 翻紅或維持正值，攻擊訊號明確。")
-        else:
-            score -= 1
-            evidence.append("🐻 MACD 死亡交叉：OSC 翻綠或維持負值，修正壓力未除。")
+        score += TECH_MACD_POINTS if macd_diff > 0 else -TECH_MACD_POINTS
         
         # RSI
-        if rsi > 70:
-            evidence.append(f"🔥 RSI 過熱 ({rsi:.0f})：短線乖離過大，隨時可能拉回修正。")
-            score -= 0.5
-        elif rsi < 30:
-            evidence.append(f"❄️ RSI 超賣 ({rsi:.0f})：短線乖離過大，醞釀跌深反彈。")
-            score += 0.5
+        if rsi > TECH_RSI_OVERBOUGHT:
+            score -= TECH_RSI_POINTS
+        elif rsi < TECH_RSI_OVERSOLD:
+            score += TECH_RSI_POINTS
         
         # 近期走勢
-        if price_change_5d < -5:
-            evidence.append(f"近5日跌幅 {price_change_5d:.1f}%")
-            score -= 1
-        elif price_change_5d > 5:
-            evidence.append(f"近5日漲幅 +{price_change_5d:.1f}%")
-            score += 0.5
+        if price_change_5d < -TECH_MOVE_PCT:
+            score += TECH_DROP_POINTS
+        elif price_change_5d > TECH_MOVE_PCT:
+            score += TECH_RALLY_POINTS
         
         # 決定方向與信心
-        if score >= 1.5:
+        if score >= TECH_DIRECTION_SCORE:
             direction = Direction.BULLISH
-            confidence = min(90, 50 + int(score * 10))
-        elif score <= -1.5:
+            confidence = min(TECH_MAX_CONFIDENCE, TECH_BASE_CONFIDENCE + int(score * 10))
+        elif score <= -TECH_DIRECTION_SCORE:
             direction = Direction.BEARISH
-            confidence = min(90, 50 + int(abs(score) * 10))
+            confidence = min(TECH_MAX_CONFIDENCE, TECH_BASE_CONFIDENCE + int(abs(score) * 10))
         else:
             direction = Direction.NEUTRAL
-            confidence = 35
+            confidence = TECH_NEUTRAL_CONFIDENCE
         
         return RoleOutput(
             role_name=self.ROLE_NAME,
             role_conclusion=direction,
             confidence=confidence,
-            key_evidence=evidence,
+            key_evidence=self.evidence(close, ma60, ma20, rsi, macd_diff, price_change_5d),
             raw_data={
                 "close": close,
                 "ma60": ma60,
@@ -220,6 +302,36 @@ class TechAnalyzer:
                 "tech_score": score
             }
         )
+    
+    def evidence(self, close: float, ma60: float, ma20: float,
+                 rsi: float, macd_diff: float, price_change_5d: float) -> List[str]:
+        """證據文字（與 analyze 的判斷條件相同）"""
+        evidence = []
+        if close > ma60:
+            evidence.append("📈 多頭格局：股價穩站季線(生命線)之上，中長線趨勢偏多。")
+        else:
+            evidence.append("📉 空頭壓制：股價跌破季線，上方套牢賣壓沈重，反彈易受阻。")
+        
+        if close > ma20:
+            evidence.append("✅ 短線強勢：股價位於月線之上，短期動能強。")
+        else:
+            evidence.append("❌ 短線轉弱：股價跌破月線，短期防守失敗。")
+        
+        if macd_diff > 0:
+            evidence.append("🐂 MACD 黃金交叉：OSC 翻紅或維持正值，攻擊訊號明確。")
+        else:
+            evidence.append("🐻 MACD 死亡交叉：OSC 翻綠或維持負值，修正壓力未除。")
+        
+        if rsi > TECH_RSI_OVERBOUGHT:
+            evidence.append(f"🔥 RSI 過熱 ({rsi:.0f})：短線乖離過大，隨時可能拉回修正。")
+        elif rsi < TECH_RSI_OVERSOLD:
+            evidence.append(f"❄️ RSI 超賣 ({rsi:.0f})：短線乖離過大，醞釀跌深反彈。")
+        
+        if price_change_5d < -TECH_MOVE_PCT:
+            evidence.append(f"近5日跌幅 {price_change_5d:.1f}%")
+        elif price_change_5d > TECH_MOVE_PCT:
+            evidence.append(f"近5日漲幅 +{price_change_5d:.1f}%")
+        return evidence
 
 
 class ContextAnalyzer:
@@ -237,55 +349,40 @@ class ContextAnalyzer:
                 sector_trend: Literal["up", "down", "flat"] = "flat",
                 market_sentiment: Literal["bullish", "bearish", "neutral"] = "neutral",
                 has_catalyst: bool = False) -> RoleOutput:
-        evidence = []
         score = 0
         
         # 基本面 (不看價量)
         if has_positive_news:
-            score += 1
-            evidence.append("基本面有利多消息")
+            score += CONTEXT_NEWS_POINTS
         elif has_negative_news:
-            score -= 1
-            evidence.append("基本面有利空消息")
-        else:
-            evidence.append("基本面無明顯催化劑")
+            score -= CONTEXT_NEWS_POINTS
         
         # 產業循環
-        if sector_trend == "up":
-            score += 0.5
-            evidence.append("產業處於上升趨勢")
-        elif sector_trend == "down":
-            score -= 0.5
-            evidence.append("產業處於下行循環")
+        score += CONTEXT_SECTOR_POINTS.get(sector_trend, 0)
         
         # 大盤情緒
-        if market_sentiment == "bullish":
-            score += 0.5
-            evidence.append("大盤情緒偏多")
-        elif market_sentiment == "bearish":
-            score -= 0.5
-            evidence.append("大盤情緒偏空")
+        score += CONTEXT_SENTIMENT_POINTS.get(market_sentiment, 0)
         
         # 催化劑
         if has_catalyst:
-            evidence.append("存在近期催化劑事件")
-            score += 0.3
+            score += CONTEXT_CATALYST_POINTS
         
-        if score >= 1:
+        if score >= CONTEXT_DIRECTION_SCORE:
             direction = Direction.BULLISH
-            confidence = 60
-        elif score <= -1:
+            confidence = CONTEXT_CONFIDENCE
+        elif score <= -CONTEXT_DIRECTION_SCORE:
             direction = Direction.BEARISH
-            confidence = 60
+            confidence = CONTEXT_CONFIDENCE
         else:
             direction = Direction.NEUTRAL
-            confidence = 40
+            confidence = CONTEXT_NEUTRAL_CONFIDENCE
         
         return RoleOutput(
             role_name=self.ROLE_NAME,
             role_conclusion=direction,
             confidence=confidence,
-            key_evidence=evidence,
+            key_evidence=self.evidence(has_positive_news, has_negative_news, sector_trend,
+                                       market_sentiment, has_catalyst),
             raw_data={
                 "has_positive_news": has_positive_news,
                 "has_negative_news": has_negative_news,
@@ -295,6 +392,32 @@ class ContextAnalyzer:
                 "context_score": score
             }
         )
+    
+    def evidence(self, has_positive_news: bool = False, has_negative_news: bool = False,
+                 sector_trend: str = "flat", market_sentiment: str = "neutral",
+                 has_catalyst: bool = False) -> List[str]:
+        """證據文字（與 analyze 的判斷條件相同）"""
+        evidence = []
+        if has_positive_news:
+            evidence.append("基本面有利多消息")
+        elif has_negative_news:
+            evidence.append("基本面有利空消息")
+        else:
+            evidence.append("基本面無明顯催化劑")
+        
+        if sector_trend == "up":
+            evidence.append("產業處於上升趨勢")
+        elif sector_trend == "down":
+            evidence.append("產業處於下行循環")
+        
+        if market_sentiment == "bullish":
+            evidence.append("大盤情緒偏多")
+        elif market_sentiment == "bearish":
+            evidence.append("大盤情緒偏空")
+        
+        if has_catalyst:
+            evidence.append("存在近期催化劑事件")
+        return evidence
 
 
 class RiskAnalyzer:
@@ -325,61 +448,72 @@ class RiskAnalyzer:
         """
         
         risk_level = 0  # 風險等級 0-100
-        evidence = []
         
         # 波動性風險
-        if volatility > 5:
-            risk_level += 30
-            evidence.append("⚡ 高波動風險 (日波動 >5%)")
-        elif volatility > 3:
-            risk_level += 15
-            evidence.append("📊 中等波動")
-        else:
-            evidence.append("🧘 低波動穩定")
+        risk_level += _level_points(volatility, RISK_VOLATILITY_LEVELS)
         
         # 回檔風險
-        if current_drawdown > 20:
-            risk_level += 25
-            evidence.append(f"📉 深度回檔 ({abs(current_drawdown):.1f}%)")
-        elif current_drawdown > 10:
-            risk_level += 15
-            evidence.append(f"⚠️ 明顯回檔 ({abs(current_drawdown):.1f}%)")
+        risk_level += _level_points(current_drawdown, RISK_DRAWDOWN_LEVELS)
         
         # RSI 極端值風險
-        if rsi > 80:
-            risk_level += 20
-            evidence.append("🔥 RSI 過熱，追高風險大")
-        elif rsi < 20:
-            risk_level += 10
-            evidence.append("❄️ RSI 超賣，可能反彈但勿重壓")
+        if rsi > RISK_RSI_HOT:
+            risk_level += RISK_RSI_HOT_POINTS
+        elif rsi < RISK_RSI_COLD:
+            risk_level += RISK_RSI_COLD_POINTS
         
         # 外資動向與評分背離
-        if (foreign_net < -5000 and score > 6) or (foreign_net > 5000 and score < 4):
-            risk_level += 15
-            evidence.append("⚔️ 籌碼與評分背離，訊號矛盾")
+        if _risk_divergence(foreign_net, score):
+            risk_level += RISK_DIVERGENCE_POINTS
         
         # 決定風險結論
-        if risk_level >= 50:
+        if risk_level >= RISK_HIGH_LEVEL:
             conclusion = Direction.BEARISH  # 高風險=偏空（謹慎）
-            confidence = min(90, 50 + risk_level // 2)
-        elif risk_level >= 25:
+            confidence = min(RISK_MAX_CONFIDENCE, RISK_BASE_CONFIDENCE + risk_level // 2)
+        elif risk_level >= RISK_MEDIUM_LEVEL:
             conclusion = Direction.NEUTRAL
-            confidence = 50
+            confidence = RISK_MEDIUM_CONFIDENCE
         else:
             conclusion = Direction.BULLISH  # 低風險=可操作
-            confidence = min(80, 70 - risk_level)
+            confidence = min(RISK_LOW_MAX_CONFIDENCE, RISK_LOW_CONFIDENCE - risk_level)
         
         return RoleOutput(
             role_name=self.ROLE_NAME,
             role_conclusion=conclusion,
             confidence=confidence,
-            key_evidence=evidence,
+            key_evidence=self.evidence(volatility, current_drawdown, rsi, score, foreign_net),
             raw_data={
                 "risk_level": risk_level,
                 "volatility": volatility,
                 "current_drawdown": current_drawdown
             }
         )
+    
+    def evidence(self, volatility: float = 0.0, current_drawdown: float = 0.0, rsi: float = 50.0,
+                 score: float = 5.0, foreign_net: int = 0) -> List[str]:
+        """證據文字（與 analyze 的判斷條件相同）"""
+        evidence = []
+        (high_volatility, _), (medium_volatility, _) = RISK_VOLATILITY_LEVELS
+        if volatility > high_volatility:
+            evidence.append(f"⚡ 高波動風險 (日波動 >{high_volatility}%)")
+        elif volatility > medium_volatility:
+            evidence.append("📊 中等波動")
+        else:
+            evidence.append("🧘 低波動穩定")
+        
+        (deep_drawdown, _), (drawdown, _) = RISK_DRAWDOWN_LEVELS
+        if current_drawdown > deep_drawdown:
+            evidence.append(f"📉 深度回檔 ({abs(current_drawdown):.1f}%)")
+        elif current_drawdown > drawdown:
+            evidence.append(f"⚠️ 明顯回檔 ({abs(current_drawdown):.1f}%)")
+        
+        if rsi > RISK_RSI_HOT:
+            evidence.append("🔥 RSI 過熱，追高風險大")
+        elif rsi < RISK_RSI_COLD:
+            evidence.append("❄️ RSI 超賣，可能反彈但勿重壓")
+        
+        if _risk_divergence(foreign_net, score):
+            evidence.append("⚔️ 籌碼與評分背離，訊號矛盾")
+        return evidence
 
 
 
@@ -424,16 +558,16 @@ class ConflictResolver:
         # 4. 加權計算最終方向
         weighted_score = 0.0
         for r in role_outputs:
-            weight = weights.get(r.role_name, 0.33)
+            weight = weights.get(r.role_name, DEFAULT_ROLE_WEIGHT)
             if r.role_conclusion == Direction.BULLISH:
                 weighted_score += weight * (r.confidence / 100)
             elif r.role_conclusion == Direction.BEARISH:
                 weighted_score -= weight * (r.confidence / 100)
         
         # 5. 決定最終方向
-        if weighted_score >= 0.15:
+        if weighted_score >= FINAL_DIRECTION_SCORE:
             final_direction = Direction.BULLISH
-        elif weighted_score <= -0.15:
+        elif weighted_score <= -FINAL_DIRECTION_SCORE:
             final_direction = Direction.BEARISH
         else:
             final_direction = Direction.NEUTRAL
@@ -441,6 +575,26 @@ class ConflictResolver:
         final_confidence = int(min(100, abs(weighted_score) * 100))
         
         # 6. 產生衝突摘要
+        conflict_summary, integration_reason = self.explain(directions, has_conflict)
+        
+        return ConflictReport(
+            has_conflict=has_conflict,
+            conflict_intensity=conflict_intensity,
+            conflict_roles=conflict_roles,
+            conflict_summary=conflict_summary,
+            integration_reason=integration_reason,
+            final_direction=final_direction,
+            final_confidence=final_confidence
+        )
+    
+    @staticmethod
+    def explain(directions: dict, has_conflict: bool) -> Tuple[str, str]:
+        """
+        衝突摘要與整合理由
+        
+        Returns:
+            (conflict_summary, integration_reason)
+        """
         if has_conflict:
             dir_map = {"bullish": "偏多", "bearish": "偏空", "neutral": "中性"}
             dir_strs = [f"{n}({dir_map[d.value]})" for n, d in directions.items()]
@@ -466,16 +620,7 @@ class ConflictResolver:
         else:
             conflict_summary = "各角色判斷一致"
             integration_reason = "無衝突，採共識方向。"
-        
-        return ConflictReport(
-            has_conflict=has_conflict,
-            conflict_intensity=conflict_intensity,
-            conflict_roles=conflict_roles,
-            conflict_summary=conflict_summary,
-            integration_reason=integration_reason,
-            final_direction=final_direction,
-            final_confidence=final_confidence
-        )
+        return conflict_summary, integration_reason
 
 
 # ============================================================
@@ -627,12 +772,14 @@ class MultiRoleAnalyzer:
         # 2. 衝突偵測與整合
         conflict_report = self.conflict_resolver.resolve(all_roles, market_state)
         
-        # 3. 雙層語言摘要
+        # 3. 雙層語言摘要 + 4. 組裝 v13 Spec 輸出
+        return self.assemble(all_roles, conflict_report)
+    
+    def assemble(self, all_roles: List[RoleOutput], conflict_report: ConflictReport) -> dict:
+        """產生雙層語言摘要並組裝 v13 Spec 輸出"""
         summary_human, summary_professional = self.summary_generator.generate(
             conflict_report, all_roles
         )
-        
-        # 4. 組裝 v13 Spec 輸出
         return {
             "final_direction": conflict_report.final_direction.value,
             "confidence": conflict_report.final_confidence,
@@ -644,3 +791,236 @@ class MultiRoleAnalyzer:
             "conflict_resolution": conflict_report.to_dict()
         }
 
+
+    def analyze_batch(self, market_state: str = "normal", **columns) -> 'RoleBatchResult':
+        """
+        一次分析整個觀察清單（參數與 analyze 相同，但每個欄位是一整排數值）
+
+        方向、信心度與衝突加權分數以陣列運算完成；render() 直接以這些陣列
+        組出輸出，證據文字與雙層摘要只針對要顯示的列產生。
+
+        Example:
+            batch = analyzer.analyze_batch(foreign_net_volume=[...], positive_days=[...], close=[...])
+            batch.final_direction          # 每檔的最終方向
+            batch.render([0, 3])           # 只產生第 0、3 檔的完整輸出
+        """
+        inputs = _batch_inputs(self.analyze, columns)
+        roles = {
+            ChipAnalyzer.ROLE_NAME: _chip_batch(inputs),
+            TechAnalyzer.ROLE_NAME: _tech_batch(inputs),
+            ContextAnalyzer.ROLE_NAME: _context_batch(inputs),
+            RiskAnalyzer.ROLE_NAME: _risk_batch(inputs),
+        }
+        return RoleBatchResult(self, inputs, roles, market_state)
+
+
+# ============================================================
+# 7. 批次分析 (陣列版，與逐檔 analyze 結果相同)
+# ============================================================
+
+_DIRECTION_CODES = {1: Direction.BULLISH, -1: Direction.BEARISH, 0: Direction.NEUTRAL}
+
+# 各角色 raw_data 的欄位 <- analyze 參數（順序與逐檔 analyze 相同；中間分數由批次函式提供）
+_RAW_FIELDS = {
+    ChipAnalyzer.ROLE_NAME: {'foreign_net': 'foreign_net_volume', 'positive_days': 'positive_days',
+                             'trust_net': 'trust_net_volume', 'dealer_net': 'dealer_net_volume'},
+    TechAnalyzer.ROLE_NAME: {name: name for name in ('close', 'ma60', 'ma20', 'rsi', 'macd_diff', 'price_change_5d',
+                                                     'tech_score')},
+    ContextAnalyzer.ROLE_NAME: {name: name for name in ('has_positive_news', 'has_negative_news', 'sector_trend',
+                                                        'market_sentiment', 'has_catalyst', 'context_score')},
+    RiskAnalyzer.ROLE_NAME: {'risk_level': 'risk_level', 'volatility': 'volatility',
+                             'current_drawdown': 'current_drawdown'},
+}
+
+# 各角色 evidence() 的 (MultiRoleAnalyzer 屬性, 依序傳入的 analyze 參數)
+_EVIDENCE_ARGS = {
+    ChipAnalyzer.ROLE_NAME: ('chip_analyzer', ('foreign_net_volume', 'positive_days', 'trust_net_volume',
+                                               'dealer_net_volume')),
+    TechAnalyzer.ROLE_NAME: ('tech_analyzer', ('close', 'ma60', 'ma20', 'rsi', 'macd_diff', 'price_change_5d')),
+    ContextAnalyzer.ROLE_NAME: ('context_analyzer', ('has_positive_news', 'has_negative_news', 'sector_trend',
+                                                     'market_sentiment', 'has_catalyst')),
+    RiskAnalyzer.ROLE_NAME: ('risk_analyzer', ('volatility', 'current_drawdown', 'rsi', 'score',
+                                               'foreign_net_volume')),
+}
+
+
+def _batch_inputs(analyze, columns: dict) -> dict:
+    """依 analyze 的參數預設值補齊欄位，並廣播成相同長度的陣列"""
+    params = inspect.signature(analyze).parameters
+    unknown = set(columns) - set(params)
+    if unknown:
+        raise TypeError(f"analyze_batch() 不支援的欄位: {', '.join(sorted(unknown))}")
+    missing = [name for name in ('foreign_net_volume', 'positive_days') if name not in columns]
+    if missing:
+        raise TypeError(f"analyze_batch() 缺少必要欄位: {', '.join(missing)}")
+
+    values = {name: np.asarray(col) for name, col in columns.items()}
+    size = np.broadcast_shapes(*(v.shape for v in values.values()), (1,))[0]
+    for name, param in params.items():
+        if name == 'market_state':
+            continue
+        if name not in values:
+            values[name] = np.asarray(param.default)
+        values[name] = np.broadcast_to(values[name], (size,))
+    return values
+
+
+def _chip_batch(x: dict) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """ChipAnalyzer.analyze 的陣列版：回傳 (方向 1/-1/0, 信心度, raw_data 中的中間分數)"""
+    foreign, days = x['foreign_net_volume'], x['positive_days']
+    trust, dealer = x['trust_net_volume'], x['dealer_net_volume']
+
+    bull = (foreign > CHIP_FLOW_VOLUME) & (days >= CHIP_BUY_DAYS)
+    bear = ~bull & (foreign < -CHIP_FLOW_VOLUME) & (days <= CHIP_SELL_DAYS)
+    direction = np.select([bull, bear], [1, -1], 0)
+    confidence = np.where(bull | bear, CHIP_CONFIDENCE, CHIP_NEUTRAL_CONFIDENCE)
+
+    total = foreign + trust + dealer
+    aligned = ((total > 0) & (foreign > 0) & (trust > 0)) | ((total < 0) & (foreign < 0) & (trust < 0))
+    opposed = ~aligned & (total < 0) & (foreign > 0)
+    confidence = np.where(aligned, np.minimum(100, confidence + CHIP_ALIGNED_BONUS), confidence)
+    confidence = np.where(opposed, np.maximum(0, confidence - CHIP_OPPOSED_PENALTY), confidence)
+    return direction, confidence, {}
+
+
+def _tech_batch(x: dict) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """TechAnalyzer.analyze 的陣列版"""
+    close, rsi, change = x['close'], x['rsi'], x['price_change_5d']
+    score = (np.where(close > x['ma60'], TECH_MA60_POINTS, -TECH_MA60_POINTS)
+             + np.where(close > x['ma20'], TECH_MA20_POINTS, -TECH_MA20_POINTS)
+             + np.where(x['macd_diff'] > 0, TECH_MACD_POINTS, -TECH_MACD_POINTS)
+             + np.select([rsi > TECH_RSI_OVERBOUGHT, rsi < TECH_RSI_OVERSOLD], [-TECH_RSI_POINTS, TECH_RSI_POINTS], 0.0)
+             + np.select([change < -TECH_MOVE_PCT, change > TECH_MOVE_PCT], [TECH_DROP_POINTS, TECH_RALLY_POINTS], 0.0))
+
+    direction = np.select([score >= TECH_DIRECTION_SCORE, score <= -TECH_DIRECTION_SCORE], [1, -1], 0)
+    confidence = np.where(direction != 0,
+                          np.minimum(TECH_MAX_CONFIDENCE, TECH_BASE_CONFIDENCE + np.trunc(np.abs(score) * 10).astype(int)),
+                          TECH_NEUTRAL_CONFIDENCE)
+    return direction, confidence, {'tech_score': score}
+
+
+def _points(values: np.ndarray, table: dict) -> np.ndarray:
+    """依 {類別: 分數} 表取得每列的分數（未列出的類別為 0）"""
+    return np.select([values == key for key in table], list(table.values()), 0.0)
+
+
+def _context_batch(x: dict) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """ContextAnalyzer.analyze 的陣列版"""
+    positive, negative = x['has_positive_news'].astype(bool), x['has_negative_news'].astype(bool)
+    score = (np.select([positive, negative], [CONTEXT_NEWS_POINTS, -CONTEXT_NEWS_POINTS], 0.0)
+             + _points(x['sector_trend'], CONTEXT_SECTOR_POINTS)
+             + _points(x['market_sentiment'], CONTEXT_SENTIMENT_POINTS)
+             + np.where(x['has_catalyst'].astype(bool), CONTEXT_CATALYST_POINTS, 0.0))
+
+    direction = np.select([score >= CONTEXT_DIRECTION_SCORE, score <= -CONTEXT_DIRECTION_SCORE], [1, -1], 0)
+    return direction, np.where(direction != 0, CONTEXT_CONFIDENCE, CONTEXT_NEUTRAL_CONFIDENCE), {'context_score': score}
+
+
+def _levels(values: np.ndarray, levels) -> np.ndarray:
+    """_level_points 的陣列版"""
+    return np.select([values > threshold for threshold, _ in levels], [points for _, points in levels], 0)
+
+
+def _risk_batch(x: dict) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """RiskAnalyzer.analyze 的陣列版（由 MultiRoleAnalyzer 呼叫時 rsi / foreign_net 與其他角色共用）"""
+    rsi = x['rsi']
+    risk_level = (_levels(x['volatility'], RISK_VOLATILITY_LEVELS)
+                  + _levels(x['current_drawdown'], RISK_DRAWDOWN_LEVELS)
+                  + np.select([rsi > RISK_RSI_HOT, rsi < RISK_RSI_COLD], [RISK_RSI_HOT_POINTS, RISK_RSI_COLD_POINTS], 0)
+                  + np.where(_risk_divergence(x['foreign_net_volume'], x['score']), RISK_DIVERGENCE_POINTS, 0))
+
+    high, medium = risk_level >= RISK_HIGH_LEVEL, risk_level >= RISK_MEDIUM_LEVEL
+    direction = np.select([high, medium], [-1, 0], 1)
+    confidence = np.select([high, medium],
+                           [np.minimum(RISK_MAX_CONFIDENCE, RISK_BASE_CONFIDENCE + risk_level // 2), RISK_MEDIUM_CONFIDENCE],
+                           np.minimum(RISK_LOW_MAX_CONFIDENCE, RISK_LOW_CONFIDENCE - risk_level))
+    return direction, confidence, {'risk_level': risk_level}
+
+
+class RoleBatchResult:
+    """
+    analyze_batch 的結果
+
+    每個屬性都是長度 N 的陣列；direction 以 1 / -1 / 0 表示偏多 / 偏空 / 中性。
+    """
+
+    def __init__(self, analyzer: MultiRoleAnalyzer, inputs: dict, roles: dict, market_state: str):
+        self.analyzer = analyzer
+        self.inputs = inputs
+        self.market_state = market_state
+        self.role_directions = {name: d for name, (d, _, _) in roles.items()}
+        self.role_confidences = {name: c for name, (_, c, _) in roles.items()}
+        self.role_scores = {name: scores for name, (_, _, scores) in roles.items()}
+
+        # ConflictResolver.resolve 的陣列版（依角色順序累加，與逐檔結果逐位元相同）
+        weights = get_role_weights(market_state)
+        directions = np.stack(list(self.role_directions.values()))
+        confidences = np.stack(list(self.role_confidences.values()))
+
+        active = directions != 0
+        self.has_conflict = (directions == 1).any(axis=0) & (directions == -1).any(axis=0)
+        mean_confidence = (confidences * active).sum(axis=0) / np.maximum(active.sum(axis=0), 1) / 100
+        # Python round 與 np.round 在 .xx5 附近的進位不同，這裡沿用 round 以保持一致
+        self.conflict_intensity = np.array(
+            [round(float(v), 2) if c else 0.0 for v, c in zip(mean_confidence, self.has_conflict)])
+
+        weighted = np.zeros(directions.shape[1])
+        for name, direction, confidence in zip(self.role_directions, directions, confidences):
+            weighted = weighted + direction * (weights.get(name, DEFAULT_ROLE_WEIGHT) * (confidence / 100))
+        self.weighted_score = weighted
+        self.final_direction = np.select([weighted >= FINAL_DIRECTION_SCORE, weighted <= -FINAL_DIRECTION_SCORE], [1, -1], 0)
+        self.final_confidence = np.minimum(100, np.abs(weighted) * 100).astype(int)
+
+    def __len__(self) -> int:
+        return len(self.final_direction)
+
+    def direction_labels(self) -> List[str]:
+        """每檔的最終方向（"bullish" / "bearish" / "neutral"）"""
+        return [_DIRECTION_CODES[int(d)].value for d in self.final_direction]
+
+    def row_inputs(self, row: int) -> dict:
+        return {name: values[row].item() for name, values in self.inputs.items()}
+
+    def render(self, rows: Optional[Iterable[int]] = None) -> List[dict]:
+        """
+        產生指定列的完整輸出（與 analyze 相同的結構，含證據文字與雙層摘要）
+
+        方向、信心度與衝突結果直接取自陣列，不再逐檔重跑 analyze；
+        只有證據文字與摘要需要逐列產生。
+
+        Args:
+            rows: 要顯示的列，預設全部
+        """
+        rows = range(len(self)) if rows is None else rows
+        return [self._render_row(i) for i in rows]
+
+    def _render_row(self, row: int) -> dict:
+        x = self.row_inputs(row)
+        roles = []
+        for name, directions in self.role_directions.items():
+            values = {**x, **{key: scores[row].item() for key, scores in self.role_scores[name].items()}}
+            roles.append(RoleOutput(
+                role_name=name,
+                role_conclusion=_DIRECTION_CODES[int(directions[row])],
+                confidence=int(self.role_confidences[name][row]),
+                key_evidence=self._evidence(name, x),
+                raw_data={key: values[source] for key, source in _RAW_FIELDS[name].items()},
+            ))
+
+        has_conflict = bool(self.has_conflict[row])
+        directions = {r.role_name: r.role_conclusion for r in roles}
+        conflict_summary, integration_reason = ConflictResolver.explain(directions, has_conflict)
+        report = ConflictReport(
+            has_conflict=has_conflict,
+            conflict_intensity=float(self.conflict_intensity[row]),
+            conflict_roles=[n for n, d in directions.items() if d != Direction.NEUTRAL] if has_conflict else [],
+            conflict_summary=conflict_summary,
+            integration_reason=integration_reason,
+            final_direction=_DIRECTION_CODES[int(self.final_direction[row])],
+            final_confidence=int(self.final_confidence[row]),
+        )
+        return self.analyzer.assemble(roles, report)
+
+    def _evidence(self, name: str, x: dict) -> List[str]:
+        attr, args = _EVIDENCE_ARGS[name]
+        return getattr(self.analyzer, attr).evidence(*(x[arg] for arg in args))
@@ -0,0 +1,133 @@
+"""
+喵姆評分規則表 (Scoring Rules)
+
+評分 = 基準分 + 每條規則的加減分，再限制在 1 ~ 10 分；建議依分數門檻決定。
+規則以資料表示，對整張特徵表（modules/feature_store）一次以陣列運算評分：
+- 線性規則：特徵 / scale，限制在 ±limit（法人買賣超）
+- 區間規則：依序比對 bands，第一個成立的給分，都不成立給 otherwise
+  （特徵缺值時所有比較都不成立）
+
+ProAnalyzer.analyze_stock 與 rescore.py 使用同一張規則表；
+規則可存成 JSON，修改後對已存的特徵表重新評分即可比較結果。
+"""
+import json
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+BASE_SCORE = 5.0
+SCORE_RANGE = (1.0, 10.0)
+
+_OPS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal, '==': np.equal}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    一條評分規則
+
+    key: 規則代號（rescore.py --set 使用）
+    feature: 特徵表欄位；relative_to 有值時以 feature - relative_to 比較
+    bands: ((運算子, 門檻, 分數), ...)，依序比對
+    """
+    key: str
+    label: str
+    feature: str
+    scale: Optional[float] = None
+    limit: float = 0.0
+    bands: Tuple[Tuple[str, float, float], ...] = ()
+    otherwise: float = 0.0
+    relative_to: Optional[str] = None
+
+    def points(self, features: pd.DataFrame) -> np.ndarray:
+        """整張特徵表的加減分"""
+        values = _column(features, self.feature)
+        if self.relative_to:
+            values = values - _column(features, self.relative_to)
+        if self.scale:
+            points = np.clip(values / self.scale, -self.limit, self.limit)
+            return np.where(np.isnan(values), self.otherwise, points)
+        with np.errstate(invalid='ignore'):
+            conditions = [_OPS[op](values, threshold) for op, threshold, _ in self.bands]
+        return np.select(conditions, [points for _, _, points in self.bands], self.otherwise)
+
+
+# 順序即計分順序（與原本 analyze_stock 的 if 串相同）
+SCORING_RULES: Tuple[Rule, ...] = (
+    Rule('trust_net', '投信買賣超', 'trust_net', scale=500, limit=3.0),
+    Rule('foreign_net', '外資買賣超', 'foreign_net', scale=1000, limit=2.5),
+    Rule('revenue', '營收年增', 'revenue_yoy', bands=(('>', 20, 2.0), ('<', -20, -2.0))),
+    Rule('pe', '本益比', 'pe', bands=(('<=', 0, 0.0), ('>', 40, -1.5), ('>', 30, -0.5), ('<', 12, 1.0))),
+    Rule('stoch_k', 'KD 超賣', 'stoch_k', bands=(('<', 20, 1.0),)),
+    # 季線尚未算出時視為等於收盤價（不算站上）
+    Rule('sma_60', '季線', 'close', relative_to='sma_60', bands=(('>', 0, 1.5),), otherwise=-1.5),
+    Rule('rsi', 'RSI', 'rsi_14', bands=(('>', 80, -0.5), ('<', 20, 1.0))),
+)
+
+# (運算子, 門檻, 建議, 樣式)：依序比對，都不成立為觀望
+RECOMMENDATIONS: Tuple[Tuple[str, float, str, str], ...] = (
+    ('>=', 8.0, "🚀 強力買進", "action-buy"),
+    ('>=', 6.5, "🔥 偏多操作", "action-bullish"),
+    ('<=', 3.5, "⚠️ 建議賣出", "action-sell"),
+)
+DEFAULT_RECOMMENDATION = ("⏸️ 觀望持有", "action-hold")
+
+
+def _column(features: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in features.columns:
+        return np.full(len(features), np.nan)
+    return pd.to_numeric(features[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def score_frame(features: pd.DataFrame, rules: Sequence[Rule] = SCORING_RULES,
+                base: float = BASE_SCORE, score_range: Tuple[float, float] = SCORE_RANGE) -> np.ndarray:
+    """對特徵表每一列評分"""
+    score = np.full(len(features), base)
+    for rule in rules:
+        score = score + rule.points(features)
+    return np.clip(score, *score_range)
+
+
+def score_features(features: Dict[str, object], rules: Sequence[Rule] = SCORING_RULES) -> float:
+    """單檔評分（analyze_stock 使用）"""
+    return float(score_frame(pd.DataFrame([features]), rules)[0])
+
+
+def recommend(scores: np.ndarray, cutoffs=RECOMMENDATIONS) -> Tuple[np.ndarray, np.ndarray]:
+    """分數 -> (建議, 樣式) 陣列"""
+    scores = np.asarray(scores, dtype=float)
+    conditions = [_OPS[op](scores, threshold) for op, threshold, _, _ in cutoffs]
+    labels = np.select(conditions, [label for _, _, label, _ in cutoffs], DEFAULT_RECOMMENDATION[0])
+    classes = np.select(conditions, [css for _, _, _, css in cutoffs], DEFAULT_RECOMMENDATION[1])
+    return labels, classes
+
+
+def recommendation(score: float, cutoffs=RECOMMENDATIONS) -> Tuple[str, str]:
+    labels, classes = recommend([score], cutoffs)
+    return str(labels[0]), str(classes[0])
+
+
+def rules_to_json(rules: Sequence[Rule]) -> List[dict]:
+    return [asdict(rule) for rule in rules]
+
+
+def rules_from_json(data: Iterable[dict]) -> Tuple[Rule, ...]:
+    return tuple(Rule(**{**item, 'bands': tuple(tuple(band) for band in item.get('bands', ()))}) for item in data)
+
+
+def load_rules(path: Path) -> Tuple[Rule, ...]:
+    with open(path, "r", encoding="utf-8") as f:
+        return rules_from_json(json.load(f))
+
+
+def override(rules: Sequence[Rule], key: str, field: str, value) -> Tuple[Rule, ...]:
+    """修改某條規則的一個欄位，例如 override(rules, 'trust_net', 'scale', 400)"""
+    if key not in {rule.key for rule in rules}:
+        raise KeyError(f"找不到規則: {key}")
+    if field == 'bands':
+        value = tuple(tuple(band) for band in value)
+    return tuple(replace(rule, **{field: value}) if rule.key == key else rule for rule in rules)
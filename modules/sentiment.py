@@ -0,0 +1,156 @@
+"""
+新聞情緒分析 (Headline Sentiment)
+
+- 每個進程只建立一個 VADER SentimentIntensityAnalyzer（載入詞典只做一次）
+- 以文章 id / 網址為鍵的本地快取：昨天評過的標題不再重算，只評新標題
+- run_analysis 抓完整份觀察清單後以 score_watchlist 一次評完所有新標題（計算進程不必各自載入 VADER）
+
+相容 yfinance 新舊兩種新聞格式：
+舊版 {'uuid', 'title', 'link'}，新版 {'id', 'content': {'title', 'canonicalUrl': {'url'}}}
+"""
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .storage import DATA_DIR, atomic_write_json, read_json
+
+
+SENTIMENT_DIR = DATA_DIR / "sentiment"
+
+# 每檔保留的快取筆數（新聞會持續更新，舊的不必留）
+MAX_CACHED_ARTICLES = 200
+
+# 平均分數超過此值視為正面 / 負面
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_analyzers = {}
+_lock = threading.Lock()
+
+
+def get_analyzer():
+    """取得目前進程共用的 SentimentIntensityAnalyzer"""
+    pid = os.getpid()
+    sia = _analyzers.get(pid)
+    if sia is None:
+        with _lock:
+            sia = _analyzers.get(pid)
+            if sia is None:
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                sia = SentimentIntensityAnalyzer()
+                _analyzers[pid] = sia
+    return sia
+
+
+def article_title(article: dict) -> Optional[str]:
+    content = article.get('content') or {}
+    return content.get('title') or article.get('title')
+
+
+def article_key(article: dict) -> Optional[str]:
+    """文章唯一鍵：id > 網址 > 標題"""
+    content = article.get('content') or {}
+    url = (content.get('canonicalUrl') or {}).get('url') or article.get('link')
+    return article.get('id') or article.get('uuid') or url or article_title(article)
+
+
+class SentimentCache:
+    """
+    每檔股票一個 JSON：{文章鍵: {'title': ..., 'compound': ...}}
+
+    每檔只由一個進程分析，不會有並行寫入同一個檔案的問題
+    """
+
+    def __init__(self, root: Path = SENTIMENT_DIR):
+        self.root = Path(root)
+
+    def _path(self, stock_id: str) -> Path:
+        key = re.sub(r'[^A-Za-z0-9_\-]', '_', str(stock_id))
+        return self.root / f"{key}.json"
+
+    def load(self, stock_id: str) -> Dict[str, dict]:
+        return read_json(self._path(stock_id), default={}) or {}
+
+    def save(self, stock_id: str, entries: Dict[str, dict]) -> None:
+        if len(entries) > MAX_CACHED_ARTICLES:
+            entries = dict(list(entries.items())[-MAX_CACHED_ARTICLES:])
+        atomic_write_json(entries, self._path(stock_id))
+
+
+SENTIMENT_CACHE = SentimentCache()
+
+
+def score_articles(stock_id: str, articles: List[dict], cache: SentimentCache = None) -> List[float]:
+    """
+    回傳每篇文章的 compound 分數（順序與輸入相同，無標題的文章略過）
+
+    只有快取中沒有的文章才交給 VADER 評分
+    """
+    cache = cache or SENTIMENT_CACHE
+    entries = cache.load(stock_id)
+    scores, dirty = [], False
+    for article in articles or []:
+        title = article_title(article)
+        key = article_key(article)
+        if not title or not key:
+            continue
+        entry = entries.get(key)
+        if entry is None:
+            entry = {'title': title, 'compound': get_analyzer().polarity_scores(title)['compound']}
+            entries[key] = entry
+            dirty = True
+        scores.append(entry['compound'])
+    if dirty:
+        cache.save(stock_id, entries)
+    return scores
+
+
+def average_sentiment(stock_id: str, articles: List[dict], cache: SentimentCache = None) -> float:
+    """平均情緒分數；沒有可評分的標題時回傳 0"""
+    scores = score_articles(stock_id, articles, cache)
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def score_watchlist(news_by_stock: Dict[str, List[dict]], cache: SentimentCache = None) -> Dict[str, float]:
+    """
+    整份觀察清單批次評分
+
+    先從各檔快取挑出所有沒評過的標題，以同一個 VADER 一次評完，
+    再只寫回有新標題的快取。
+
+    Args:
+        news_by_stock: {股票代號: 新聞列表}
+
+    Returns:
+        dict: {股票代號: 平均情緒分數}（沒有可評分的標題為 0）
+    """
+    cache = cache or SENTIMENT_CACHE
+    entries = {stock_id: cache.load(stock_id) for stock_id in news_by_stock}
+    keyed = {stock_id: [(article_key(a), article_title(a)) for a in articles or []]
+             for stock_id, articles in news_by_stock.items()}
+    keyed = {stock_id: [(key, title) for key, title in pairs if key and title] for stock_id, pairs in keyed.items()}
+
+    pending = [(stock_id, key, title) for stock_id, pairs in keyed.items()
+               for key, title in pairs if key not in entries[stock_id]]
+    if pending:
+        sia = get_analyzer()
+        for stock_id, key, title in pending:
+            entries[stock_id][key] = {'title': title, 'compound': sia.polarity_scores(title)['compound']}
+        for stock_id in {stock_id for stock_id, _, _ in pending}:
+            cache.save(stock_id, entries[stock_id])
+
+    result = {}
+    for stock_id, pairs in keyed.items():
+        scores = [entries[stock_id][key]['compound'] for key, _ in pairs]
+        result[stock_id] = sum(scores) / len(scores) if scores else 0.0
+    return result
+
+
+def sentiment_label(score: float) -> str:
+    if score > POSITIVE_THRESHOLD:
+        return "😊正面情緒"
+    if score < NEGATIVE_THRESHOLD:
+        return "😔負面情緒"
+    return ""
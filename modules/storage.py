@@ -0,0 +1,82 @@
+"""
+本地資料儲存共用工具
+
+所有本地快取 / 資料倉共用同一個 data/ 根目錄與原子寫入邏輯：
+- 先寫 .tmp 再 replace，避免進程中斷留下半套檔案
+- 讀取失敗一律回傳空值，由呼叫端決定是否重新下載
+"""
+import os
+import json
+import pickle
+from pathlib import Path
+
+import pandas as pd
+
+
+# 專案根目錄
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+
+
+def _tmp_path(path: Path) -> Path:
+    """每個進程使用獨立的暫存檔名，避免並行寫入互相覆蓋"""
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def atomic_write_csv(df: pd.DataFrame, path: Path) -> None:
+    """原子寫入 CSV"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    df.to_csv(tmp_path, index=False)
+    tmp_path.replace(path)
+
+
+def read_csv(path: Path, dtype=None) -> pd.DataFrame:
+    """讀取 CSV，不存在或損毀時回傳空 DataFrame"""
+    if not path.exists():
+        return pd.DataFrame()
+    try:
+        return pd.read_csv(path, dtype=dtype)
+    except Exception as e:
+        print(f"⚠️ 本地資料讀取失敗 ({path.name}): {e}")
+        return pd.DataFrame()
+
+
+def atomic_write_json(obj, path: Path) -> None:
+    """原子寫入 JSON"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+def read_json(path: Path, default=None):
+    """讀取 JSON，不存在或損毀時回傳 default"""
+    if not path.exists():
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def atomic_write_pickle(obj, path: Path) -> None:
+    """原子寫入 pickle（只用於本機自己產生的中間結果）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(path)
+
+
+def read_pickle(path: Path, default=None):
+    """讀取 pickle，不存在或損毀時回傳 default"""
+    if not path.exists():
+        return default
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return default
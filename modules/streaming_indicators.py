@@ -0,0 +1,245 @@
+"""
+串流技術指標 (Incremental Indicators)
+
+先用歷史日 K 暖機，之後每根新 K 棒或每筆即時成交都以 O(1) 更新：
+- SMA：固定視窗的累加和
+- MACD / RSI / KD：遞迴 EMA（與 pandas ewm(adjust=False) 相同）
+- 布林通道：滑動視窗 Welford 變異數
+- KD 的 9 日最高 / 最低：單調佇列
+
+每個元件都有 push（收盤後確認一根 K 棒）與 preview（盤中：假設以目前價格收盤，
+不改變狀態）兩種更新；StreamingIndicators.tick 以 preview 計算盤中即時指標。
+"""
+import math
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from .indicators import FIB_RATIOS
+
+
+NAN = float('nan')
+
+
+class RollingMean:
+    """固定視窗平均（累加和）"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+
+    def _next_total(self, x: float) -> float:
+        if len(self.values) == self.window:
+            return self.total + x - self.values[0]
+        return self.total + x
+
+    def preview(self, x: float) -> float:
+        if len(self.values) + 1 < self.window:
+            return NAN
+        return self._next_total(x) / self.window
+
+    def push(self, x: float) -> float:
+        value = self.preview(x)
+        self.total = self._next_total(x)
+        self.values.append(x)
+        if len(self.values) > self.window:
+            self.values.popleft()
+        return value
+
+
+class RollingStd:
+    """固定視窗樣本標準差（滑動 Welford，ddof=1 與 pandas 相同）"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _next_state(self, x: float):
+        n = len(self.values)
+        if n < self.window:
+            mean = self.mean + (x - self.mean) / (n + 1)
+            return mean, self.m2 + (x - self.mean) * (x - mean)
+        old = self.values[0]
+        mean = self.mean + (x - old) / self.window
+        return mean, self.m2 + (x - old) * (x - mean + old - self.mean)
+
+    def preview(self, x: float) -> float:
+        if len(self.values) + 1 < self.window:
+            return NAN
+        _, m2 = self._next_state(x)
+        return math.sqrt(max(m2, 0.0) / (self.window - 1))
+
+    def push(self, x: float) -> float:
+        value = self.preview(x)
+        self.mean, self.m2 = self._next_state(x)
+        self.values.append(x)
+        if len(self.values) > self.window:
+            self.values.popleft()
+        return value
+
+
+class EMA:
+    """遞迴指數平均，等同 pandas ewm(alpha=..., adjust=False)"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    @classmethod
+    def from_span(cls, span: int) -> 'EMA':
+        return cls(2.0 / (span + 1))
+
+    @classmethod
+    def from_com(cls, com: float) -> 'EMA':
+        return cls(1.0 / (1 + com))
+
+    def preview(self, x: float) -> float:
+        if self.value is None:
+            return x
+        if math.isnan(x):
+            return self.value
+        return (1 - self.alpha) * self.value + self.alpha * x
+
+    def push(self, x: float) -> float:
+        if self.value is None and math.isnan(x):
+            return NAN  # 前段缺值不啟動
+        self.value = self.preview(x)
+        return self.value
+
+
+class RollingExtreme:
+    """固定視窗最大 / 最小值（單調佇列，攤銷 O(1)）"""
+
+    def __init__(self, window: int, mode: str = 'max'):
+        self.window = window
+        self.better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self.queue = deque()   # (序號, 值)，值單調
+        self.count = 0
+
+    def _front(self):
+        """下一根 K 棒進來後仍在視窗內的最佳值"""
+        # 每次最多只有佇列最前面一筆過期
+        for idx, value in islice(self.queue, 2):
+            if idx > self.count - self.window:
+                return value
+        return None
+
+    def preview(self, x: float) -> float:
+        if self.count + 1 < self.window:
+            return NAN
+        front = self._front()
+        return x if front is None or self.better(x, front) else front
+
+    def push(self, x: float) -> float:
+        value = self.preview(x)
+        while self.queue and self.better(x, self.queue[-1][1]):
+            self.queue.pop()
+        self.queue.append((self.count, x))
+        self.count += 1
+        while self.queue[0][0] <= self.count - 1 - self.window:
+            self.queue.popleft()
+        return value
+
+
+class StreamingIndicators:
+    """
+    與 ProAnalyzer.calculate_indicators 相同的指標，以串流方式更新
+
+    用法：
+        live = StreamingIndicators.from_history(df)
+        live.tick(price)           # 盤中即時（不改變狀態）
+        live.push_bar(close, high, low)  # 收盤確認
+    """
+
+    def __init__(self, custom_indicators: Iterable[str] = None):
+        self.sma60 = RollingMean(60)
+        self.sma_custom = RollingMean(30) if custom_indicators and 'SMA_custom' in custom_indicators else None
+        self.sma20 = RollingMean(20)
+        self.std20 = RollingStd(20)
+        self.ema12 = EMA.from_span(12)
+        self.ema26 = EMA.from_span(26)
+        self.signal = EMA.from_span(9)
+        self.low9 = RollingExtreme(9, 'min')
+        self.high9 = RollingExtreme(9, 'max')
+        self.stoch_k = EMA(1 / 3)
+        self.avg_gain = EMA.from_com(13)
+        self.avg_loss = EMA.from_com(13)
+        self.prev_close: Optional[float] = None
+        self.price_max = -math.inf
+        self.price_min = math.inf
+        self.last: Dict[str, float] = {}
+        # 盤中尚未收盤的 K 棒高低點
+        self.session_high: Optional[float] = None
+        self.session_low: Optional[float] = None
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, custom_indicators: Iterable[str] = None) -> 'StreamingIndicators':
+        """以歷史日 K（FinMind 欄位 close / max / min）暖機"""
+        live = cls(custom_indicators)
+        if df is not None and not df.empty:
+            for close, high, low in df.sort_values('date')[['close', 'max', 'min']].itertuples(index=False):
+                live.push_bar(close, high, low)
+        return live
+
+    def _step(self, close: float, high: float, low: float, commit: bool) -> Dict[str, float]:
+        op = 'push' if commit else 'preview'
+
+        def run(component, x):
+            return getattr(component, op)(x)
+
+        values = {'SMA_60': run(self.sma60, close)}
+        if self.sma_custom is not None:
+            values['SMA_custom'] = run(self.sma_custom, close)
+
+        macd = run(self.ema12, close) - run(self.ema26, close)
+        values['MACD'] = macd
+        values['MACD_signal'] = run(self.signal, macd)
+
+        sma20, std20 = run(self.sma20, close), run(self.std20, close)
+        values.update({'SMA_20': sma20, 'STD_20': std20,
+                       'BB_upper': sma20 + 2 * std20, 'BB_lower': sma20 - 2 * std20})
+
+        low_min, high_max = run(self.low9, low), run(self.high9, high)
+        price_range = high_max - low_min
+        rsv = 100 * (close - low_min) / price_range if price_range else NAN
+        k = run(self.stoch_k, rsv)
+        values['Stoch_K'] = 50.0 if k is None or math.isnan(k) else k
+
+        delta = NAN if self.prev_close is None else close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain, avg_loss = run(self.avg_gain, gain), run(self.avg_loss, loss)
+        if avg_loss:
+            values['RSI_14'] = 100 - 100 / (1 + avg_gain / avg_loss)
+        else:
+            values['RSI_14'] = 100.0 if avg_gain else NAN
+
+        price_max, price_min = max(self.price_max, close), min(self.price_min, close)
+        diff = price_max - price_min
+        for name, ratio in FIB_RATIOS.items():
+            values[name] = price_max - ratio * diff
+
+        if commit:
+            self.prev_close = close
+            self.price_max, self.price_min = price_max, price_min
+            self.last = values
+        return values
+
+    def push_bar(self, close: float, high: float = None, low: float = None) -> Dict[str, float]:
+        """確認一根日 K，回傳該根的指標"""
+        high = close if high is None else high
+        low = close if low is None else low
+        self.session_high = self.session_low = None
+        return self._step(float(close), float(high), float(low), commit=True)
+
+    def tick(self, price: float) -> Dict[str, float]:
+        """盤中成交：以目前價格與今日高低點預覽指標，不改變已確認的狀態"""
+        price = float(price)
+        self.session_high = price if self.session_high is None else max(self.session_high, price)
+        self.session_low = price if self.session_low is None else min(self.session_low, price)
+        return self._step(price, self.session_high, self.session_low, commit=False)
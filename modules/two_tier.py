@@ -0,0 +1,209 @@
+"""
+兩層執行器 (Two-tier Executor)
+
+網路 I/O 與計算分開排程，取代「每個核心一個進程、進程裡再等網路」：
+- I/O 層：大量執行緒同時抓資料（FinMind / Yahoo / Perplexity 大多時間在等 socket）
+- 計算層：與核心數相同的進程池，只做指標、Monte Carlo、回測等運算
+- 兩層之間以有界佇列銜接：計算跟不上時抓取會暫停（背壓），
+  記憶體中等待計算的資料最多 queue_size 檔
+
+同時處理中的股票數由 io_workers 決定，2 核心的 CI 機器也能同時抓十幾檔。
+imap_unordered() 依完成順序逐檔產出結果，不必等最慢的一檔（通常卡在 AI 呼叫）。
+需要整批資料的步驟（全市場指標矩陣）以 fetch_all() 先等齊抓取層，再接續計算。
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import cpu_count
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+
+DEFAULT_IO_WORKERS = int(os.getenv("FETCH_CONCURRENCY", "16"))
+
+class TwoTierExecutor:
+    """
+    常駐的兩層執行器：執行緒池與進程池建立一次，可重複 run()（常駐服務使用）
+
+    with TwoTierExecutor(initializer=init_worker, initargs=(benchmarks,)) as executor:
+        results = executor.run(tasks, fetch, compute, finish)
+    """
+
+    def __init__(self, io_workers: int = DEFAULT_IO_WORKERS, cpu_workers: int = None,
+                 queue_size: int = None, initializer: Callable = None, initargs: tuple = ()):
+        self.cpu_workers = cpu_workers or cpu_count()
+        self.queue_size = queue_size or self.cpu_workers * 2
+        self.io = ThreadPoolExecutor(max_workers=io_workers)
+        self.post = ThreadPoolExecutor(max_workers=io_workers)
+        self.cpu = ProcessPoolExecutor(max_workers=self.cpu_workers, initializer=initializer, initargs=initargs)
+        self._warm = False
+
+    def warm_up(self) -> None:
+        """
+        先啟動所有計算進程
+
+        進程在第一次送出計算時才 fork；若那時抓取執行緒正在網路呼叫中，
+        子進程可能繼承到被鎖住的狀態而異常終止，因此在開始抓取前先啟動。
+        """
+        if not self._warm:
+            list(self.cpu.map(_noop, range(self.cpu_workers)))
+            self._warm = True
+
+    def run(self, tasks: Sequence[Any],
+            fetch: Callable[[Any], Any],
+            compute: Callable[[Any, Any], Any],
+            finish: Optional[Callable[[Any, Any], Any]] = None) -> List[Any]:
+        """
+        依序抓取、計算、收尾每個任務
+
+        Args:
+            tasks: 任務清單（依此順序開始抓取）
+            fetch(task) -> payload: I/O 執行緒執行；回傳 None 代表跳過此任務
+            compute(task, payload) -> result: 進程池執行（需為可 pickle 的模組層級函式）
+            finish(task, result) -> result: 計算後的網路步驟（例如 AI 分析），I/O 執行緒執行
+
+        Returns:
+            list: 與 tasks 同順序的結果；任一階段失敗或跳過時為 None
+        """
+        tasks = list(tasks)
+        results: List[Any] = [None] * len(tasks)
+        for i, result in self.imap_unordered(tasks, fetch, compute, finish):
+            results[i] = result
+        return results
+
+    def fetch_all(self, tasks: Sequence[Any], fetch: Callable[[Any], Any]) -> List[Any]:
+        """
+        只執行抓取層：I/O 執行緒同時抓完所有任務後一起回傳
+
+        需要整批資料才能進行的步驟（例如全市場指標矩陣）在兩層之間等齊所有抓取；
+        之後以 imap_unordered(tasks, 查表函式, compute, finish) 接續計算。
+
+        Returns:
+            list: 與 tasks 同順序的資料；抓取失敗或跳過時為 None
+        """
+        def fetch_one(task):
+            try:
+                return fetch(task)
+            except Exception as e:
+                print(f"❌ 資料抓取失敗 ({task!r}): {e}")
+                return None
+
+        self.warm_up()
+        return list(self.io.map(fetch_one, tasks))
+
+    def imap_unordered(self, tasks: Sequence[Any],
+                       fetch: Callable[[Any], Any],
+                       compute: Callable[[Any, Any], Any],
+                       finish: Optional[Callable[[Any, Any], Any]] = None) -> Iterator[Tuple[int, Any]]:
+        """
+        同 run()，但依完成順序逐一產出 (任務索引, 結果)
+
+        送進進程池的動作都在呼叫端執行緒進行（不從背景執行緒 fork 計算進程）；
+        I/O 執行緒與完成回呼只把事件放進佇列。
+        """
+        tasks = list(tasks)
+        events = queue.Queue()
+        buffer = threading.Semaphore(self.queue_size)   # 已抓好、等待計算的資料最多 queue_size 檔
+
+        def fetch_one(i):
+            try:
+                payload = fetch(tasks[i])
+            except Exception as e:
+                print(f"❌ 資料抓取失敗 ({tasks[i]!r}): {e}")
+                payload = None
+            if payload is None:
+                events.put(('done', i, None))
+                return
+            buffer.acquire()                            # 計算跟不上時在此等待（背壓）
+            events.put(('fetched', i, payload))
+
+        def finish_one(i, result):
+            try:
+                result = finish(tasks[i], result)
+            except Exception as e:
+                print(f"⚠️ 收尾步驟失敗 ({tasks[i]!r}): {e}")
+            events.put(('done', i, result))
+
+        def on_computed(i, future):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ 計算失敗 ({tasks[i]!r}): {e}")
+                result = None
+            events.put(('computed', i, result))
+
+        self.warm_up()
+        for i in range(len(tasks)):
+            self.io.submit(fetch_one, i)
+
+        backlog, running, remaining = [], 0, len(tasks)
+        while remaining:
+            kind, i, value = events.get()
+            if kind == 'fetched':
+                backlog.append((i, value))
+            elif kind == 'computed':
+                running -= 1
+                if value is not None and finish is not None:
+                    self.post.submit(finish_one, i, value)
+                else:
+                    remaining -= 1
+                    yield i, value
+            else:
+                remaining -= 1
+                yield i, value
+
+            # 進程池中最多 cpu_workers 個計算，依抓取完成順序送出
+            while backlog and running < self.cpu_workers:
+                j, payload = backlog.pop(0)
+                buffer.release()
+                try:
+                    future = self.cpu.submit(compute, tasks[j], payload)
+                except Exception as e:
+                    print(f"❌ 計算失敗 ({tasks[j]!r}): {e}")
+                    events.put(('done', j, None))
+                    continue
+                running += 1
+                future.add_done_callback(lambda f, j=j: on_computed(j, f))
+
+    def close(self) -> None:
+        self.io.shutdown()
+        self.post.shutdown()
+        self.cpu.shutdown()
+
+    def __enter__(self) -> 'TwoTierExecutor':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _noop(_):
+    return None
+
+
+def run_two_tier(tasks: Sequence[Any],
+                 fetch: Callable[[Any], Any],
+                 compute: Callable[[Any, Any], Any],
+                 finish: Optional[Callable[[Any, Any], Any]] = None,
+                 io_workers: int = DEFAULT_IO_WORKERS,
+                 cpu_workers: int = None,
+                 queue_size: int = None,
+                 initializer: Callable = None,
+                 initargs: tuple = ()) -> List[Any]:
+    """單次執行：建立 TwoTierExecutor、跑完 tasks 後關閉（參數見 TwoTierExecutor.run）"""
+    with TwoTierExecutor(io_workers, cpu_workers, queue_size, initializer, initargs) as executor:
+        return executor.run(tasks, fetch, compute, finish)
+
+
+def imap_two_tier(tasks: Sequence[Any],
+                  fetch: Callable[[Any], Any],
+                  compute: Callable[[Any, Any], Any],
+                  finish: Optional[Callable[[Any, Any], Any]] = None,
+                  io_workers: int = DEFAULT_IO_WORKERS,
+                  cpu_workers: int = None,
+                  queue_size: int = None,
+                  initializer: Callable = None,
+                  initargs: tuple = ()) -> Iterator[Tuple[int, Any]]:
+    """單次執行的串流版本：依完成順序產出 (任務索引, 結果)，全部完成後關閉執行器"""
+    with TwoTierExecutor(io_workers, cpu_workers, queue_size, initializer, initargs) as executor:
+        yield from executor.imap_unordered(tasks, fetch, compute, finish)
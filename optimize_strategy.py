@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+喵姆 AI 股市偵測站 - 策略參數最佳化
+
+對 watchlist.json 全部股票掃描 SMA 週期 / RSI 出場門檻 / MACD 週期，
+以 walk-forward 驗證樣本外表現（區間固定在日曆季度上，每天重跑都能沿用快取），
+結果寫入 data/optimizer/report.json。
+
+用法：
+    python optimize_strategy.py                # 預設 3 年資料
+    python optimize_strategy.py --years 5 --sma 20 60 120 --rsi 75 80
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+from FinMind.data import DataLoader
+
+from main import PRICE_STORE, ProAnalyzer, NpEncoder
+from modules.optimizer import (
+    DEFAULT_MACD_SPANS, DEFAULT_RSI_EXITS, DEFAULT_SMA_PERIODS, DEFAULT_TEST_MONTHS,
+    DEFAULT_TRAIN_MONTHS, OPTIMIZER_DIR, optimize, param_grid
+)
+from modules.storage import atomic_write_json
+
+
+def load_watchlist():
+    try:
+        with open("watchlist.json", "r", encoding="utf-8") as f:
+            return [(s["ticker"], s["name"]) for s in json.load(f).get("stocks", [])]
+    except Exception as e:
+        print(f"⚠️ 無法讀取 watchlist.json: {e}")
+        return []
+
+
+def load_history(stocks, years):
+    """從本地資料倉讀取各檔日 K（缺少的日期才向 FinMind / Yahoo 補抓）"""
+    dl = DataLoader()
+    token = os.getenv("FINMIND_TOKEN")
+    if token:
+        dl.login_by_token(api_token=token)
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365 * years)).strftime('%Y-%m-%d')
+
+    frames = {}
+    for stock_id, _ in stocks:
+        df = PRICE_STORE.get_daily(
+            stock_id, start_date, end_date,
+            fetch=lambda s, e, sid=stock_id: ProAnalyzer.fetch_daily_prices(dl, sid, s, e)
+        )
+        if df.empty or 'open' not in df.columns:
+            continue
+        frames[stock_id] = df.sort_values('date').dropna(subset=['open', 'close'])
+    return frames
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="策略參數最佳化 (walk-forward)")
+    parser.add_argument("--years", type=int, default=3, help="回測資料年數")
+    parser.add_argument("--sma", type=int, nargs="+", default=list(DEFAULT_SMA_PERIODS), help="SMA 週期")
+    parser.add_argument("--rsi", type=float, nargs="+", default=list(DEFAULT_RSI_EXITS), help="RSI 出場門檻")
+    parser.add_argument("--macd", nargs="+", default=[f"{a}-{b}-{c}" for a, b, c in DEFAULT_MACD_SPANS],
+                        help="MACD 週期，格式 fast-slow-signal")
+    parser.add_argument("--train-months", type=int, default=DEFAULT_TRAIN_MONTHS, help="訓練區間（月）")
+    parser.add_argument("--test-months", type=int, default=DEFAULT_TEST_MONTHS, help="測試區間（月，從 1 月起算）")
+    parser.add_argument("--processes", type=int, default=None, help="進程數，預設為 CPU 核心數")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    macd_spans = [tuple(int(x) for x in spec.split("-")) for spec in args.macd]
+    grid = param_grid(args.sma, args.rsi, macd_spans)
+    stocks = load_watchlist()
+    names = dict(stocks)
+
+    print(f"📥 讀取 {len(stocks)} 檔、{args.years} 年日 K...")
+    frames = load_history(stocks, args.years)
+    prices = {sid: (df['open'].to_numpy(dtype=float), df['close'].to_numpy(dtype=float)) for sid, df in frames.items()}
+    dates = {sid: pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]') for sid, df in frames.items()}
+    print(f"🔧 參數組合 {len(grid)} 組 × {len(prices)} 檔，walk-forward 訓練 {args.train_months} / "
+          f"測試 {args.test_months} 個月")
+
+    report = optimize(prices, grid, processes=args.processes, dates=dates,
+                      train_months=args.train_months, test_months=args.test_months)
+    for stock_id, result in report.items():
+        best = result['best']
+        oos = "N/A (資料不足)" if result['oos_return'] is None else f"{result['oos_return']}%"
+        print(f"🏆 {names.get(stock_id, stock_id)} ({stock_id}): SMA {best['sma_period']} / RSI>{best['rsi_exit']:g} / "
+              f"MACD {best['macd_fast']}-{best['macd_slow']}-{best['macd_signal']} | 樣本外 {oos} | 穩定度 {result['stability']}")
+
+    report_path = OPTIMIZER_DIR / "report.json"
+    atomic_write_json(json.loads(json.dumps(report, cls=NpEncoder)), report_path)
+    print(f"💾 結果已寫入 {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+喵姆 AI 股市偵測站 - 規則調整試算 (What-if Re-scoring)
+
+讀取特徵表（data/features）中最近一次分析的結果，以修改後的評分規則
+重新評分，列出建議會改變的股票。不需要重新抓任何資料。
+
+用法：
+    python rescore.py --set trust_net.scale=400 --set rsi.bands='[[">", 75, -1.0], ["<", 25, 1.0]]'
+    python rescore.py --buy 7.5 --sell 4
+    python rescore.py --dump-rules > my_rules.json   # 匯出規則表，編輯後以 --rules 套用
+    python rescore.py --rules my_rules.json --date 2026-02-06
+"""
+import argparse
+import json
+import sys
+import time
+
+from modules.feature_store import FEATURE_STORE
+from modules.scoring import (
+    RECOMMENDATIONS, SCORING_RULES, load_rules, override, recommend, rules_to_json, score_frame
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="以修改後的規則對已存的特徵重新評分")
+    parser.add_argument("--date", default=None, help="特徵表日期，預設為最近一次")
+    parser.add_argument("--rules", default=None, help="規則表 JSON（--dump-rules 的格式）")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY.FIELD=VALUE",
+                        help="修改單一規則欄位，VALUE 以 JSON 解析，例如 pe.bands='[[\">\", 35, -1.0]]'")
+    parser.add_argument("--buy", type=float, default=None, help="強力買進門檻（預設 8）")
+    parser.add_argument("--bullish", type=float, default=None, help="偏多操作門檻（預設 6.5）")
+    parser.add_argument("--sell", type=float, default=None, help="建議賣出門檻（預設 3.5）")
+    parser.add_argument("--dump-rules", action="store_true", help="輸出目前的規則表 JSON 後結束")
+    return parser.parse_args()
+
+
+def build_rules(args):
+    rules = load_rules(args.rules) if args.rules else SCORING_RULES
+    for item in args.overrides:
+        target, _, raw = item.partition("=")
+        key, _, field = target.partition(".")
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        rules = override(rules, key, field, value)
+    return rules
+
+
+def build_cutoffs(args):
+    thresholds = (args.buy, args.bullish, args.sell)
+    return tuple((op, threshold if new is None else new, label, css)
+                 for (op, threshold, label, css), new in zip(RECOMMENDATIONS, thresholds))
+
+
+def main():
+    args = parse_args()
+    try:
+        rules = build_rules(args)
+    except (KeyError, TypeError, OSError) as e:
+        print(f"❌ 規則設定錯誤: {e}")
+        sys.exit(1)
+    if args.dump_rules:
+        print(json.dumps(rules_to_json(rules), ensure_ascii=False, indent=2))
+        return
+
+    features = FEATURE_STORE.load(args.date)
+    if features.empty:
+        print("❌ 找不到特徵表，請先執行 main.py 完成一次分析")
+        sys.exit(1)
+    date = args.date or FEATURE_STORE.dates()[-1]
+
+    started = time.perf_counter()
+    before = score_frame(features)
+    after = score_frame(features, rules)
+    old_rec, _ = recommend(before)
+    new_rec, _ = recommend(after, build_cutoffs(args))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f"📅 特徵表 {date}：{len(features)} 檔，重新評分耗時 {elapsed:.1f} ms")
+    changed = [i for i in range(len(features)) if old_rec[i] != new_rec[i]]
+    if not changed:
+        print("✅ 沒有任何建議改變")
+        return
+
+    print(f"🔀 {len(changed)} 檔建議改變：")
+    for i in changed:
+        row = features.iloc[i]
+        print(f"  {row['name']} ({row['stock_id']}): {before[i]:.1f} {old_rec[i]} → {after[i]:.1f} {new_rec[i]}")
+
+
+if __name__ == "__main__":
+    main()
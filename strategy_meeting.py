@@ -1,9 +1,11 @@
 import os
 import json
-import requests
 import google.generativeai as genai
 from datetime import datetime
 from dotenv import load_dotenv
+from modules.http_client import http_post
+from modules.feature_store import FEATURE_STORE, by_stock, to_frame
+from modules.result_stream import read_stream
 
 # 載入環境變數
 load_dotenv()
@@ -19,8 +21,11 @@ def send_line_push(msg):
     headers = {"Content-Type": "application/json", "Authorization": f"Bearer {LINE_CHANNEL_TOKEN}"}
     payload = {"to": YOUR_USER_ID, "messages": [{"type": "text", "text": msg}]}
     try:
-        requests.post(url, headers=headers, json=payload)
-        print("✅ LINE 策略報告已發送")
+        res = http_post(url, headers=headers, json=payload)
+        if res.status_code == 200:
+            print("✅ LINE 策略報告已發送")
+        else:
+            print(f"❌ LINE 發送失敗: {res.text}")
     except Exception as e:
         print(f"❌ LINE 發送失敗: {e}")
 
@@ -35,13 +40,28 @@ def ask_gemini(prompt):
     except Exception as e:
         return f"Gemini 思考失敗: {e}"
 
+def load_results():
+    """
+    讀取分析結果與對應的特徵 -> (results, {股票代號: 特徵})
+
+    今日的 daily_analysis.ndjson（掃描中或已完成）每筆都帶著自己的特徵列；
+    沒有今日串流時讀取 daily_analysis.json 與特徵表最新的分區
+    """
+    snapshot = read_stream()
+    if snapshot.records and snapshot.meta.get('date') == datetime.now().strftime('%Y-%m-%d'):
+        if not snapshot.complete:
+            print(f"⏳ 今日掃描進行中，使用已完成的 {len(snapshot.records)}/{snapshot.meta.get('total', '?')} 檔")
+        rows = [r.pop('features', None) for r in snapshot.records]
+        return snapshot.records, by_stock(to_frame(row for row in rows if row))
+    with open("daily_analysis.json", "r", encoding="utf-8") as f:
+        return json.load(f), FEATURE_STORE.latest()
+
 def main():
     print(f"\n🌙 啟動夜間策略會議 {datetime.now().strftime('%Y-%m-%d %H:%M')}...")
 
-    # 1. 讀取今日數據與投資組合
+    # 1. 讀取今日數據與投資組合（全市場掃描還在進行時，讀取已串流完成的部分）
     try:
-        with open("daily_analysis.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data, features = load_results()
         with open("portfolio.json", "r", encoding="utf-8") as f:
             portfolio = json.load(f)
     except FileNotFoundError:
@@ -58,13 +78,23 @@ def main():
 
     # 3. 準備資料給 AI
     stocks_info = []
+    # 直接讀白天分析存下的特徵（與 data 同一輪），不額外呼叫 API
     for s in targets:
+        f = features.get(s['代號'], {})
+        valuation = f"本益比 {f.get('pe') or 'N/A'}, 殖利率 {f.get('dividend_yield') or 'N/A'}%"
+        technical = "N/A"
+        if f.get('rsi_14') is not None and f.get('sma_60') is not None:
+            technical = f"RSI {f['rsi_14']:.0f}, 季線 {f['sma_60']:.1f}"
+        risk = f"95% VaR {f['var_95']:.1f}" if f.get('var_95') is not None else "N/A"
         info = f"""
         【{s['名稱']} ({s['代號']})】
         - 現價: {s['收盤價']} (評分: {s['評分']})
         - 訊號: {s['詳細理由']}
         - 籌碼: 投信 {s.get('投信動向', 0)} 張, 外資 {s.get('外資動向', 0)} 張
         - 營收: {s.get('營收表現', 'N/A')}
+        - 估值: {valuation}
+        - 技術: {technical}
+        - 風險: {risk}
         - AI 預測摘要: {s.get('ai_insight', '無')}
         """
         stocks_info.append(info)
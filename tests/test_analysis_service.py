@@ -0,0 +1,105 @@
+"""
+tests/test_analysis_service.py
+
+測試常駐分析服務的本機通訊：指令分派、錯誤回報、驗證與停止
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import analysis_service
+from modules.analysis_service import AnalysisServer, DaemonBusy, DaemonUnavailable, analyze_timeout, call, load_authkey
+
+
+KEY = b'test-key'
+
+
+def _fail(**kwargs):
+    raise ValueError('壞請求')
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return 'done'
+
+
+@pytest.fixture
+def server():
+    srv = AnalysisServer({'analyze': lambda tickers: [{'代號': t} for t in tickers], 'fail': _fail, 'slow': _slow},
+                         address=('127.0.0.1', 0), authkey=KEY, status=lambda: {'jobs': 0, 'queued_tickers': 3})
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    thread.join(timeout=5)
+
+
+class TestAnalysisService:
+
+    def test_dispatch(self, server):
+        """指令轉給 handler，ping 回傳狀態"""
+        assert call('analyze', server.address, KEY, tickers=['2330', '2317']) == [{'代號': '2330'}, {'代號': '2317'}]
+        status = call('ping', server.address, KEY)
+        # analyze 先 ping 一次取得佇列長度
+        assert status['served'] == 2 and status['jobs'] == 0 and status['active'] == 0
+        assert status['commands'] == ['analyze', 'fail', 'slow']
+
+    def test_errors(self, server):
+        """handler 失敗與未知指令回報為 RuntimeError，服務繼續運作"""
+        with pytest.raises(RuntimeError, match='壞請求'):
+            call('fail', server.address, KEY)
+        with pytest.raises(RuntimeError, match='未知的指令'):
+            call('rebalance', server.address, KEY)
+        assert call('analyze', server.address, KEY, tickers=['0050']) == [{'代號': '0050'}]
+
+    def test_wrong_key(self, server):
+        with pytest.raises(DaemonUnavailable):
+            call('ping', server.address, b'wrong')
+
+    def test_shutdown(self, server):
+        """shutdown 指令後不再接受連線"""
+        assert call('shutdown', server.address, KEY) == 'bye'
+        server.listener.close()
+        with pytest.raises(DaemonUnavailable):
+            call('ping', server.address, KEY, timeout=1)
+
+    def test_analyze_timeout_counts_queued_tickers(self, server, monkeypatch):
+        """analyze 的等待上限 = (排在前面的股票 + 本次股票) × 單檔預算 + 餘裕"""
+        seen = []
+        monkeypatch.setattr(analysis_service, 'analyze_timeout', lambda n: seen.append(n) or 30.0)
+
+        call('analyze', server.address, KEY, tickers=['2330', '2317'])
+
+        assert seen == [5]
+
+    def test_analyze_timeout_scales(self, monkeypatch):
+        monkeypatch.setattr(analysis_service, 'STOCK_BUDGET_SECONDS', 120.0)
+        assert analyze_timeout(5) - analyze_timeout(1) == 4 * 120
+        monkeypatch.setattr(analysis_service, 'STOCK_BUDGET_SECONDS', 0.0)
+        assert analyze_timeout(5) is None
+
+    def test_busy_is_not_unavailable(self, server):
+        """服務還在執行時逾時回報為忙碌，服務沒有啟動則不是"""
+        with pytest.raises(DaemonBusy, match='忙碌'):
+            call('slow', server.address, KEY, timeout=0.2, seconds=1.0)
+
+        server.shutdown()
+        server.listener.close()
+        with pytest.raises(DaemonUnavailable) as info:
+            call('analyze', server.address, KEY, tickers=['2330'])
+        assert not isinstance(info.value, DaemonBusy)
+
+    def test_authkey_file(self, tmp_path):
+        """金鑰檔第一次啟動時建立（僅擁有者可讀），之後沿用"""
+        path = tmp_path / 'daemon.key'
+        with pytest.raises(DaemonUnavailable):
+            load_authkey(path)
+        key = load_authkey(path, create=True)
+        assert len(key) == 64 and load_authkey(path) == key
+        assert path.stat().st_mode & 0o077 == 0
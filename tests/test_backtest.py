@@ -0,0 +1,80 @@
+"""
+tests/test_backtest.py
+
+測試向量化回測與 Backtrader 版 MiauBacktestStrategy 結果一致
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import ProAnalyzer
+from modules.backtest import StrategyParams, fill_bars, run_backtest
+
+
+def _prices(seed, n=300, drift=0.05, vol=1.5):
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(drift, vol, n)), 5)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2022-01-03', periods=n).strftime('%Y-%m-%d'),
+        'open': close + rng.normal(0, 0.5, n),
+        'close': close, 'max': close + 1, 'min': close - 1,
+        'Trading_Volume': rng.integers(1000, 5000, n),
+    })
+
+
+METRICS = ('total_return', 'win_rate', 'max_drawdown', 'final_value')
+
+
+class TestVectorizedBacktest:
+
+    @pytest.mark.parametrize('seed', range(12))
+    def test_matches_backtrader(self, seed):
+        """隨機走勢下報酬率、勝率、最大回撤、期末淨值皆與 Backtrader 相同"""
+        df = _prices(seed)
+        expected = ProAnalyzer.backtest_strategy_backtrader(df, 'test')
+        result = run_backtest(df)
+
+        assert {k: result[k] for k in METRICS} == {k: expected[k] for k in METRICS}
+
+    @pytest.mark.parametrize('drift', [0.4, -0.15])
+    def test_matches_backtrader_on_trends(self, drift):
+        """單邊多頭（持有到期末未平倉）與單邊空頭（不進場）"""
+        df = _prices(99, drift=drift, vol=0.8)
+        expected = ProAnalyzer.backtest_strategy_backtrader(df, 'test')
+        result = run_backtest(df)
+
+        assert {k: result[k] for k in METRICS} == {k: expected[k] for k in METRICS}
+
+    @pytest.mark.parametrize('params', [
+        StrategyParams(sma_period=20, rsi_exit=70.0),
+        StrategyParams(sma_period=90, rsi_exit=85.0, macd_fast=5, macd_slow=35, macd_signal=5),
+    ])
+    def test_matches_backtrader_with_params(self, params):
+        """非預設參數（最佳化掃描用）同樣與 Backtrader 相同"""
+        df = _prices(7)
+        expected = ProAnalyzer.backtest_strategy_backtrader(df, 'test', params)
+        result = run_backtest(df, params)
+
+        assert {k: result[k] for k in METRICS} == {k: expected[k] for k in METRICS}
+
+    def test_unsorted_input(self):
+        """輸入未依日期排序時結果不變"""
+        df = _prices(3)
+        shuffled = df.sample(frac=1, random_state=0)
+
+        assert run_backtest(shuffled) == run_backtest(df)
+
+    def test_fill_bars_alternate(self):
+        """同一根同時有進出場訊號時，依持倉狀態擇一，成交在隔天"""
+        entry = np.array([True, True, True, False, True])
+        exit_ = np.array([False, True, True, True, False])
+        buys, sells = fill_bars(entry, exit_)
+
+        assert list(buys) == [1, 3]
+        assert list(sells) == [2, 4]
@@ -0,0 +1,59 @@
+"""
+tests/test_benchmarks.py
+
+測試基準相關係數矩陣與逐檔計算結果一致
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.benchmarks import correlation_matrix, correlation_reasons
+
+
+def _panel():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2024-01-01', periods=120)
+    closes = pd.DataFrame(
+        600 + np.cumsum(rng.normal(0, 5, (120, 3)), axis=0),
+        index=dates, columns=['2330', '2317', '0050']
+    )
+    closes.iloc[10:15, 1] = np.nan          # 停牌
+    bench = pd.DataFrame(
+        {'SP500': 4800 + np.cumsum(rng.normal(0, 20, 120)),
+         'SOX': 4000 + np.cumsum(rng.normal(0, 30, 120))},
+        index=dates
+    )
+    bench = bench.drop(dates[::7])          # 美股休市日不同
+    return closes, bench
+
+
+class TestCorrelationMatrix:
+
+    def test_matches_pairwise_inner_join_corr(self):
+        """矩陣結果應與逐檔 inner join + Series.corr 相同"""
+        closes, bench = _panel()
+        result = correlation_matrix(closes, bench)
+
+        for ticker in closes.columns:
+            for key in bench.columns:
+                aligned = pd.concat([closes[ticker], bench[key]], axis=1, join='inner').dropna()
+                expected = aligned.iloc[:, 0].corr(aligned.iloc[:, 1])
+                assert abs(result.loc[ticker, key] - expected) < 1e-9
+
+    def test_empty_benchmark_returns_nan_frame(self):
+        """基準下載失敗時不丟錯"""
+        closes, _ = _panel()
+        result = correlation_matrix(closes, pd.DataFrame())
+
+        assert list(result.index) == list(closes.columns)
+
+    def test_reasons_keep_sp500_label(self):
+        """S&P 500 理由文字維持原格式"""
+        reasons = correlation_reasons(pd.Series({'SP500': 0.9, 'SOX': 0.5}))
+
+        assert reasons == ["🌍高度相關S&P 500"]
@@ -0,0 +1,71 @@
+"""
+tests/test_budget.py
+
+測試單檔時間預算：階段上限、不限時、跨進程傳遞與逾時呼叫
+"""
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.budget import Budget, call_with_timeout
+
+
+class TestBudget:
+
+    def test_stage_limited_by_stock_budget(self):
+        """階段可用時間 = min(階段上限, 單檔剩餘時間)"""
+        budget = Budget(total=1.0, stages={'fetch': 0.2, 'ai': 5.0})
+        assert budget.begin('fetch') <= 0.2
+        assert 0.5 < budget.begin('ai') <= 1.0
+        assert not budget.expired()
+
+    def test_expired(self):
+        budget = Budget(total=0.05, stages={'compute': 10})
+        budget.begin('compute')
+        time.sleep(0.06)
+        assert budget.expired('compute') and budget.expired()
+        assert budget.timeout('compute') == 0
+
+    def test_unlimited(self):
+        """0 代表不限時"""
+        budget = Budget(total=0, stages={'ai': 0})
+        budget.begin('ai')
+        assert not budget.expired('ai') and budget.timeout('ai') is None
+
+    def test_extend(self):
+        """等待其他股票的時間從預算中扣回；尚未開始計時則不變"""
+        budget = Budget(total=0.05)
+        budget.extend(10)
+        assert budget.deadline is None
+        budget.start()
+        budget.extend(10)
+        assert budget.remaining() > 9
+
+    def test_deadline_survives_pickle(self):
+        """計算進程收到的預算沿用主進程開始計時的期限"""
+        budget = Budget(total=30).start()
+        copy = pickle.loads(pickle.dumps(budget))
+        assert copy.deadline == budget.deadline
+
+
+class TestCallWithTimeout:
+
+    def test_returns_result(self):
+        assert call_with_timeout(lambda: 42, 1.0) == 42
+        assert call_with_timeout(lambda: 7, None) == 7
+
+    def test_timeout(self):
+        started = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            call_with_timeout(lambda: time.sleep(1), 0.1)
+        assert time.perf_counter() - started < 0.5
+
+    def test_no_time_left(self):
+        with pytest.raises(TimeoutError):
+            call_with_timeout(lambda: 42, 0)
@@ -0,0 +1,104 @@
+"""
+tests/test_checkpoint.py
+
+測試每日執行檢查點：逐檔階段存取、整體階段標記與續跑、舊檢查點清理
+"""
+import sys
+from pathlib import Path
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from modules.fetch_stage import FetchReport
+from modules.budget import Budget
+from modules.checkpoint import RunCheckpoint, prune_runs
+
+
+def _task(stock_id):
+    return (stock_id, stock_id, None, False, Budget())
+
+
+class TestRunCheckpoint:
+
+    def test_stock_stages(self, tmp_path):
+        cp = RunCheckpoint('2026-02-07', tmp_path)
+        assert cp.load('compute', '2330') is None and not cp.has('ai', '2330')
+
+        cp.save('compute', '2330', {'評分': 8.5})
+        assert cp.load('compute', '2330') == {'評分': 8.5}
+        assert cp.completed('compute') == ['2330'] and cp.completed('ai') == []
+
+    def test_run_stage(self, tmp_path):
+        """失敗不標記、不拋出；once 的階段完成後不再執行"""
+        cp = RunCheckpoint('2026-02-07', tmp_path)
+        sent = []
+
+        def push():
+            sent.append(1)
+            return True
+
+        assert cp.run_stage('render', lambda: 1 / 0) is None
+        assert not cp.is_done('render')
+        cp.run_stage('notify', push, once=True)
+        cp.run_stage('notify', push, once=True)
+
+        assert sent == [1] and cp.is_done('notify')
+        assert RunCheckpoint('2026-02-07', tmp_path).is_done('notify')   # 存在磁碟上
+
+    def test_falsy_result_not_marked(self, tmp_path):
+        """回傳 False / None（例如推播沒有送出）不標記完成，once 的階段下次仍會重試"""
+        cp = RunCheckpoint('2026-02-07', tmp_path)
+        attempts = []
+
+        def push():
+            attempts.append(1)
+            return len(attempts) > 1
+
+        assert cp.run_stage('notify', push, once=True) is False
+        assert not cp.is_done('notify')
+        assert cp.run_stage('save', lambda: None) is None and not cp.is_done('save')
+
+        assert cp.run_stage('notify', push, once=True) is True
+        assert attempts == [1, 1] and cp.is_done('notify')
+
+    def test_prune(self, tmp_path):
+        for date in ['2026-02-03', '2026-02-04', '2026-02-05']:
+            RunCheckpoint(date, tmp_path).mark('render')
+        assert prune_runs(keep=2, root=tmp_path) == ['2026-02-03']
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['2026-02-04', '2026-02-05']
+
+
+class TestCheckpointedStages:
+
+    def test_fetch_saved_only_when_complete(self, tmp_path):
+        """抓取有錯誤時不存檔，下次重抓；完整時存檔，下次直接讀取"""
+        cp = RunCheckpoint('2026-02-07', tmp_path)
+        fetched = []
+
+        def fetch(task):
+            fetched.append(task[0])
+            return FetchReport(results={'prices': task[0]},
+                                    errors={'news': RuntimeError('逾時')} if task[0] == '2317' else {})
+
+        for _ in range(2):
+            main.checkpointed_fetch(_task('2330'), fetch, cp)
+            main.checkpointed_fetch(_task('2317'), fetch, cp)
+
+        assert fetched == ['2330', '2317', '2317']
+        assert cp.completed('fetch') == ['2330']
+
+    def test_ai_retried_until_success(self, tmp_path, monkeypatch):
+        """AI 失敗時只留計算結果；不需要 AI 的股票直接完成"""
+        cp = RunCheckpoint('2026-02-07', tmp_path)
+        monkeypatch.setattr(main, 'PERPLEXITY_API_KEY', 'key')
+        monkeypatch.setattr(main.ProAnalyzer, 'ask_perplexity_prediction', staticmethod(lambda *a, **k: None))
+        res = {'評分': 9.0, '詳細理由': '', '營收表現': '', '投信動向': 0, '外資動向': 0, '收盤價': 100}
+
+        main.checkpointed_finish(_task('2330'), dict(res), cp)
+        main.checkpointed_finish(_task('2317'), dict(res, 評分=5.0), cp)
+        assert cp.completed('compute') == ['2317', '2330'] and cp.completed('ai') == ['2317']
+
+        monkeypatch.setattr(main.ProAnalyzer, 'ask_perplexity_prediction', staticmethod(lambda *a, **k: '看多'))
+        main.checkpointed_finish(_task('2330'), cp.load('compute', '2330'), cp)
+        assert cp.load('ai', '2330')['ai_insight'] == '看多'
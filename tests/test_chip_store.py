@@ -0,0 +1,64 @@
+"""
+tests/test_chip_store.py
+
+測試籌碼寬表：長表轉寬表、增量合併與滾動淨買賣
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.chip_store import ChipStore
+
+
+def _long(dates, foreign=(3000, 1000), trust=(500, 800)):
+    rows = []
+    for d in dates:
+        rows.append({'date': d, 'stock_id': '2330', 'name': 'Foreign_Investor', 'buy': foreign[0], 'sell': foreign[1]})
+        rows.append({'date': d, 'stock_id': '2330', 'name': 'Investment_Trust', 'buy': trust[0], 'sell': trust[1]})
+    return pd.DataFrame(rows)
+
+
+class TestChipStore:
+
+    def test_rolling_matches_tail_sum(self, tmp_path):
+        """5 日滾動淨買賣應與原本 tail(5) 的 buy - sell 加總相同"""
+        dates = pd.bdate_range('2024-03-01', periods=25).strftime('%Y-%m-%d')
+        raw = _long(dates)
+        raw.loc[raw.index[-4:], 'buy'] += 777
+        store = ChipStore(tmp_path)
+        store.upsert('2330', raw)
+
+        flows = ChipStore.latest_flows(store.load('2330'))
+        for name in ('Foreign_Investor', 'Investment_Trust'):
+            rows = raw[raw['name'] == name].tail(5)
+            assert flows[f'{name}_5d'] == rows['buy'].sum() - rows['sell'].sum()
+            rows = raw[raw['name'] == name].tail(20)
+            assert flows[f'{name}_20d'] == rows['buy'].sum() - rows['sell'].sum()
+
+    def test_incremental_fetch_appends_only_new_days(self, tmp_path):
+        """第二次只下載新的日期，滾動欄位依合併後的完整資料重算"""
+        store = ChipStore(tmp_path)
+        calls = []
+
+        def fetch(start, end):
+            calls.append((start, end))
+            days = pd.bdate_range(start, end).strftime('%Y-%m-%d')
+            return _long(days)
+
+        store.get_daily('2330', '2024-03-01', '2024-03-08', fetch)
+        df = store.get_daily('2330', '2024-03-01', '2024-03-12', fetch)
+
+        assert calls[1] == ('2024-03-09', '2024-03-12')
+        assert list(df['date']) == list(pd.bdate_range('2024-03-01', '2024-03-12').strftime('%Y-%m-%d'))
+        assert df['Foreign_Investor_5d'].iloc[-1] == 5 * 2000
+        assert df['Investment_Trust_10d'].iloc[-1] == 8 * -300    # 只有 8 個交易日
+
+    def test_empty_returns_no_flows(self, tmp_path):
+        """沒有籌碼資料時回傳空 dict"""
+        store = ChipStore(tmp_path)
+
+        assert ChipStore.latest_flows(store.load('2330')) == {}
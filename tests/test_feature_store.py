@@ -0,0 +1,57 @@
+"""
+tests/test_feature_store.py
+
+測試日期分區特徵表
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.feature_store import FEATURE_COLUMNS, FeatureStore
+
+
+def _row(stock_id, close, **extra):
+    return {'stock_id': stock_id, 'name': f'股票{stock_id}', 'close': close, 'trust_net': 120,
+            'foreign_net': np.int64(-3400), 'rsi_14': np.float64(55.5), **extra}
+
+
+class TestFeatureStore:
+
+    def test_roundtrip_types(self, tmp_path):
+        """寫入後讀回欄位順序與型別固定，代號保留前導 0"""
+        store = FeatureStore(tmp_path)
+        store.write('2026-02-06', [_row('0050', 130.5, unknown='x'), _row('2330', 1000.0, pe=25.3)])
+        df = store.load()
+
+        assert list(df.columns) == list(FEATURE_COLUMNS)
+        assert list(df['stock_id']) == ['0050', '2330']
+        assert str(df['foreign_net'].dtype) == 'Int64'
+        assert df['pe'].isna().iloc[0] and df['pe'].iloc[1] == 25.3
+
+    def test_partitions(self, tmp_path):
+        """每天一個分區；同一天重跑只覆蓋有分析到的股票"""
+        store = FeatureStore(tmp_path)
+        store.write('2026-02-05', [_row('2330', 990.0), _row('2317', 200.0)])
+        store.write('2026-02-06', [_row('2330', 1000.0), _row('2317', 210.0)])
+        store.write('2026-02-06', [_row('2330', 1005.0)])
+
+        assert store.dates() == ['2026-02-05', '2026-02-06']
+        latest = store.latest()
+        assert latest['2330']['close'] == 1005.0 and latest['2317']['close'] == 210.0
+        assert latest['2330']['pe'] is None
+
+        history = store.history('2330')
+        assert list(history['date']) == ['2026-02-05', '2026-02-06']
+        assert list(history['close']) == [990.0, 1005.0]
+        assert store.history('2330', start='2026-02-06')['close'].tolist() == [1005.0]
+
+    def test_empty(self, tmp_path):
+        store = FeatureStore(tmp_path / 'none')
+
+        assert store.load().empty
+        assert store.latest() == {}
+        assert store.history().empty
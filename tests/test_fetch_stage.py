@@ -0,0 +1,55 @@
+"""
+tests/test_fetch_stage.py
+
+測試並行抓取階段
+"""
+import sys
+import time
+from pathlib import Path
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.fetch_stage import fetch_concurrently, summarize_timings
+
+
+class TestFetchConcurrently:
+
+    def test_latency_is_slowest_not_sum(self):
+        """三個 0.2 秒的請求同時送出，總耗時應接近 0.2 秒"""
+        jobs = {name: (lambda: time.sleep(0.2) or name) for name in ('a', 'b', 'c')}
+
+        report = fetch_concurrently(jobs)
+
+        assert report.elapsed < 0.5
+        assert set(report.timings) == {'a', 'b', 'c'}
+
+    def test_errors_are_captured(self):
+        """單一來源失敗不影響其他來源"""
+        def boom():
+            raise RuntimeError("quota")
+
+        report = fetch_concurrently({'ok': lambda: 42, 'bad': boom})
+
+        assert report.get('ok') == 42
+        assert report.get('bad', 'fallback') == 'fallback'
+        assert isinstance(report.errors['bad'], RuntimeError)
+        assert "✗" in report.summary()
+
+    def test_optional_job_times_out(self):
+        """可省略的來源超過時間預算就放棄；必要來源即使較慢也等到完成"""
+        jobs = {
+            'prices': lambda: time.sleep(0.3) or 'ok',
+            'news': lambda: time.sleep(2) or ['slow'],
+        }
+        started = time.perf_counter()
+        report = fetch_concurrently(jobs, timeout=0.1, optional=('news',))
+
+        assert time.perf_counter() - started < 1.0
+        assert report.get('prices') == 'ok'
+        assert isinstance(report.errors['news'], TimeoutError)
+
+    def test_summarize_timings_orders_by_average(self):
+        summary = summarize_timings([{'news': 900, 'prices': 10}, {'news': 700, 'prices': 30}])
+
+        assert summary.startswith("news 平均 800ms")
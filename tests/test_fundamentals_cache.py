@@ -0,0 +1,91 @@
+"""
+tests/test_fundamentals_cache.py
+
+測試基本面快取依公布節奏決定是否重新下載
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.fundamentals_cache import FundamentalsCache, REVENUE, VALUATION
+
+
+class _Recorder:
+    """記錄呼叫區間並回傳指定資料"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return self.frame
+
+
+def _revenue(year, month):
+    return pd.DataFrame({'date': [f"{year}-{month + 1:02d}-01"], 'revenue': [100],
+                         'revenue_year': [year], 'revenue_month': [month],
+                         'revenue_year_growth': [5.0]})
+
+
+class TestValuationCache:
+
+    def test_once_per_trading_day(self, tmp_path):
+        """同一交易日第二次不下載，隔天只補最後一筆之後"""
+        cache = FundamentalsCache(tmp_path)
+        fetch = _Recorder(pd.DataFrame({'date': ['2024-03-05'], 'PER': [15.0]}))
+
+        cache.get(VALUATION, '2330', '2024-02-05', '2024-03-05', fetch, now=datetime(2024, 3, 5, 9))
+        df = cache.get(VALUATION, '2330', '2024-02-05', '2024-03-05', fetch, now=datetime(2024, 3, 5, 20))
+        cache.get(VALUATION, '2330', '2024-02-06', '2024-03-06', fetch, now=datetime(2024, 3, 6, 9))
+
+        assert df['PER'].iloc[-1] == 15.0
+        assert fetch.calls == [('2024-02-05', '2024-03-05'), ('2024-03-05', '2024-03-06')]
+
+    def test_weekend_reuses_friday(self, tmp_path):
+        """週末沿用週五下載的資料"""
+        cache = FundamentalsCache(tmp_path)
+        fetch = _Recorder(pd.DataFrame({'date': ['2024-03-08'], 'PER': [15.0]}))
+
+        cache.get(VALUATION, '2330', '2024-02-08', '2024-03-08', fetch, now=datetime(2024, 3, 8))
+        cache.get(VALUATION, '2330', '2024-02-09', '2024-03-09', fetch, now=datetime(2024, 3, 9))
+
+        assert len(fetch.calls) == 1
+
+    def test_failed_fetch_retries(self, tmp_path):
+        """下載失敗不記錄檢查時間"""
+        cache = FundamentalsCache(tmp_path)
+        fetch = _Recorder(None)
+
+        cache.get(VALUATION, '2330', '2024-02-05', '2024-03-05', fetch, now=datetime(2024, 3, 5))
+        cache.get(VALUATION, '2330', '2024-02-05', '2024-03-05', fetch, now=datetime(2024, 3, 5))
+
+        assert len(fetch.calls) == 2
+
+
+class TestRevenueCache:
+
+    def test_skips_when_last_month_cached(self, tmp_path):
+        """上個月營收已入庫，月中不再下載"""
+        cache = FundamentalsCache(tmp_path)
+        fetch = _Recorder(_revenue(2024, 2))
+
+        cache.get(REVENUE, '2330', '2023-02-01', '2024-03-05', fetch, now=datetime(2024, 3, 5))
+        cache.get(REVENUE, '2330', '2023-02-01', '2024-03-20', fetch, now=datetime(2024, 3, 20))
+
+        assert len(fetch.calls) == 1
+
+    def test_publication_window_checks_daily_then_once_after_deadline(self, tmp_path):
+        """尚未公布：公布期間每天一次，截止後再確認一次就停止"""
+        cache = FundamentalsCache(tmp_path)
+        fetch = _Recorder(_revenue(2024, 1))
+
+        for day in (3, 3, 4, 12, 15, 28):
+            cache.get(REVENUE, '2330', '2023-02-01', f"2024-03-{day:02d}", fetch, now=datetime(2024, 3, day))
+
+        assert [end for _, end in fetch.calls] == ['2024-03-03', '2024-03-04', '2024-03-12']
@@ -0,0 +1,53 @@
+"""
+tests/test_http_client.py
+
+測試共用 HTTP 連線層設定
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from urllib3.exceptions import ConnectTimeoutError, ReadTimeoutError
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.http_client import get_session, http_post, DEFAULT_TIMEOUT
+
+
+class TestHttpClient:
+
+    def test_session_is_reused_within_process(self):
+        assert get_session() is get_session()
+
+    def test_adapter_retries_on_throttle_and_server_errors(self):
+        adapter = get_session().get_adapter("https://api.perplexity.ai")
+        retry = adapter.max_retries
+
+        assert retry.total == 3
+        assert 429 in retry.status_forcelist and 503 in retry.status_forcelist
+        assert "GET" in retry.allowed_methods
+
+    def test_post_only_retries_connect_errors(self):
+        """POST 送出後的 5xx / 讀取逾時不重送（避免重複推播與重複計費），連線失敗仍會重試"""
+        retry = get_session().get_adapter("https://api.line.me").max_retries
+
+        assert not retry.is_retry("POST", 503)
+        assert retry.is_retry("GET", 503)
+        with pytest.raises(ReadTimeoutError):
+            retry.increment("POST", "/v2/bot/message/push", error=ReadTimeoutError(None, "/", "read timed out"))
+
+        retried = retry.increment("POST", "/chat/completions", error=ConnectTimeoutError("connect timed out"))
+        assert retried.total == retry.total - 1
+
+    def test_default_timeout_is_applied(self, monkeypatch):
+        captured = {}
+
+        def fake_post(url, timeout=None, **kwargs):
+            captured['timeout'] = timeout
+            return "resp"
+
+        monkeypatch.setattr(get_session(), "post", fake_post)
+
+        assert http_post("https://example.invalid") == "resp"
+        assert captured['timeout'] == DEFAULT_TIMEOUT
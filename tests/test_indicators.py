@@ -0,0 +1,111 @@
+"""
+tests/test_indicators.py
+
+測試全市場指標矩陣與逐檔 calculate_indicators 結果相同
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from main import ProAnalyzer
+from modules import analyzer
+from modules.budget import Budget
+from modules.fetch_stage import FetchReport
+from modules.indicators import (
+    DEFAULT_INDICATORS, REGISTRY, attach_indicators, calculate_indicators_panel,
+    compute_indicators, lookback_days, lookback_rows, pivot_panel
+)
+
+
+def _frames():
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range('2024-01-01', periods=130).strftime('%Y-%m-%d')
+    frames = {}
+    for i, stock_id in enumerate(['2330', '2317', '2454', '0050']):
+        close = 100 + np.cumsum(rng.normal(0, 1, len(dates)))
+        df = pd.DataFrame({'date': dates, 'close': close,
+                           'max': close + rng.random(len(dates)), 'min': close - rng.random(len(dates))})
+        if i == 1:
+            df = df.drop(df.index[[30, 31, 32, 90]])     # 停牌
+        if i == 2:
+            df = df.iloc[50:]                             # 較晚上市
+        frames[stock_id] = df.sample(frac=1, random_state=i)   # 日期未排序
+    return frames
+
+
+class TestPanelIndicators:
+
+    def test_identical_to_per_ticker(self):
+        """每一檔、每個指標都與逐檔計算完全相同（含停牌與較晚上市）"""
+        frames = _frames()
+        panel = calculate_indicators_panel(*pivot_panel(frames), custom_indicators=['SMA_custom'])
+
+        for stock_id, df in frames.items():
+            expected = ProAnalyzer.calculate_indicators(df.copy(), custom_indicators=['SMA_custom'])
+            result = attach_indicators(df.copy(), panel, stock_id)
+            for name in panel:
+                pd.testing.assert_series_equal(result[name], expected[name], check_names=False)
+
+    def test_every_registry_spec_matches_compute_indicators(self):
+        """登錄表中每個指標的矩陣結果都與逐檔 compute_indicators 相同"""
+        frames = _frames()
+        for name, spec in REGISTRY.items():
+            panel = calculate_indicators_panel(*pivot_panel(frames), names=[name])
+            assert set(panel) == set(spec.columns)
+            for stock_id, df in frames.items():
+                expected = compute_indicators(df.copy(), [name])
+                result = attach_indicators(df.copy(), panel, stock_id)
+                for column in spec.columns:
+                    pd.testing.assert_series_equal(result[column], expected[column], check_names=False)
+
+    def test_panel_rows_feed_compute_stock(self):
+        """run_analysis 把全市場指標列交給 compute_stock，結果與逐檔計算相同"""
+        frames = _frames()
+        todo = [(stock_id, stock_id, None, False, Budget()) for stock_id in frames]
+        payloads = [FetchReport(results={'prices': df.copy()}) for df in frames.values()]
+        main.attach_panel_indicators(todo, payloads)
+
+        for (stock_id, *_), payload in zip(todo, payloads):
+            assert 'indicators' in payload.results
+            result = ProAnalyzer.compute_stock(stock_id, stock_id, payload, ['SMA_custom'], pd.DataFrame())
+            expected = ProAnalyzer.compute_stock(stock_id, stock_id, FetchReport(results={'prices': frames[stock_id].copy()}),
+                                                 ['SMA_custom'], pd.DataFrame())
+            for key in ('評分', '詳細理由', '白話摘要', 'chart_data'):
+                assert result[key] == expected[key]
+
+    def test_custom_indicator_only_when_requested(self):
+        panel = calculate_indicators_panel(*pivot_panel(_frames()))
+
+        assert 'SMA_custom' not in panel
+        assert 'RSI_14' in panel
+
+
+class TestIndicatorRegistry:
+
+    def test_only_requested_indicators_are_computed(self):
+        """只計算指定的指標"""
+        df = _frames()['2330']
+        result = compute_indicators(df.copy(), ['RSI_14', 'SMA_60'])
+
+        assert set(result.columns) - set(df.columns) == {'RSI_14', 'SMA_60'}
+
+    def test_lookback_follows_requested_set(self):
+        """抓取區間由最長的暖機需求決定"""
+        assert lookback_rows(['SMA_60']) == 60
+        assert lookback_rows(['SMA_60', 'MACD']) == REGISTRY['MACD'].lookback
+        assert lookback_days(['SMA_60']) < lookback_days(DEFAULT_INDICATORS)
+
+    def test_analyzer_shares_registry(self):
+        """modules/analyzer 與 ProAnalyzer 的共同指標結果相同"""
+        df = _frames()['2330']
+        expected = ProAnalyzer.calculate_indicators(df.copy())
+        result = analyzer.calculate_indicators(df.copy())
+
+        for name in ('SMA_60', 'MACD', 'MACD_signal', 'RSI_14'):
+            pd.testing.assert_series_equal(result[name], expected[name])
@@ -0,0 +1,173 @@
+"""
+tests/test_optimizer.py
+
+測試 walk-forward 參數最佳化與結果快取
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.backtest import StrategyParams, backtest_arrays
+from modules.optimizer import (
+    OptimizerCache, calendar_splits, evaluate_segment, optimize, param_grid, params_key, sweep,
+    walk_forward_splits
+)
+
+
+def _arrays(seed, n=400):
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0.05, 1.5, n)), 5)
+    return close + rng.normal(0, 0.5, n), close
+
+
+GRID = param_grid((20, 60), (75, 80), ((12, 26, 9),))
+
+
+def _dates(n, start='2022-01-03'):
+    return pd.bdate_range(start, periods=n).strftime('%Y-%m-%d').to_numpy()
+
+
+class TestWalkForward:
+
+    def test_splits(self):
+        """訓練區間之後緊接測試區間，每次往後推一個測試區間"""
+        splits = walk_forward_splits(400, train_size=250, test_size=60)
+
+        assert splits == [((0, 250), (250, 310)), ((60, 310), (310, 370))]
+        assert walk_forward_splits(200, 250, 60) == []
+
+    def test_calendar_splits_fixed_to_quarters(self):
+        """日曆切分：測試區間為完整季度、訓練區間為前 12 個月，資料窗滑動時既有區間的日期不變"""
+        dates = _dates(1000)
+
+        def by_date(window):
+            return {(window[train[0]], window[test[0]], window[test[1] - 1])
+                    for train, test in calendar_splits(window, min_start=60)}
+
+        today = by_date(dates[:800])
+        tomorrow = by_date(dates[1:801])
+        later = by_date(dates[150:950])     # 半年後：最早的區間滑出、新的季度完成
+
+        assert today and today == tomorrow
+        assert today & later and (today - later) and (later - today)
+        for train_start, test_start, test_end in today | later:
+            assert test_start[5:7] in ('01', '04', '07', '10') and test_start[8:] <= '07'
+            month = pd.Period(test_start, 'M')
+            assert pd.Period(train_start, 'M') == month - 12
+            assert pd.Period(test_end, 'M') == month + 2
+
+    def test_calendar_splits_skip_incomplete(self):
+        """未結束的季度、不完整的訓練區間與暖機不足的區間不切分"""
+        assert calendar_splits(_dates(300)) == []       # 2022-01-03 ~ 2023-02：訓練區間不足
+
+        dates = _dates(400)                              # 2022-01-03 ~ 2023-07 中
+        splits = calendar_splits(dates)
+        assert [(dates[train[0]], dates[test[0]]) for train, test in splits] == [
+            ('2022-04-01', '2023-04-03')]               # 2023 Q3 尚未結束；從 2022-01 開始的區間沒有前一個月的資料
+        assert calendar_splits(dates, min_start=splits[0][0][0] + 1) == []
+
+    def test_segment_uses_warmup_before_start(self):
+        """區間回測只往前借暖機用的 K 棒"""
+        prices = _arrays(1)
+        params = GRID[0]
+        lead = 100 - (params.warmup - 1)
+
+        assert evaluate_segment(prices, 100, 200, params) == backtest_arrays(
+            prices[0][lead:200], prices[1][lead:200], params)
+
+
+class TestOptimizer:
+
+    def test_report(self, tmp_path):
+        """每檔回報最佳參數、穩定度與樣本外報酬；資料不足時以全樣本最佳化"""
+        prices = {'AAA': _arrays(2), 'BBB': _arrays(3, n=150)}
+        report = optimize(prices, GRID, train_size=250, test_size=60, processes=1,
+                          cache=OptimizerCache(tmp_path))
+
+        assert len(report['AAA']['splits']) == 2
+        assert report['AAA']['oos_return'] is not None
+        assert 0 < report['AAA']['stability'] <= 1
+        assert params_key(StrategyParams(**report['AAA']['best'])) == report['AAA']['splits'][-1]['params']
+        assert report['BBB']['oos_return'] is None
+        assert report['BBB']['best']['sma_period'] in (20, 60)
+
+    def test_oos_marks_open_position(self, tmp_path):
+        """樣本外報酬把測試區間結束時仍持有的部位以收盤價計價"""
+        prices = {'AAA': _arrays(2)}
+        report = optimize(prices, GRID, train_size=250, test_size=60, processes=1, cache=OptimizerCache(tmp_path))
+
+        growth = np.prod([1 + row['out_of_sample']['marked_return'] / 100 for row in report['AAA']['splits']])
+        assert report['AAA']['oos_return'] == round((growth - 1) * 100, 2)
+
+    def test_calendar_report_reuses_cache(self, tmp_path, monkeypatch):
+        """有日期時隔天重跑（資料窗往後一天）所有訓練區間都命中快取"""
+        open_, close = _arrays(5, n=800)
+        dates = _dates(800)
+        cache_dir = tmp_path / "cache"
+        optimize({'AAA': (open_[:700], close[:700])}, GRID, processes=1, cache=OptimizerCache(cache_dir),
+                 dates={'AAA': dates[:700]})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("不應重新回測")
+        monkeypatch.setattr('modules.optimizer.Pool', fail)
+        report = optimize({'AAA': (open_[1:701], close[1:701])}, GRID, processes=1,
+                          cache=OptimizerCache(cache_dir), dates={'AAA': dates[1:701]})
+
+        assert len(report['AAA']['splits']) >= 3
+
+    def test_stale_digests_are_pruned(self, tmp_path):
+        """只保留本次查詢過的資料雜湊，舊區間的雜湊在存檔時清除"""
+        import json
+
+        prices = {'AAA': _arrays(6)}
+        sweep(prices, {'AAA': [(0, 250), (60, 310)]}, GRID, processes=1, cache=OptimizerCache(tmp_path))
+        before = json.loads((tmp_path / "AAA.json").read_text())
+        sweep(prices, {'AAA': [(60, 310), (120, 370)]}, GRID, processes=1, cache=OptimizerCache(tmp_path))
+        after = json.loads((tmp_path / "AAA.json").read_text())
+
+        kept = set(before) & set(after)
+        assert kept and set(before) - set(after)        # (0, 250) 的雜湊已清除
+        sweep(prices, {'AAA': [(120, 370)]}, GRID, processes=1, cache=OptimizerCache(tmp_path))
+        latest = json.loads((tmp_path / "AAA.json").read_text())
+        assert latest and set(latest) <= set(after) - kept
+
+    def test_cache_hit_skips_backtest(self, tmp_path, monkeypatch):
+        """資料與參數相同時直接讀取快取，不再啟動回測"""
+        prices = {'AAA': _arrays(4)}
+        segments = {'AAA': [(0, 250)]}
+        first = sweep(prices, segments, GRID, processes=1, cache=OptimizerCache(tmp_path))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("不應重新回測")
+        monkeypatch.setattr('modules.optimizer.Pool', fail)
+        second = sweep(prices, segments, GRID, processes=1, cache=OptimizerCache(tmp_path))
+
+        assert second == first
+        assert len(second[('AAA', 0, 250)]) == len(GRID)
+
+
+class TestMarkedReturn:
+
+    def test_open_position_is_marked_to_market(self):
+        """期末仍持有時 compound_return 只算已平倉交易，marked_return 以最後收盤價計入未實現損益"""
+        close = np.linspace(100, 200, 200)      # 一路上漲：進場後不出場（RSI 門檻設高）
+        params = StrategyParams(sma_period=20, rsi_exit=101.0)
+        result = backtest_arrays(close, close, params)
+
+        assert result['trades'] == 0 and result['compound_return'] == 0
+        assert result['marked_return'] > 50
+
+    def test_flat_at_end_matches_compound(self):
+        open_, close = _arrays(7)
+        params = StrategyParams(sma_period=20, rsi_exit=75.0)
+        result = backtest_arrays(open_[:-1], close[:-1], params)
+        from modules.backtest import fill_bars, strategy_signals
+        buys, sells = fill_bars(*strategy_signals(close[:-1], params))
+
+        if len(buys) == len(sells):
+            assert result['marked_return'] == result['compound_return']
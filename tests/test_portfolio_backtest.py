@@ -0,0 +1,69 @@
+"""
+tests/test_portfolio_backtest.py
+
+測試共用現金的投資組合回測
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.backtest import run_backtest
+from modules.portfolio_backtest import price_panel, run_portfolio_backtest
+
+
+def _frame(seed, n=300, start='2022-01-03'):
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0.05, 1.5, n)), 5)
+    return pd.DataFrame({
+        'date': pd.bdate_range(start, periods=n).strftime('%Y-%m-%d'),
+        'open': close + rng.normal(0, 0.5, n),
+        'close': close,
+    })
+
+
+class TestPortfolioBacktest:
+
+    def test_single_stock_trades_match(self):
+        """資金充足時，單檔的成交次數與單檔回測相同"""
+        df = _frame(1)
+        open_, close = price_panel({'AAA': df})
+        result = run_portfolio_backtest(open_, close, 1e7, max_weight=0.1, cash_reserve=0)
+
+        assert result.summary()['trades'] == run_backtest(df)['trades']
+
+    def test_position_limit(self):
+        """單筆進場金額不超過總資產的 max_weight"""
+        open_, close = price_panel({'AAA': _frame(1)})
+        result = run_portfolio_backtest(open_, close, 100000, max_weight=0.15, cash_reserve=0)
+        first_buy = result.cash.lt(100000).idxmax()
+
+        assert 100000 - result.cash[first_buy] <= 15000
+
+    def test_shared_cash(self):
+        """30 檔共用現金：現金永不為負，買進後仍保留 cash_reserve 比例的現金"""
+        frames = {f'S{i}': _frame(i) for i in range(30)}
+        open_, close = price_panel(frames)
+        result = run_portfolio_backtest(open_, close, 500000, max_weight=0.15, cash_reserve=0.2)
+        summary = result.summary()
+        bought = result.cash.diff().fillna(result.cash.iloc[0] - 500000) < 0
+
+        assert (result.cash >= 0).all()
+        assert bought.any()
+        # 買進後現金不低於 cash_reserve × 總資產（容許手續費與當日收盤價變動）
+        assert (result.cash[bought] >= 0.2 * result.equity[bought] * 0.98).all()
+        assert summary['trades'] > 0 and summary['turnover'] > 0
+        assert summary['max_drawdown'] == round(result.drawdown.max(), 2)
+
+    def test_missing_dates(self):
+        """各檔交易日不同（較晚上市）時照常對齊，上市前不持有"""
+        frames = {'AAA': _frame(1), 'BBB': _frame(2, n=150, start='2022-07-01')}
+        open_, close = price_panel(frames)
+        result = run_portfolio_backtest(open_, close, 500000)
+
+        assert len(result.equity) == len(close)
+        assert result.equity.notna().all()
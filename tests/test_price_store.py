@@ -0,0 +1,180 @@
+"""
+tests/test_price_store.py
+
+測試 PriceStore 的增量下載行為
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.price_store import PriceStore
+
+
+def _bars(dates):
+    return pd.DataFrame({
+        'date': dates,
+        'stock_id': '2330',
+        'open': 100.0, 'max': 101.0, 'min': 99.0, 'close': 100.5,
+        'Trading_Volume': 1000,
+    })
+
+
+class FakeFetcher:
+    """記錄呼叫區間的假下載器"""
+
+    def __init__(self, available):
+        self.available = available
+        self.calls = []
+
+    def __call__(self, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        dates = [d for d in self.available if start_date <= d <= end_date]
+        return _bars(dates)
+
+
+class TestPriceStore:
+
+    def test_first_run_fetches_full_window(self, tmp_path):
+        """首次執行：整段下載並寫入本地"""
+        store = PriceStore(tmp_path)
+        fetch = FakeFetcher(['2024-01-02', '2024-01-03', '2024-01-04'])
+
+        df = store.get_daily('2330', '2024-01-01', '2024-01-05', fetch)
+
+        assert fetch.calls == [('2024-01-01', '2024-01-05')]
+        assert list(df['date']) == ['2024-01-02', '2024-01-03', '2024-01-04']
+
+    def test_second_run_only_fetches_new_days(self, tmp_path):
+        """第二次執行：只下載尾端缺少的日期"""
+        store = PriceStore(tmp_path)
+        fetch = FakeFetcher(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-08'])
+
+        store.get_daily('2330', '2024-01-01', '2024-01-05', fetch)
+        df = store.get_daily('2330', '2024-01-01', '2024-01-08', fetch)
+
+        assert fetch.calls[-1] == ('2024-01-06', '2024-01-08')
+        assert df['date'].iloc[-1] == '2024-01-08'
+
+    def test_covered_window_makes_no_call(self, tmp_path):
+        """已涵蓋的區間不應再呼叫遠端"""
+        store = PriceStore(tmp_path)
+        fetch = FakeFetcher(['2024-01-02', '2024-01-03'])
+
+        store.get_daily('2330', '2024-01-01', '2024-01-05', fetch)
+        store.get_daily('2330', '2024-01-02', '2024-01-04', fetch)
+
+        assert len(fetch.calls) == 1
+
+    def test_earlier_start_backfills_head(self, tmp_path):
+        """start_date 提前時回補頭端"""
+        store = PriceStore(tmp_path)
+        fetch = FakeFetcher(['2023-12-28', '2024-01-02'])
+
+        store.get_daily('2330', '2024-01-01', '2024-01-05', fetch)
+        df = store.get_daily('2330', '2023-12-25', '2024-01-05', fetch)
+
+        assert fetch.calls[-1] == ('2023-12-25', '2023-12-31')
+        assert list(df['date']) == ['2023-12-28', '2024-01-02']
+
+    def test_failed_fetch_is_retried(self, tmp_path):
+        """下載失敗 (None) 不推進 meta，下次重試"""
+        store = PriceStore(tmp_path)
+
+        store.get_daily('2330', '2024-01-01', '2024-01-05', lambda s, e: None)
+        fetch = FakeFetcher(['2024-01-02'])
+        df = store.get_daily('2330', '2024-01-01', '2024-01-05', fetch)
+
+        assert fetch.calls == [('2024-01-01', '2024-01-05')]
+        assert len(df) == 1
+
+    def test_today_without_bar_is_not_confirmed(self, tmp_path):
+        """今日 K 棒尚未公布時，下次執行仍會再抓今天"""
+        store = PriceStore(tmp_path)
+        today = datetime.now().strftime('%Y-%m-%d')
+        start = (datetime.now() - timedelta(days=10)).strftime('%Y-%m-%d')
+        fetch = FakeFetcher([])
+
+        store.get_daily('2330', start, today, fetch)
+        store.get_daily('2330', start, today, fetch)
+
+        assert fetch.calls[-1] == (today, today)
+
+    def test_leading_zero_ticker_preserved(self, tmp_path):
+        """0050 這類代號讀回時不可被轉成數字"""
+        store = PriceStore(tmp_path)
+        fetch = FakeFetcher(['2024-01-02'])
+
+        df = store.get_daily('0050', '2024-01-01', '2024-01-05', fetch)
+
+        assert df['stock_id'].iloc[0] == '0050'
+
+
+class TestSyncMarket:
+    """測試全市場批次匯入"""
+
+    @staticmethod
+    def _market_fetcher(calls):
+        def fetch_day(date):
+            calls.append(date)
+            return pd.DataFrame({
+                'date': [date, date],
+                'stock_id': ['2330', '2317'],
+                'open': 100.0, 'max': 101.0, 'min': 99.0, 'close': 100.5,
+                'Trading_Volume': 1000,
+            })
+        return fetch_day
+
+    def test_one_request_per_day_fans_out(self, tmp_path):
+        """一天一次請求，分派到各檔並推進 meta"""
+        store = PriceStore(tmp_path)
+        seed = FakeFetcher(['2024-01-02'])
+        for sid in ('2330', '2317', '2454'):
+            store.get_daily(sid, '2024-01-01', '2024-01-03', seed)
+
+        calls = []
+        n = store.sync_market(self._market_fetcher(calls), '2024-01-01', '2024-01-05',
+                              ['2330', '2317', '2454'])
+
+        assert n == 2 and calls == ['2024-01-04', '2024-01-05']
+        assert store.load('2317')['date'].iloc[-1] == '2024-01-05'
+        assert store.missing_ranges('2330', '2024-01-01', '2024-01-05') == []
+        # 未出現在全市場資料中的代號不推進，留給 get_daily
+        assert store.missing_ranges('2454', '2024-01-01', '2024-01-05') == [('2024-01-04', '2024-01-05')]
+
+    def test_skips_weekends(self, tmp_path):
+        """週末不發請求"""
+        store = PriceStore(tmp_path)
+        seed = FakeFetcher(['2024-01-05'])
+        for sid in ('2330', '2317'):
+            store.get_daily(sid, '2024-01-01', '2024-01-05', seed)
+
+        calls = []
+        store.sync_market(self._market_fetcher(calls), '2024-01-01', '2024-01-08', ['2330', '2317'])
+
+        assert calls == ['2024-01-08']
+
+    def test_large_gap_falls_back_to_per_ticker(self, tmp_path):
+        """缺口天數多於檔數時不做批次"""
+        store = PriceStore(tmp_path)
+        calls = []
+        n = store.sync_market(self._market_fetcher(calls), '2024-01-01', '2024-03-01', ['2330', '2317'])
+
+        assert n == 0 and calls == []
+
+    def test_failure_stops_sweep(self, tmp_path):
+        """中途失敗即停，meta 只推進到連續成功的日期"""
+        store = PriceStore(tmp_path)
+        seed = FakeFetcher(['2024-01-02'])
+        for sid in ('2330', '2317', '2454'):
+            store.get_daily(sid, '2024-01-01', '2024-01-02', seed)
+
+        ok = self._market_fetcher([])
+        store.sync_market(lambda d: ok(d) if d == '2024-01-03' else None,
+                          '2024-01-01', '2024-01-05', ['2330', '2317', '2454'])
+
+        assert store.load_meta('2330')['fetched_through'] == '2024-01-03'
@@ -0,0 +1,132 @@
+"""
+tests/test_rate_limiter.py
+
+測試 FinMind 額度排程器
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import rate_limiter
+from modules.rate_limiter import TokenBucket, ThrottledDataLoader, is_quota_error, next_reset
+
+
+class TestTokenBucket:
+
+    def test_acquire_consumes_tokens(self):
+        bucket = TokenBucket(3600, initial_tokens=5, reserve=0)
+
+        assert bucket.acquire() == 0.0
+        assert 3.9 < bucket.available() < 4.5
+
+    def test_empty_bucket_queues_instead_of_failing(self):
+        """額度用完時等待補充（每秒 36000/3600 = 10 個）"""
+        bucket = TokenBucket(36000, initial_tokens=0, reserve=0)
+
+        waited = bucket.acquire()
+
+        assert waited > 0
+
+    def test_reserve_is_for_priority_only(self):
+        """保留額度只給持股請求使用"""
+        bucket = TokenBucket(360000, initial_tokens=3, reserve=5)
+
+        assert bucket.acquire(priority=True) == 0.0
+        assert bucket.acquire(priority=False) > 0
+
+    def test_drain_until_reset(self):
+        """遠端額度用完：重置前連持股請求也不發 token，重置後整桶補滿"""
+        bucket = TokenBucket(3600, initial_tokens=100, reserve=0)
+        bucket.drain(until=time.time() + 0.3)
+
+        assert bucket.available() == 0.0
+        assert bucket.acquire(priority=True) >= 0.25
+        assert bucket.available() > 3598
+
+    def test_next_reset_is_top_of_hour(self):
+        assert next_reset(7200.0) == 10800.0 + rate_limiter.QUOTA_RESET_MARGIN
+        assert next_reset(7199.0) == 7200.0 + rate_limiter.QUOTA_RESET_MARGIN
+
+
+class FakeDL:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def taiwan_stock_daily(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise KeyError('data')     # FinMind 超過上限時的回應
+        return "ok"
+
+
+class TestThrottledDataLoader:
+
+    @pytest.fixture
+    def quick_reset(self, monkeypatch):
+        """額度重置時間改成 0.05 秒後"""
+        monkeypatch.setattr(rate_limiter, 'next_reset', lambda now=None: time.time() + 0.05)
+
+    def test_quota_error_is_retried(self, quick_reset):
+        dl = ThrottledDataLoader(FakeDL(failures=1), TokenBucket(360000, reserve=0))
+
+        assert dl.taiwan_stock_daily(stock_id="2330") == "ok"
+
+    def test_waits_for_reset_instead_of_fixed_retries(self, quick_reset):
+        """額度持續用完時等到重置再試，不因固定次數放棄"""
+        fake = FakeDL(failures=6)
+        dl = ThrottledDataLoader(fake, TokenBucket(360000, reserve=0))
+
+        assert dl.taiwan_stock_daily(stock_id="2330") == "ok"
+        assert fake.calls == 7
+
+    def test_gives_up_after_max_wait(self, quick_reset):
+        dl = ThrottledDataLoader(FakeDL(failures=1000), TokenBucket(360000, reserve=0), max_wait=0.2)
+
+        with pytest.raises(KeyError):
+            dl.taiwan_stock_daily(stock_id="2330")
+
+    def test_missing_data_with_quota_left_is_not_retried(self, quick_reset):
+        """KeyError: 'data' 但帳號額度還有剩（例如參數錯誤）：直接拋出，不暫停其他請求"""
+        fake = FakeDL(failures=1)
+        fake.api_usage, fake.api_usage_limit = 10, 600
+        bucket = TokenBucket(360000, reserve=0)
+        dl = ThrottledDataLoader(fake, bucket)
+
+        with pytest.raises(KeyError):
+            dl.taiwan_stock_daily(stock_id="2330")
+        assert bucket.state[2] == 0.0
+
+    def test_other_errors_propagate(self):
+        class Broken:
+            def taiwan_stock_daily(self, **kwargs):
+                raise ValueError("bad param")
+
+        dl = ThrottledDataLoader(Broken(), TokenBucket(360000, reserve=0))
+
+        with pytest.raises(ValueError):
+            dl.taiwan_stock_daily(stock_id="2330")
+
+    def test_quota_error_detection(self):
+        assert is_quota_error(KeyError('data'))
+        assert is_quota_error(Exception("{'msg': 'Requests reach the upper limit. https://finmindtrade.com/', 'status': 402}"))
+        assert is_quota_error(Exception('{"status": 402}'))
+        assert not is_quota_error(KeyError('close'))
+
+    def test_stock_id_containing_402_is_not_quota(self):
+        """股票代號 2402 等含有 402 的訊息不是額度錯誤"""
+        assert not is_quota_error(ValueError("2402 毅嘉 資料格式錯誤"))
+        assert not is_quota_error(KeyError('2402'))
+
+    def test_http_402_response(self):
+        class Response:
+            status_code = 402
+
+        error = Exception("Payment Required")
+        error.response = Response()
+        assert is_quota_error(error)
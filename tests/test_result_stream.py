@@ -0,0 +1,96 @@
+"""
+tests/test_result_stream.py
+
+測試逐檔結果串流：NDJSON 寫入、部分讀取、續讀與結尾判斷
+"""
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.result_stream import ResultStream, read_stream, tail
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return super().default(obj)
+
+
+class TestResultStream:
+
+    def test_partial_then_complete(self, tmp_path):
+        path = tmp_path / 'results.ndjson'
+        stream = ResultStream(path, encoder=_Encoder).open('2026-02-07', total=3)
+        stream.append({'代號': '2330', '評分': np.float64(8.5)})
+
+        snapshot = read_stream(path)
+        assert snapshot.meta['total'] == 3 and not snapshot.complete
+        assert snapshot.records == [{'代號': '2330', '評分': 8.5}]
+
+        stream.append({'代號': '2317', '評分': 5.0})
+        stream.close()
+        more = read_stream(path, snapshot.offset, snapshot.meta)
+        assert [r['代號'] for r in more.records] == ['2317']
+        assert more.complete and more.meta['count'] == 2
+
+    def test_incomplete_line_left_for_next_read(self, tmp_path):
+        """寫到一半的行不讀取，offset 停在該行開頭"""
+        path = tmp_path / 'results.ndjson'
+        path.write_text('{"_meta": {"date": "2026-02-07"}}\n{"代號": "2330"}\n{"代號": "23', encoding='utf-8')
+        snapshot = read_stream(path)
+        assert [r['代號'] for r in snapshot.records] == ['2330']
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('17"}\n')
+        assert read_stream(path, snapshot.offset).records == [{'代號': '2317'}]
+
+    def test_failed_run_not_complete(self, tmp_path):
+        """執行中途拋出例外時不寫結尾行"""
+        path = tmp_path / 'results.ndjson'
+        try:
+            with ResultStream(path).open('2026-02-07', total=2) as stream:
+                stream.append({'代號': '2330'})
+                raise RuntimeError('推播失敗')
+        except RuntimeError:
+            pass
+        snapshot = read_stream(path)
+        assert len(snapshot.records) == 1 and not snapshot.complete
+
+    def test_tail_follows_writer(self, tmp_path):
+        path = tmp_path / 'results.ndjson'
+        stream = ResultStream(path).open('2026-02-07', total=3)
+
+        def writer():
+            for stock_id in ['2330', '2317', '0050']:
+                time.sleep(0.05)
+                stream.append({'代號': stock_id})
+            stream.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        seen = [r['代號'] for r in tail(path, poll=0.02, timeout=5)]
+        thread.join()
+        assert seen == ['2330', '2317', '0050']
+
+    def test_records_carry_features(self, tmp_path):
+        """每筆結果帶著自己的特徵列，掃描中途即可配對（缺值轉為 None，與特徵表分區相同）"""
+        from modules.feature_store import by_stock, to_frame
+
+        path = tmp_path / 'results.ndjson'
+        stream = ResultStream(path, encoder=_Encoder).open('2026-02-07', total=2)
+        stream.append({'代號': '2330', 'features': {'stock_id': '2330', 'pe': np.float64(18.2), 'var_95': float('nan')}})
+
+        records = read_stream(path).records
+        features = by_stock(to_frame(r.pop('features') for r in records))
+
+        assert records == [{'代號': '2330'}]
+        assert features['2330']['pe'] == 18.2
+        assert features['2330']['var_95'] is None and features['2330']['rsi_14'] is None
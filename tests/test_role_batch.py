@@ -0,0 +1,244 @@
+"""
+tests/test_role_batch.py
+
+測試 MultiRoleAnalyzer.analyze_batch 與逐檔 analyze 結果一致
+"""
+import itertools
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from modules.feature_store import FeatureStore
+from modules.fetch_stage import FetchReport
+from modules import role_analyzers
+from modules.role_analyzers import (
+    ChipAnalyzer, ContextAnalyzer, MultiRoleAnalyzer, RiskAnalyzer, TechAnalyzer,
+    _chip_batch, _context_batch, _risk_batch, _tech_batch
+)
+
+
+def _columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'foreign_net_volume': rng.integers(-12000, 12000, n),
+        'positive_days': rng.integers(0, 6, n),
+        'trust_net_volume': rng.integers(-3000, 3000, n),
+        'dealer_net_volume': rng.integers(-2000, 2000, n),
+        'close': rng.uniform(80, 120, n),
+        'ma60': rng.uniform(80, 120, n),
+        'ma20': rng.uniform(80, 120, n),
+        'rsi': rng.uniform(5, 95, n),
+        'macd_diff': rng.normal(0, 1, n),
+        'price_change_5d': rng.normal(0, 6, n),
+        'has_positive_news': rng.random(n) < 0.3,
+        'has_negative_news': rng.random(n) < 0.3,
+        'sector_trend': rng.choice(['up', 'down', 'flat'], n),
+        'market_sentiment': rng.choice(['bullish', 'bearish', 'neutral'], n),
+        'has_catalyst': rng.random(n) < 0.2,
+        'volatility': rng.uniform(0, 8, n),
+        'current_drawdown': rng.uniform(0, 30, n),
+        'score': rng.uniform(1, 10, n),
+    }
+
+
+class TestAnalyzeBatch:
+
+    @pytest.mark.parametrize('market_state', ['normal', 'consolidation', 'event_driven'])
+    def test_matches_scalar(self, market_state):
+        """方向、信心度、衝突強度與逐檔 analyze 完全相同"""
+        analyzer = MultiRoleAnalyzer()
+        batch = analyzer.analyze_batch(market_state=market_state, **_columns(500))
+
+        for i in range(len(batch)):
+            expected = analyzer.analyze(market_state=market_state, **batch.row_inputs(i))
+            assert batch.direction_labels()[i] == expected['final_direction']
+            assert batch.final_confidence[i] == expected['confidence']
+            assert batch.conflict_intensity[i] == expected['conflict_intensity']
+            assert bool(batch.has_conflict[i]) == expected['conflict_resolution']['has_conflict']
+            for role in expected['role_outputs']:
+                assert batch.role_confidences[role['role_name']][i] == role['confidence']
+
+    def test_render_selected_rows(self):
+        """只產生指定列的證據文字，結構與 analyze 相同"""
+        analyzer = MultiRoleAnalyzer()
+        columns = _columns(20, seed=1)
+        batch = analyzer.analyze_batch(**columns)
+        rendered = batch.render([3, 7])
+
+        assert len(rendered) == 2
+        assert rendered[1] == analyzer.analyze(**batch.row_inputs(7))
+        assert rendered[0]['role_outputs'][0]['key_evidence']
+
+    @pytest.mark.parametrize('market_state', ['normal', 'consolidation', 'event_driven'])
+    def test_render_from_arrays(self, market_state, monkeypatch):
+        """render 直接以陣列結果組出輸出，每列與逐檔 analyze 完全相同，且不再呼叫 analyze"""
+        analyzer = MultiRoleAnalyzer()
+        batch = analyzer.analyze_batch(market_state=market_state, **_columns(300, seed=2))
+        expected = [analyzer.analyze(market_state=market_state, **batch.row_inputs(i)) for i in range(len(batch))]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("render() 不應逐檔重跑 analyze")
+        monkeypatch.setattr(analyzer, 'analyze', fail)
+
+        assert batch.render() == expected
+
+    def test_scalar_defaults_broadcast(self):
+        """未提供的欄位使用 analyze 的預設值，純量欄位自動展開"""
+        batch = MultiRoleAnalyzer().analyze_batch(foreign_net_volume=[8000, -8000, 0], positive_days=[5, 0, 2],
+                                                  sector_trend="up")
+
+        assert len(batch) == 3
+        assert list(batch.role_directions['籌碼分析官']) == [1, -1, 0]
+
+    def test_unknown_column(self):
+        with pytest.raises(TypeError):
+            MultiRoleAnalyzer().analyze_batch(foreign_net_volume=[1], positive_days=[1], foo=[1])
+
+
+# 每個角色：(逐檔分析器, 批次函式, analyze 參數 -> 批次欄位, 門檻兩側的取值)
+_ROLE_GRIDS = {
+    'chip': (ChipAnalyzer, _chip_batch,
+             ('foreign_net_volume', 'positive_days', 'trust_net_volume', 'dealer_net_volume'),
+             ([-5001, -5000, -4999, 0, 4999, 5000, 5001], range(6), [-1, 0, 1], [-10000, 0, 10000])),
+    'tech': (TechAnalyzer, _tech_batch,
+             ('close', 'ma60', 'ma20', 'rsi', 'macd_diff', 'price_change_5d'),
+             ([100.0], [99.0, 100.0, 101.0], [99.0, 100.0, 101.0], [29.9, 30, 30.1, 69.9, 70, 70.1],
+              [-0.1, 0.0, 0.1], [-5.1, -5, -4.9, 4.9, 5, 5.1])),
+    'context': (ContextAnalyzer, _context_batch,
+                ('has_positive_news', 'has_negative_news', 'sector_trend', 'market_sentiment', 'has_catalyst'),
+                ([False, True], [False, True], ['up', 'down', 'flat'], ['bullish', 'bearish', 'neutral'],
+                 [False, True])),
+    'risk': (RiskAnalyzer, _risk_batch,
+             ('volatility', 'current_drawdown', 'rsi', 'score', 'foreign_net_volume'),
+             ([2.9, 3, 3.1, 4.9, 5, 5.1], [9, 10, 11, 19, 20, 21], [19, 20, 21, 79, 80, 81],
+              [3.9, 4, 6, 6.1], [-5001, -5000, 0, 5000, 5001])),
+}
+_CODES = {'bullish': 1, 'bearish': -1, 'neutral': 0}
+
+
+def _assert_role_matches(role):
+    """批次函式與逐檔分析器在所有組合上的方向、信心度與中間分數相同"""
+    analyzer_cls, kernel, params, grid = _ROLE_GRIDS[role]
+    rows = list(itertools.product(*grid))
+    columns = {name: np.array(values) for name, values in zip(params, zip(*rows))}
+    x = {**columns, 'foreign_net_volume': columns.get('foreign_net_volume', np.zeros(len(rows), dtype=int))}
+    direction, confidence, scores = kernel(x)
+
+    for i, row in enumerate(rows):
+        args = dict(zip(params, row))
+        if role == 'risk':
+            args['foreign_net'] = args.pop('foreign_net_volume')
+        expected = analyzer_cls().analyze(**args)
+        assert direction[i] == _CODES[expected.role_conclusion.value], (role, row)
+        assert confidence[i] == expected.confidence, (role, row)
+        for key, values in scores.items():
+            assert values[i] == expected.raw_data[key], (role, key, row)
+
+
+class TestSharedRules:
+
+    @pytest.mark.parametrize('role', list(_ROLE_GRIDS))
+    def test_kernel_matches_scalar_at_thresholds(self, role):
+        """每個角色的批次函式在門檻兩側的各種組合都與逐檔分析器相同"""
+        _assert_role_matches(role)
+
+    @pytest.mark.parametrize('name, value, role', [
+        ('CHIP_FLOW_VOLUME', 4999, 'chip'),
+        ('TECH_RSI_OVERBOUGHT', 30, 'tech'),
+        ('CONTEXT_SECTOR_POINTS', {'up': 1.0, 'down': -0.2}, 'context'),
+        ('RISK_VOLATILITY_LEVELS', ((4.9, 40), (2.9, 5)), 'risk'),
+    ])
+    def test_thresholds_shared(self, monkeypatch, name, value, role):
+        """調整共用門檻後兩條路徑一起改變（門檻只有一份）"""
+        monkeypatch.setattr(role_analyzers, name, value)
+        _assert_role_matches(role)
+
+
+class FakeExecutor:
+    """只回傳預先算好的結果（不抓資料、不開進程）"""
+
+    def __init__(self, results):
+        self.results = results
+
+    def fetch_all(self, tasks, fetch):
+        return [FetchReport() for _ in tasks]
+
+    def imap_unordered(self, tasks, fetch, compute, finish):
+        yield from enumerate(self.results)
+
+
+def _result(i):
+    return {
+        '代號': str(i), 'features': {'stock_id': str(i)},
+        'role_inputs': {
+            'foreign_net_volume': 1000 * (i - 10), 'positive_days': i % 5, 'close': 100.0 + i, 'ma60': 105.0,
+            'ma20': 105.0, 'rsi': 5.0 * i, 'macd_diff': i - 10.0, 'price_change_5d': 0,
+            'has_positive_news': i % 3 == 0, 'has_negative_news': i % 4 == 0,
+            'sector_trend': 'up', 'market_sentiment': 'neutral',
+        },
+    }
+
+
+class TestRunAnalysisBatch:
+
+    def test_role_analysis_runs_in_batches(self, monkeypatch, tmp_path):
+        """run_analysis 把完成的結果分組交給 analyze_batch，串流前每檔都已有多角色分析"""
+        monkeypatch.setattr(main, 'ROLE_BATCH_SIZE', 8)
+        monkeypatch.setattr(main, 'FEATURE_STORE', FeatureStore(tmp_path))
+        sizes = []
+        original = MultiRoleAnalyzer.analyze_batch
+
+        def spy(self, **columns):
+            batch = original(self, **columns)
+            sizes.append(len(batch))
+            return batch
+        monkeypatch.setattr(MultiRoleAnalyzer, 'analyze_batch', spy)
+
+        results = [_result(i) for i in range(20)]
+        tasks = [(str(i), str(i), None, False, None) for i in range(20)]
+        streamed = []
+        data = main.run_analysis(tasks, None, None, '2026-01-02', executor=FakeExecutor(results),
+                                 on_result=lambda res: streamed.append(dict(res)))
+
+        assert sizes == [8, 8, 4]
+        assert len(streamed) == len(data) == 20
+        assert all(r['role_analysis'] and 'role_inputs' not in r for r in streamed)
+        expected = MultiRoleAnalyzer().analyze(**_result(3)['role_inputs'])
+        assert streamed[3]['role_analysis'] == expected
+
+
+    def test_stream_record_does_not_analyze(self, monkeypatch):
+        """串流回呼只複製結果、去掉特徵，不再逐檔做多角色分析"""
+        def fail(*args, **kwargs):
+            raise AssertionError("stream_record 不應呼叫 analyze_batch")
+        monkeypatch.setattr(MultiRoleAnalyzer, 'analyze_batch', fail)
+        res = {'代號': '2330', 'role_analysis': {'final_direction': '看多'}, 'features': {'stock_id': '2330'}}
+
+        record = main.stream_record(res)
+
+        assert record == {'代號': '2330', 'role_analysis': {'final_direction': '看多'}}
+        assert 'features' in res
+
+
+class TestSerialization:
+
+    def test_to_dict_matches_asdict(self):
+        """手寫 to_dict 與原本 asdict 版本內容相同，且 numpy 純量轉為原生型別"""
+        from dataclasses import asdict
+        from modules.role_analyzers import ConflictResolver, TechAnalyzer
+
+        role = TechAnalyzer().analyze(np.float64(95.0), 100.0, 98.0, np.float64(38.0), -0.5, -6.0)
+        report = ConflictResolver().resolve([role])
+        expected = asdict(role)
+        expected['role_conclusion'] = role.role_conclusion.value
+
+        assert role.to_dict() == expected
+        assert type(role.to_dict()['raw_data']['close']) is float
+        assert report.to_dict()['final_direction'] == report.final_direction.value
+        assert not hasattr(role, '__dict__')
@@ -0,0 +1,80 @@
+"""
+tests/test_scoring.py
+
+測試評分規則表與原本 analyze_stock 的 if 串結果相同
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.scoring import (
+    SCORING_RULES, override, recommend, recommendation, rules_from_json, rules_to_json, score_frame
+)
+
+
+def legacy_score(f):
+    """原本 ProAnalyzer.analyze_stock 的評分流程"""
+    score = 5.0
+    score += max(-3.0, min(3.0, f['trust_net'] / 500))
+    score += max(-2.5, min(2.5, f['foreign_net'] / 1000))
+    yoy = f['revenue_yoy']
+    score += 2.0 if yoy is not None and yoy > 20 else (-2.0 if yoy is not None and yoy < -20 else 0)
+    pe = f['pe']
+    if pe and pe > 0:
+        if pe > 40: score -= 1.5
+        elif pe > 30: score -= 0.5
+        elif pe < 12: score += 1.0
+    if f['stoch_k'] < 20: score += 1.0
+    ma60 = f['sma_60'] if not pd.isna(f['sma_60']) else f['close']
+    if f['close'] > ma60: score += 1.5
+    else: score -= 1.5
+    if f['rsi_14'] > 80: score -= 0.5
+    elif f['rsi_14'] < 20: score += 1.0
+    return max(1, min(10, score))
+
+
+def _features(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = rng.uniform(50, 150, n)
+    return [{
+        'close': close[i],
+        'sma_60': np.nan if rng.random() < 0.1 else close[i] * rng.uniform(0.9, 1.1),
+        'trust_net': int(rng.integers(-3000, 3000)),
+        'foreign_net': int(rng.integers(-5000, 5000)),
+        'revenue_yoy': None if rng.random() < 0.2 else float(rng.normal(0, 30)),
+        'pe': None if rng.random() < 0.2 else round(float(rng.uniform(-5, 60)), 1),
+        'stoch_k': float(rng.uniform(0, 100)),
+        'rsi_14': float(rng.uniform(0, 100)),
+    } for i in range(n)]
+
+
+class TestScoringRules:
+
+    def test_matches_legacy(self):
+        """規則表向量化評分與原本逐檔 if 串逐位元相同"""
+        rows = _features()
+        scores = score_frame(pd.DataFrame(rows))
+
+        assert list(scores) == [legacy_score(f) for f in rows]
+
+    def test_recommendation_cutoffs(self):
+        labels, classes = recommend([9.0, 8.0, 7.0, 5.0, 3.5, 1.0])
+
+        assert list(classes) == ['action-buy', 'action-buy', 'action-bullish', 'action-hold',
+                                 'action-sell', 'action-sell']
+        assert recommendation(6.5) == ("🔥 偏多操作", "action-bullish")
+
+    def test_override_and_json_roundtrip(self):
+        """修改規則只影響指定欄位；規則表可存成 JSON 再讀回"""
+        rules = override(SCORING_RULES, 'trust_net', 'scale', 250)
+        df = pd.DataFrame(_features(5, seed=1)).assign(trust_net=500)
+
+        assert list(SCORING_RULES[0].points(df)) == [1.0] * 5
+        assert list(rules[0].points(df)) == [2.0] * 5
+        assert rules[1:] == SCORING_RULES[1:]
+        assert rules_from_json(rules_to_json(rules)) == rules
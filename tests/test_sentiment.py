@@ -0,0 +1,91 @@
+"""
+tests/test_sentiment.py
+
+測試新聞情緒快取：新舊 yfinance 格式、只評新標題、批次評分
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules import sentiment
+from modules.sentiment import SentimentCache, score_articles, score_watchlist
+
+
+class _CountingAnalyzer:
+    def __init__(self):
+        self.titles = []
+
+    def polarity_scores(self, title):
+        self.titles.append(title)
+        return {'compound': 0.5 if 'up' in title else -0.5}
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    fake = _CountingAnalyzer()
+    monkeypatch.setitem(sentiment._analyzers, os.getpid(), fake)
+    return fake
+
+
+class TestSentimentCache:
+
+    def test_reads_both_news_formats(self, tmp_path, analyzer):
+        """舊版 title 與新版 content.title 都能評分"""
+        news = [
+            {'uuid': 'a', 'title': 'TSMC up', 'link': 'https://x/a'},
+            {'id': 'b', 'content': {'title': 'TSMC down', 'canonicalUrl': {'url': 'https://x/b'}}},
+        ]
+
+        assert score_articles('2330', news, SentimentCache(tmp_path)) == [0.5, -0.5]
+
+    def test_only_new_headlines_are_scored(self, tmp_path, analyzer):
+        """第二次執行只評新出現的文章"""
+        cache = SentimentCache(tmp_path)
+        score_articles('2330', [{'id': 'a', 'content': {'title': 'up 1'}}], cache)
+        score_articles('2330', [{'id': 'a', 'content': {'title': 'up 1'}},
+                                {'id': 'b', 'content': {'title': 'down 2'}}], cache)
+
+        assert analyzer.titles == ['up 1', 'down 2']
+
+    def test_watchlist_batch(self, tmp_path, analyzer):
+        """批次評分回傳每檔平均分數，沒有新聞為 0"""
+        result = score_watchlist({
+            '2330': [{'id': 'a', 'title': 'up'}, {'id': 'b', 'title': 'down'}],
+            '2317': [{'id': 'c', 'title': 'up'}],
+            '0050': [],
+        }, SentimentCache(tmp_path))
+
+        assert result == {'2330': 0.0, '2317': 0.5, '0050': 0.0}
+
+    def test_watchlist_scores_only_new_titles(self, tmp_path, analyzer):
+        """批次評分沿用各檔快取，只評新標題，也只寫回有新標題的快取"""
+        cache = SentimentCache(tmp_path)
+        score_articles('2330', [{'id': 'a', 'title': 'up 1'}], cache)
+        analyzer.titles.clear()
+
+        result = score_watchlist({'2330': [{'id': 'a', 'title': 'up 1'}, {'id': 'b', 'title': 'down 2'}],
+                                  '2317': [{'id': 'a', 'title': 'up 3'}]}, cache)
+
+        assert analyzer.titles == ['down 2', 'up 3']
+        assert result == {'2330': 0.0, '2317': 0.5}
+        assert set(cache.load('2330')) == {'a', 'b'} and set(cache.load('2317')) == {'a'}
+
+    def test_run_analysis_scores_watchlist_once(self, tmp_path, analyzer, monkeypatch):
+        """run_analysis 抓完後整份清單一次評分，分數交給 compute_stock"""
+        import main
+        from modules.fetch_stage import FetchReport
+
+        monkeypatch.setattr(sentiment, 'SENTIMENT_CACHE', SentimentCache(tmp_path))
+        todo = [('2330',), ('2317',), ('0050',)]
+        payloads = [FetchReport(results={'news': [{'id': 'a', 'title': 'up'}]}),
+                    FetchReport(results={'news': [{'id': 'b', 'title': 'down'}]}),
+                    FetchReport()]
+        main.attach_watchlist_sentiment(todo, payloads)
+
+        assert [p.get('sentiment') for p in payloads] == [0.5, -0.5, None]
+        assert analyzer.titles == ['up', 'down']
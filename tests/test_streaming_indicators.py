@@ -0,0 +1,85 @@
+"""
+tests/test_streaming_indicators.py
+
+測試串流指標逐根更新後與整段重算的 calculate_indicators 相同
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import main
+from main import ProAnalyzer
+from modules.price_store import PriceStore
+from modules.streaming_indicators import RollingExtreme, StreamingIndicators
+
+
+def _bars(n=160):
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'date': pd.bdate_range('2024-01-01', periods=n).strftime('%Y-%m-%d'),
+        'close': close, 'max': close + rng.random(n), 'min': close - rng.random(n),
+    })
+
+
+class TestStreamingIndicators:
+
+    def test_push_matches_batch(self):
+        """暖機後逐根推進，每一根都與整段重算一致"""
+        bars = _bars()
+        expected = ProAnalyzer.calculate_indicators(bars.copy(), custom_indicators=['SMA_custom'])
+        live = StreamingIndicators.from_history(bars.iloc[:100], custom_indicators=['SMA_custom'])
+
+        for i in range(100, len(bars)):
+            row = bars.iloc[i]
+            values = live.push_bar(row['close'], row['max'], row['min'])
+            for name in ('SMA_60', 'SMA_custom', 'MACD', 'MACD_signal', 'SMA_20', 'STD_20',
+                         'BB_upper', 'Stoch_K', 'RSI_14'):
+                assert abs(values[name] - expected[name].iloc[i]) < 1e-9, (i, name)
+
+        # Fibonacci 以暖機起算的全部收盤價計算
+        assert abs(live.last['Fib_618'] - expected['Fib_618'].iloc[-1]) < 1e-9
+
+    def test_tick_previews_without_committing(self):
+        """盤中 tick 等同以該價格收盤，但不改變已確認狀態"""
+        bars = _bars()
+        live = StreamingIndicators.from_history(bars.iloc[:-1])
+        last = bars.iloc[-1]
+
+        live.tick(last['close'] + 5)
+        preview = live.tick(last['close'])
+        reference = StreamingIndicators.from_history(bars.iloc[:-1]).push_bar(
+            last['close'], last['close'] + 5, last['close'])
+
+        assert preview['RSI_14'] == reference['RSI_14']
+        assert preview['Stoch_K'] == reference['Stoch_K']
+        assert live.prev_close == bars['close'].iloc[-2]
+
+    def test_realtime_warm_up_matches_daily_report(self, tmp_path, monkeypatch):
+        """盤中串流只用每日報告的暖機區間：本地存了更長的歷史，最後的指標仍與批次計算相同"""
+        store = PriceStore(tmp_path)
+        bars = _bars(600)
+        bars['date'] = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=len(bars)).strftime('%Y-%m-%d')
+        bars['stock_id'] = '2330'
+        store._merge('2330', bars)
+        monkeypatch.setattr(main, 'PRICE_STORE', store)
+
+        live = ProAnalyzer.warm_streaming_indicators('2330')
+        window = store.load('2330', *ProAnalyzer.indicator_window())
+        expected = ProAnalyzer.calculate_indicators(window).iloc[-1]
+
+        assert len(window) < len(bars)
+        for name in ('SMA_60', 'MACD', 'MACD_signal', 'BB_upper', 'Stoch_K', 'RSI_14', 'Fib_618'):
+            assert abs(live.last[name] - expected[name]) < 1e-9, name
+
+    def test_rolling_extreme_matches_pandas(self):
+        values = np.random.default_rng(1).normal(size=50)
+        rolling_max = RollingExtreme(9, 'max')
+        result = [rolling_max.push(v) for v in values]
+
+        np.testing.assert_allclose(result, pd.Series(values).rolling(9).max(), equal_nan=True)
@@ -0,0 +1,97 @@
+"""
+tests/test_two_tier.py
+
+測試兩層執行器：I/O 執行緒並行抓取、進程池計算
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.two_tier import TwoTierExecutor, imap_two_tier, run_two_tier
+
+
+def _slow_fetch(task):
+    time.sleep(0.2)
+    return None if task == 'skip' else task * 2
+
+
+def _fetch_delay(task):
+    time.sleep(task)
+    return task
+
+
+def _crash(task, payload):
+    os._exit(1)
+
+
+def _compute(task, payload):
+    if payload == 'boomboom':
+        raise ValueError('壞資料')
+    return {'task': task, 'value': payload, 'pid': os.getpid()}
+
+
+class TestTwoTier:
+
+    def test_io_concurrency_exceeds_cpu_workers(self):
+        """抓取並行數由 io_workers 決定：1 個計算核心也能同時抓 8 檔"""
+        tasks = [str(i) for i in range(8)]
+        started = time.perf_counter()
+        results = run_two_tier(tasks, _slow_fetch, _compute, io_workers=8, cpu_workers=1)
+        elapsed = time.perf_counter() - started
+
+        assert [r['value'] for r in results] == [t * 2 for t in tasks]
+        assert elapsed < 8 * 0.2
+        assert all(r['pid'] != os.getpid() for r in results)
+
+    def test_failures_and_finish(self):
+        """抓取跳過 / 計算失敗的任務為 None，其餘經過收尾步驟"""
+        results = run_two_tier(['a', 'skip', 'boom', 'b'], _slow_fetch, _compute,
+                               finish=lambda task, res: {**res, 'done': True},
+                               io_workers=4, cpu_workers=2, queue_size=1)
+
+        assert results[1] is None and results[2] is None
+        assert results[0]['done'] and results[3]['value'] == 'bb'
+
+    def test_empty(self):
+        assert run_two_tier([], _slow_fetch, _compute) == []
+
+    def test_executor_reused_across_runs(self):
+        """常駐執行器：多次 run 共用同一批計算進程"""
+        with TwoTierExecutor(io_workers=2, cpu_workers=1) as executor:
+            executor.warm_up()
+            first = executor.run(['a'], _slow_fetch, _compute)
+            second = executor.run(['b', 'c'], _slow_fetch, _compute)
+
+        assert [r['value'] for r in first + second] == ['aa', 'bb', 'cc']
+        assert len({r['pid'] for r in first + second}) == 1
+
+    def test_fetch_all_then_compute(self):
+        """先等齊抓取層（全市場指標矩陣），再以查表函式接續計算"""
+        with TwoTierExecutor(io_workers=4, cpu_workers=1) as executor:
+            payloads = executor.fetch_all(['a', 'skip', 'b'], _slow_fetch)
+            prepared = dict(zip(['a', 'skip', 'b'], payloads))
+            results = executor.run(['a', 'skip', 'b'], prepared.get, _compute)
+
+        assert payloads == ['aa', None, 'bb']
+        assert results[1] is None and [results[0]['value'], results[2]['value']] == ['aa', 'bb']
+
+    def test_imap_unordered_yields_in_completion_order(self):
+        """串流模式：快的任務先產出，不必等最慢的一檔"""
+        started = time.perf_counter()
+        stream = imap_two_tier([0.6, 0.0, 0.1], _fetch_delay, _compute, io_workers=3, cpu_workers=2)
+        first_index, first = next(stream)
+        first_latency = time.perf_counter() - started
+        rest = list(stream)
+
+        assert first_index != 0 and first_latency < 0.6
+        assert [i for i, _ in rest][-1] == 0
+        assert sorted([first_index] + [i for i, _ in rest]) == [0, 1, 2]
+
+    def test_crashed_worker_does_not_hang(self):
+        """計算進程異常終止時，所有任務回傳 None 而不是卡住"""
+        results = run_two_tier(['a', 'b', 'c'], _slow_fetch, _crash, io_workers=3, cpu_workers=1)
+        assert results == [None, None, None]